@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Iterable, Optional, Union
+
+import anyio
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+from models import EventBatchItemResult, EventConfirmation
+
+logger = logging.getLogger(__name__)
+
+
+class BatchItemError(ValueError):
+    """A batch line that could not be turned into a prompt."""
+
+
+async def iter_ndjson_prompts(chunks: AsyncIterable[bytes]) -> AsyncIterator[Union[str, BatchItemError]]:
+    """
+    Split a streamed NDJSON body into prompts, one line at a time.
+    Each line is either a JSON string or an object shaped like the /event-create
+    body ({"desciption": "..."}). Lines that cannot be parsed are yielded as
+    BatchItemError so they fail on their own instead of failing the batch.
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _parse_ndjson_line(line)
+    if buffer.strip():
+        yield _parse_ndjson_line(buffer)
+
+
+async def read_ahead(items: AsyncIterable, size: int, done: anyio.Event) -> AsyncIterator:
+    """
+    Pull `items` in a background task, up to `size` ahead of the consumer, and set
+    `done` once they ran out (or failed). For the chunks of a request body that is
+    when its end, and so a later client disconnect, can be seen, while the prompts
+    already read are still being worked through; memory stays bounded by `size`.
+    """
+    buffer: asyncio.Queue[tuple[str, object]] = asyncio.Queue(size)
+
+    async def fill() -> None:
+        try:
+            async for item in items:
+                await buffer.put(("item", item))
+            outcome: tuple[str, object] = ("end", None)
+        except Exception as e:
+            outcome = ("error", e)
+        finally:
+            done.set()
+        await buffer.put(outcome)
+
+    reader = asyncio.create_task(fill())
+    try:
+        while True:
+            kind, value = await buffer.get()
+            if kind == "end":
+                return
+            if kind == "error":
+                raise value
+            yield value
+    finally:
+        reader.cancel()
+
+
+class UploadStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse for a handler that keeps reading the request body while it
+    responds (the NDJSON batch streams results while its prompts still arrive).
+    Under ASGI HTTP spec < 2.4 the stock one listens on `receive` for a disconnect
+    right away, racing the handler for the body chunks; this one only starts
+    listening once `body_read` is set (see `read_ahead`). A disconnect during the
+    upload reaches the handler as ClientDisconnect from `request.stream()` instead.
+    """
+    def __init__(self, content: AsyncIterable, body_read: anyio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        async with anyio.create_task_group() as task_group:
+
+            async def listen_after_body() -> None:
+                await self.body_read.wait()
+                await self.listen_for_disconnect(receive)
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(listen_after_body)
+            await self.stream_response(send)
+            task_group.cancel_scope.cancel()
+        if self.background is not None:
+            await self.background()
+
+
+def _parse_ndjson_line(line: bytes) -> Union[str, BatchItemError]:
+    try:
+        value = json.loads(line)
+    except json.JSONDecodeError as e:
+        return BatchItemError(f"Invalid JSON line: {e}")
+    if isinstance(value, str):
+        return value
+    if isinstance(value, dict) and isinstance(value.get("desciption"), str):
+        return value["desciption"]
+    return BatchItemError("Expected a JSON string or an object with a 'desciption' field")
+
+
+async def _aiter(prompts: Union[Iterable, AsyncIterable]) -> AsyncIterator:
+    if isinstance(prompts, AsyncIterable):
+        try:
+            async for prompt in prompts:
+                yield prompt
+        finally:
+            # a batch stopped early (client gone) closes its source, e.g. `read_ahead`'s reader task
+            if hasattr(prompts, "aclose"):
+                await prompts.aclose()
+    else:
+        for prompt in prompts:
+            yield prompt
+
+
+async def run_event_batch(
+    prompts: Union[Iterable[Union[str, BatchItemError]], AsyncIterable[Union[str, BatchItemError]]],
+    process: Callable[[str], Awaitable[Optional[EventConfirmation]]],
+    concurrency: int,
+) -> AsyncIterator[EventBatchItemResult]:
+    """
+    Run prompts through `process` with at most `concurrency` in flight and yield
+    each result as soon as it finishes, so one slow item never holds back the rest.
+    Exceptions are reported per item; the batch itself never fails.
+    Args:
+        prompts: Prompts (sync or async iterable), consumed lazily.
+        process: Coroutine function producing the confirmation for one prompt.
+        concurrency: Number of worker tasks.
+    """
+    source = _aiter(prompts)
+    source_lock = asyncio.Lock()
+    results: asyncio.Queue[Optional[EventBatchItemResult]] = asyncio.Queue()
+    next_index = 0
+
+    async def next_prompt() -> Optional[tuple[int, Union[str, BatchItemError]]]:
+        nonlocal next_index
+        async with source_lock:
+            try:
+                prompt = await anext(source)
+            except StopAsyncIteration:
+                return None
+            index = next_index
+            next_index += 1
+            return index, prompt
+
+    async def run_item(index: int, prompt: Union[str, BatchItemError]) -> EventBatchItemResult:
+        if isinstance(prompt, BatchItemError):
+            return EventBatchItemResult(index=index, status="error", error=str(prompt))
+        try:
+            confirmation = await process(prompt)
+        except Exception as e:
+            logger.warning(" --> [run_event_batch] item %d failed: %s", index, e)
+            return EventBatchItemResult(index=index, status="error", error=str(e))
+        if confirmation is None:
+            return EventBatchItemResult(index=index, status="rejected")
+        return EventBatchItemResult(index=index, status="created", confirmation=confirmation)
+
+    async def worker() -> None:
+        try:
+            while (item := await next_prompt()) is not None:
+                await results.put(await run_item(*item))
+        except Exception as e:
+            # the prompt source itself broke (e.g. client disconnected mid-upload)
+            await results.put(EventBatchItemResult(index=-1, status="error", error=str(e)))
+        finally:
+            await results.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+        remaining = len(workers)
+        while remaining:
+            result = await results.get()
+            if result is None:
+                remaining -= 1
+                continue
+            yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await source.aclose()
@@ -0,0 +1,90 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+from const import const
+from app.response_cache import normalize_prompt
+from models import EventDetails
+
+T = TypeVar("T")
+
+
+def coalesce_key(prompt: str, client: str) -> str:
+    """Single-flight key of one /event-create call: the caller and its normalized prompt."""
+    return hashlib.sha256(json.dumps([client, normalize_prompt(prompt)]).encode()).hexdigest()
+
+
+def make_idempotency_key(details: EventDetails, client: str) -> str:
+    """
+    Idempotency key for the MCP create tool, derived from the parsed event, so a
+    retried prompt that parses to the same event maps to the event stored the first time.
+    """
+    payload = json.dumps([client, normalize_prompt(details.name), details.date, details.duration_minutes,
+                          sorted(normalize_prompt(p) for p in details.participants),
+                          details.recurrence.model_dump() if details.recurrence else None])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SingleFlight(Generic[T]):
+    """
+    Runs at most one call per key at a time: callers arriving while a call is
+    in flight wait for it and share its result (or exception). The call runs
+    in its own task, so a caller that gives up does not cancel it for the others.
+    Results are also handed to callers that arrive up to `linger_seconds` after
+    the call finished, which covers clients retrying a just-answered request.
+    """
+    def __init__(self, linger_seconds: float = 0.0):
+        self.linger_seconds = linger_seconds
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._finished: OrderedDict[str, tuple[float, asyncio.Task]] = OrderedDict()
+        self.calls = 0
+        self.shared = 0
+
+    async def run(self, key: str, make_call: Callable[[], Awaitable[T]]) -> tuple[T, bool]:
+        """
+        Returns:
+            The result, and whether it was shared from another caller's call.
+        """
+        task = self._inflight.get(key) or self._recent(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.ensure_future(make_call())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._done(key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task), shared
+
+    def _recent(self, key: str) -> Optional[asyncio.Task]:
+        entry = self._finished.get(key)
+        if entry is None:
+            return None
+        finished_at, task = entry
+        if time.monotonic() - finished_at > self.linger_seconds:
+            del self._finished[key]
+            return None
+        return task
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # failures are not replayed to late arrivals, they get a fresh attempt
+        if self.linger_seconds > 0 and not task.cancelled() and task.exception() is None:
+            now = time.monotonic()
+            while self._finished and now - next(iter(self._finished.values()))[0] > self.linger_seconds:
+                self._finished.popitem(last=False)
+            self._finished[key] = (now, task)
+            self._finished.move_to_end(key)
+
+    def stats(self) -> dict[str, int]:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._inflight)}
+
+
+# process-wide coalescer for the /event-create pipeline, None when disabled
+event_coalescer: Optional[SingleFlight] = (
+    SingleFlight(linger_seconds=const.EVENT_COALESCE_LINGER_SECONDS) if const.EVENT_COALESCING_ENABLED else None
+)
@@ -1,12 +1,34 @@
 
+import asyncio
+import logging
+import time
 from datetime import datetime
-from typing import Optional, Any
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING, Optional, Any
 from pydantic import BaseModel, Field
-from const.const import OPEN_AI_MODEL
+from const.const import (
+   OPEN_AI_MODEL,
+   EVENT_PIPELINE_MODE,
+   EVENT_PIPELINE_MODES,
+   EVENT_CONFIDENCE_THRESHOLD,
+   FAST_PATH_ENABLED,
+   FAST_PATH_MIN_CONFIDENCE,
+)
 
+from app.coalescing import SingleFlight, coalesce_key, event_coalescer as default_event_coalescer, make_idempotency_key
+from app.fast_path import FastPathResult, parse_event_fast
+from app.model_scheduler import ModelCallScheduler, current_client, model_scheduler as default_model_scheduler
+from app.pipeline_stats import pipeline_stats
+from app.response_cache import ResponseCache, make_cache_key, response_cache as default_response_cache
+from app.semantic_cache import SemanticCache, semantic_cache as default_semantic_cache
+from app.speculation import SpeculationGovernor, materially_differs, speculation as default_speculation
 from mcp_client.client import MCPOpenAIClient
-from models import EventConfirmation, EventExtraction, EventDetails
+from models import EventConfirmation, EventExtraction, EventDetails, EventParseResult
+from telemetry.tracing import span, trace_request
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
 
 # todo: remove these!
 '''
@@ -38,68 +60,285 @@ class EventDetails(BaseModel):
 '''
 
 class EventCreationHandler:
-  def __init__(self, openai_client: AsyncOpenAI, mcp_client: MCPOpenAIClient):
+  def __init__(
+      self,
+      openai_client: "AsyncOpenAI",
+      mcp_client: MCPOpenAIClient,
+      pipeline_mode: str = EVENT_PIPELINE_MODE,
+      response_cache: Optional[ResponseCache] = default_response_cache,
+      fast_path: bool = FAST_PATH_ENABLED,
+      scheduler: ModelCallScheduler = default_model_scheduler,
+      coalescer: Optional[SingleFlight] = default_event_coalescer,
+      semantic_cache: Optional[SemanticCache] = default_semantic_cache,
+      speculation: SpeculationGovernor = default_speculation,
+  ):
     self.openai_client = openai_client
     self.mcp_client = mcp_client
     self.model = OPEN_AI_MODEL
+    # "two-pass" runs the gate and the details call back to back, "single-pass" asks for both at once,
+    # "speculative" starts both calls together (two-pass while the gate rejects too often, see `speculation`).
+    if pipeline_mode not in EVENT_PIPELINE_MODES:
+       raise ValueError(f"Unknown pipeline mode {pipeline_mode!r}, expected one of {EVENT_PIPELINE_MODES}")
+    self.pipeline_mode = pipeline_mode
+    self.response_cache = response_cache
+    # rule-based parser tried before any LLM call
+    self.fast_path = fast_path
+    # rate limits shared with every other model call in the process
+    self.scheduler = scheduler
+    # concurrent duplicates of a prompt (same client) share one pipeline run
+    self.coalescer = coalescer
+    # near-duplicate prompts reuse the gate & details results of an earlier one
+    self.semantic_cache = semantic_cache
+    # rejection rate & token/latency accounting of the "speculative" mode, shared by every handler
+    self.speculation = speculation
+    self.__prompt_tokens: int = 0
+    self.__completion_tokens: int = 0
 
   async def initialize_event(self, user_prompt: str) -> Optional[EventConfirmation]:
-    result: Optional[EventConfirmation] | None = await self.__process_calendar_event(user_prompt)
+    with trace_request("event-create", prompt=user_prompt[:200]) as trace:
+       if self.coalescer is None:
+          result: Optional[EventConfirmation] | None = await self.__process_calendar_event(user_prompt)
+       else:
+          result, shared = await self.coalescer.run(
+             coalesce_key(user_prompt, current_client()),
+             lambda: self.__process_calendar_event(user_prompt),
+          )
+          if shared:
+             trace.attributes["coalesced"] = True
+             logger.info(" --> [initialize_event] Shared the result of an identical in-flight request: %s", user_prompt)
+       trace.outcome = "created" if result is not None else "rejected"
     return result
 
-  async def __evaluate_event_extraction(self, user_prompt: str) -> EventExtraction:
-    print(f" --> [__evaluate_event_extraction] evaluating the event before processing: {user_prompt}")
+  def __date_context(self) -> str:
     today: datetime = datetime.now()
-    date_context: str = f"Today is {today.strftime('%A, %B %d, %Y')}."
-    #
-    completion = await self.openai_client.beta.chat.completions.parse(
-       model=self.model,
-       messages=[
-          { # system prompt
-             "role": "system",
-             "content": f"{date_context} Analyze if the text describes a calendar event.",
-          },
-          { # user prompt
-             "role": "user",
-             "content": user_prompt,
-          }
-       ],
-       response_format=EventExtraction,
+    return f"Today is {today.strftime('%A, %B %d, %Y')}."
+
+  def __track_usage(self, completion: Any, call_usage: Optional[dict[str, int]] = None) -> None:
+    usage = getattr(completion, "usage", None)
+    if usage is None:
+       return
+    self.__prompt_tokens += usage.prompt_tokens or 0
+    self.__completion_tokens += usage.completion_tokens or 0
+    if call_usage is not None:
+       call_usage["prompt_tokens"] = usage.prompt_tokens or 0
+       call_usage["completion_tokens"] = usage.completion_tokens or 0
+
+  async def __structured_parse(
+      self,
+      messages: list[dict[str, Any]],
+      response_format: type[BaseModel],
+      user_prompt: str,
+      date_context: str,
+      stage: str,
+      usage: Optional[dict[str, int]] = None,
+  ) -> Any:
+    """
+      Structured LLM call, served from the response cache when an identical
+      prompt was already parsed into the same schema under the same date context.
+      Timed (with its token usage) as the `stage` span. The token usage of this
+      call alone is also written to `usage` when given (zero when cached).
+    """
+    with span(stage) as current:
+       cache_key: Optional[str] = None
+       if self.response_cache is not None:
+          cache_key = make_cache_key(user_prompt, self.model, response_format, date_context)
+          cached = await self.response_cache.aget_model(cache_key, date_context, response_format)
+          if cached is not None:
+             current.attributes["cached"] = True
+             if usage is not None:
+                usage.update(prompt_tokens=0, completion_tokens=0)
+             logger.debug(" --> [__structured_parse] %s served from cache", response_format.__name__)
+             return cached
+       #
+       completion = await self.scheduler.call(
+          lambda: self.openai_client.beta.chat.completions.parse(
+             model=self.model,
+             messages=messages,
+             response_format=response_format,
+          ),
+          messages,
+          stage=stage,
+       )
+       self.__track_usage(completion, usage)
+       current.add_usage(getattr(completion, "usage", None))
+    result = completion.choices[0].message.parsed
+    if cache_key is not None and result is not None:
+       await self.response_cache.aset_model(cache_key, result, date_context)
+    return result
+
+  def __passes_gate(self, extraction_result: EventExtraction) -> bool:
+    return (
+       extraction_result.is_calendar_event and
+       extraction_result.confidence_score >= EVENT_CONFIDENCE_THRESHOLD
     )
-    result: EventExtraction = completion.choices[0].message.parsed
-    print(
-        f" --> [__evaluate_event_extraction] Extraction complete - Is calendar event: {result.is_calendar_event}, Confidence: {result.confidence_score:.2f}"
+
+  async def __evaluate_event_extraction(self, user_prompt: str) -> EventExtraction:
+    logger.debug(" --> [__evaluate_event_extraction] evaluating the event before processing: %s", user_prompt)
+    date_context: str = self.__date_context()
+    #
+    messages: list[dict[str, Any]] = [
+       { # system prompt
+          "role": "system",
+          "content": f"{date_context} Analyze if the text describes a calendar event.",
+       },
+       { # user prompt
+          "role": "user",
+          "content": user_prompt,
+       }
+    ]
+    result: EventExtraction = await self.__structured_parse(messages, EventExtraction, user_prompt, date_context, "extraction")
+    logger.debug(
+        " --> [__evaluate_event_extraction] Extraction complete - Is calendar event: %s, Confidence: %.2f",
+        result.is_calendar_event, result.confidence_score,
     )
     return result
 
-  async def __parse_event_details(self, user_prompt: str) -> EventDetails:
-    print(f" --> [__parse_event_details] Parsing event details from: {user_prompt}")
-    today: datetime = datetime.now()
-    date_context: str = f"Today is {today.strftime('%A, %B %d, %Y')}."
+  async def __parse_event_details(self, user_prompt: str, usage: Optional[dict[str, int]] = None) -> EventDetails:
+    logger.debug(" --> [__parse_event_details] Parsing event details from: %s", user_prompt)
+    date_context: str = self.__date_context()
     #
-    completion = await self.openai_client.beta.chat.completions.parse(
-       model=self.model,
-       messages=[
-          { # system prompt
-             "role": "system",
-             "content": f"{date_context} Extract detailed event information. When dates reference 'next Tuesday' or similar relative dates, use this current date as reference.",
-          },
-          { # user prompt
-             "role": "user",
-             "content": user_prompt,
-          }
-       ],
-       response_format=EventDetails,
-    )
+    messages: list[dict[str, Any]] = [
+       { # system prompt
+          "role": "system",
+          "content": f"{date_context} Extract detailed event information. When dates reference 'next Tuesday' or similar relative dates, use this current date as reference.",
+       },
+       { # user prompt
+          "role": "user",
+          "content": user_prompt,
+       }
+    ]
+    result: EventDetails = await self.__structured_parse(messages, EventDetails, user_prompt, date_context, "detail-parsing", usage)
+    logger.debug(" --> [__parse_event_details] Event details parsed: %s", result)
+    return result
+
+  async def __parse_event_single_pass(self, user_prompt: str) -> EventParseResult:
+    logger.debug(" --> [__parse_event_single_pass] Evaluating & parsing the event in one call: %s", user_prompt)
+    date_context: str = self.__date_context()
     #
-    result: EventDetails = completion.choices[0].message.parsed
-    print(f" --> [__parse_event_details] Event details parsed: {result}")
+    messages: list[dict[str, Any]] = [
+       { # system prompt
+          "role": "system",
+          "content": f"{date_context} Analyze if the text describes a calendar event. If it does, also extract detailed event information, otherwise leave the details empty. When dates reference 'next Tuesday' or similar relative dates, use this current date as reference.",
+       },
+       { # user prompt
+          "role": "user",
+          "content": user_prompt,
+       }
+    ]
+    result: EventParseResult = await self.__structured_parse(messages, EventParseResult, user_prompt, date_context, "single-pass")
+    logger.debug(
+        " --> [__parse_event_single_pass] Is calendar event: %s, Confidence: %.2f, Details: %s",
+        result.extraction.is_calendar_event, result.extraction.confidence_score, result.details,
+    )
     return result
 
+  async def __timed_event_details(self, user_prompt: str, usage: dict[str, int]) -> tuple[EventDetails, float]:
+    started: float = time.perf_counter()
+    result: EventDetails = await self.__parse_event_details(user_prompt, usage)
+    return result, time.perf_counter() - started
+
+  async def __parse_event_speculative(self, user_prompt: str) -> tuple[EventExtraction, Optional[EventDetails]]:
+    """
+      Gate check and detail parsing of the raw prompt at the same time. The
+      details are thrown away when the gate rejects the prompt, and parsed again
+      from the gate's description when that differs materially from the prompt.
+    """
+    logger.debug(" --> [__parse_event_speculative] Evaluating & parsing the event concurrently: %s", user_prompt)
+    usage: dict[str, int] = {}
+    speculative: asyncio.Task = asyncio.ensure_future(self.__timed_event_details(user_prompt, usage))
+    started: float = time.perf_counter()
+    try:
+       extraction_result: EventExtraction = await self.__evaluate_event_extraction(user_prompt)
+    except BaseException:
+       speculative.cancel()
+       raise
+    gate_seconds: float = time.perf_counter() - started
+    passed: bool = self.__passes_gate(extraction_result)
+    self.speculation.record_gate(passed)
+    #
+    outcome: Optional[str] = None
+    if not passed:
+       outcome = "rejected"
+    elif materially_differs(user_prompt, extraction_result.description):
+       outcome = "rerun"
+    if outcome is not None:
+       speculative.cancel()
+       # a detail call that already failed is thrown away as well, its exception retrieved
+       await asyncio.gather(speculative, return_exceptions=True)
+       self.speculation.record_wasted(outcome, usage)
+       logger.debug(" --> [__parse_event_speculative] Speculative details thrown away (%s)", outcome)
+       if outcome == "rejected":
+          return extraction_result, None
+       return extraction_result, await self.__parse_event_details(extraction_result.description)
+    #
+    details, detail_seconds = await speculative
+    # back to back, the two calls would have taken gate + details; overlapped, the shorter one is saved
+    self.speculation.record_used(min(gate_seconds, detail_seconds))
+    return extraction_result, details
+
+  async def __extract_event_details(self, user_prompt: str) -> Optional[EventDetails]:
+    """
+      Run the gate check and detail parsing in the configured pipeline mode.
+      Returns None when the prompt does not pass the gate.
+    """
+    started: float = time.perf_counter()
+    if self.fast_path:
+       with span("fast-path"):
+          fast_result: Optional[FastPathResult] = parse_event_fast(user_prompt)
+       if fast_result is not None and fast_result.confidence >= FAST_PATH_MIN_CONFIDENCE:
+          logger.debug(" --> [__extract_event_details] Parsed without the LLM (confidence %.2f): %s", fast_result.confidence, fast_result.details)
+          pipeline_stats.record("fast-path", time.perf_counter() - started, 0, 0)
+          return fast_result.details
+    #
+    if self.semantic_cache is not None:
+       with span("semantic-cache") as current:
+          cached = self.semantic_cache.lookup(user_prompt)
+          current.attributes["hit"] = cached is not None
+       if cached is not None:
+          logger.debug(" --> [__extract_event_details] Reused the results of a near-duplicate prompt: %s", cached)
+          pipeline_stats.record("semantic-cache", time.perf_counter() - started, 0, 0)
+          extraction_result, details = cached
+          return details if self.__passes_gate(extraction_result) else None
+    #
+    self.__prompt_tokens = self.__completion_tokens = 0
+    mode: str = self.pipeline_mode
+    if mode == "speculative" and not self.speculation.enabled:
+       # too many prompts fail the gate for the thrown-away detail calls to pay off
+       self.speculation.record_fallback()
+       mode = "two-pass"
+    try:
+       details: Optional[EventDetails] = None
+       if mode == "single-pass":
+          parse_result: EventParseResult = await self.__parse_event_single_pass(user_prompt)
+          extraction_result = parse_result.extraction
+          if self.__passes_gate(extraction_result):
+             details = parse_result.details
+       elif mode == "speculative":
+          extraction_result, details = await self.__parse_event_speculative(user_prompt)
+       else:
+          # first LLM call
+          extraction_result = await self.__evaluate_event_extraction(user_prompt)
+          passed: bool = self.__passes_gate(extraction_result)
+          if self.pipeline_mode == "speculative":
+             # keeps the rejection rate current, so speculation resumes once it drops
+             self.speculation.record_gate(passed)
+          if passed:
+             # second LLM call to parse specific event details
+             details = await self.__parse_event_details(extraction_result.description)
+       if self.semantic_cache is not None:
+          self.semantic_cache.add(user_prompt, extraction_result, details)
+       return details
+    finally:
+       pipeline_stats.record(
+          mode,
+          time.perf_counter() - started,
+          self.__prompt_tokens,
+          self.__completion_tokens,
+       )
+
   async def __event_creation(self, event_details: EventDetails) -> EventConfirmation:
-    print(f" --> [__event_creation] Creating calendar event with details: {event_details}")
-    # Here you would typically create the event in your calendar system
-    # todo: this is where we going to use the MCP client to create the event in the calendar using tools.
+    logger.debug(" --> [__event_creation] Creating calendar event with details: %s", event_details)
+    # the model picks the MCP tool (create_calendar_event) & writes the confirmation from its result
     llm_promopt: list[dict[str, Any]] = [
          { # system prompt
                "role": "system",
@@ -110,35 +349,35 @@ class EventCreationHandler:
                "content": f"Create an event named '{event_details.name}' on {event_details.date} for {event_details.duration_minutes} minutes with participants: {', '.join(event_details.participants)}.",
          }
     ]
-    
-    # For demonstration, we will just return a mock confirmation
-    confirmation = EventConfirmation(
-        confirmation_message=f"Event '{event_details.name}' created successfully on {event_details.date}.",
-        calendar_link="https://example.com/calendar/event12345"
-    )
-    print(f" --> [__event_creation] Event creation confirmed: {confirmation}")
+    if event_details.recurrence is not None:
+       # stored once as a series, the tool's `recurrence` argument takes the same fields
+       llm_promopt[1]["content"] += f" It repeats with this recurrence rule: {event_details.recurrence.model_dump_json(exclude_none=True)}."
+    started: float = time.perf_counter()
+    try:
+       with span("event-creation"):
+          # retries that parse to the same event get the stored one back instead of a duplicate
+          confirmation: EventConfirmation = await self.mcp_client.process_query(
+             llm_promopt,
+             idempotency_key=make_idempotency_key(event_details, current_client()),
+          )
+    finally:
+       pipeline_stats.record_stage("event-creation", time.perf_counter() - started)
+    logger.debug(" --> [__event_creation] Event creation confirmed: %s", confirmation)
     return confirmation
 
   async def __process_calendar_event(self, user_prompt: str) -> None | EventConfirmation:
-    print(f" --> [__process_calendar_event] Processing calendar event: {user_prompt}")
-    # first LLM call
-    extraction_result: EventExtraction = await self.__evaluate_event_extraction(user_prompt)
-    if (
-       not extraction_result.is_calendar_event or
-       extraction_result.confidence_score < 0.7
-    ): 
-       print(f" --> [__process_calendar_event] Not a valid calendar event: {user_prompt}")
+    logger.info(" --> [__process_calendar_event] Processing calendar event: %s", user_prompt)
+    # gate check + detail parsing (one or two LLM calls depending on the pipeline mode)
+    event_details: Optional[EventDetails] = await self.__extract_event_details(user_prompt)
+    if event_details is None:
+       logger.info(" --> [__process_calendar_event] Not a valid calendar event: %s", user_prompt)
        return None
     #
-    print(f" --> [__process_calendar_event] Valid calendar event detected: {user_prompt}")
-
-    # second LLM call to parse specific event details
-    event_details: EventDetails = await self.__parse_event_details(extraction_result.description)
-    print(f" --> [__process_calendar_event] Event details extracted: {event_details}")
+    logger.debug(" --> [__process_calendar_event] Event details extracted: %s", event_details)
 
     # third LLM call to create the event
     confirmation: EventConfirmation = await self.__event_creation(event_details)
-    print(f" --> [__process_calendar_event] Event creation confirmed: {confirmation}")
+    logger.info(" --> [__process_calendar_event] Event creation confirmed: %s", confirmation)
 
     #
     return confirmation
@@ -0,0 +1,209 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from const import const
+from models import EventDetails
+
+# Rule-based parser for the formulaic prompts that make up most traffic:
+#   "<title> <today/tomorrow/weekday> at <time> for <duration> with <names>"
+# Anything it cannot account for word by word falls through to the LLM path.
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tue": 1, "tues": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thur": 3, "thurs": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}
+RELATIVE_DAYS = {"today": 0, "tonight": 0, "tomorrow": 1, "tmrw": 1, "tmr": 1}
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "half an": 0.5, "half a": 0.5}
+# longer stated durations ("for 100000 hours") are more likely a typo or a multi-day plan: left to the LLM
+MAX_DURATION_MINUTES = 24 * 60
+
+# prompts mentioning these need real language understanding (recurrence, edits, negations, cancellations...)
+BAIL_WORDS = re.compile(
+    r"\b(every|each|daily|weekly|monthly|until|between|or|not|no|never|cancel|cancell?ed|call off|called off|"
+    r"drop|skip|delete|remove|clear|move|reschedule|postpone|push|email|call me|remind|if|unless|except|"
+    r"before|after|from|to|till|without|instead|"
+    r"can't|cant|cannot|won't|wont|don't|dont|didn't|didnt|isn't|isnt|aren't|arent|couldn't|couldnt)\b|\?"
+)
+# a prompt opening like a question ("did we have standup ...") asks about the calendar, it does not book anything;
+# "can/could you ..." requests are the exception, they are imperatives
+QUESTION_RE = re.compile(
+    r"^(?:did|do|does|is|are|was|were|will|would|should|shall|have|has|had|am|"
+    r"what|what's|whats|when|where|who|whom|whose|why|how|which)\b"
+)
+
+DAY_RE = re.compile(
+    r"\b(?:on\s+)?(?:(?P<rel>today|tonight|tomorrow|tmrw|tmr)|(?:(?P<next>next|this)\s+)?(?P<wd>"
+    + "|".join(sorted(WEEKDAYS, key=len, reverse=True))
+    + r"))\b"
+)
+TIME_RE = re.compile(
+    r"(?:\b(?:at|@)\s*|(?<![\w:]))"
+    r"(?:(?P<noon>noon|midday)|(?P<h>\d{1,2})(?::(?P<m>\d{2}))?\s*(?P<ampm>am|pm|a\.m\.|p\.m\.)?)"
+    r"(?![\w:])"
+)
+DURATION_RE = re.compile(
+    r"\b(?:for\s+)?(?P<n>\d+(?:\.\d+)?|half an|half a|an|a|one|two|three)[\s-]*"
+    r"(?P<unit>hours?|hrs?|h|minutes?|mins?|m)\b(?:\s+long)?"
+)
+PARTICIPANTS_RE = re.compile(r"\bwith\s+(?P<names>.+)$")
+NAME_SPLIT_RE = re.compile(r"\s*(?:,\s*and\s+|,|\band\b|&)\s*")
+LEADING_FILLER = {
+    "please", "let's", "lets", "can", "could", "you", "schedule", "book", "set", "up", "setup",
+    "add", "create", "put", "plan", "a", "an", "the", "my", "our",
+}
+CONNECTORS = {"at", "on", "for", "in", "with"}
+# the title is the object of an imperative ("<title> tomorrow at 9am"); a subject in it means a sentence about an event
+SUBJECTS = {
+    "i", "i'm", "im", "i've", "ive", "i'll", "me", "we", "we're", "we'll", "us", "you", "he", "she", "it",
+    "they", "them", "him", "her", "there",
+}
+TITLE_RE = re.compile(r"^[a-z][a-z' /&-]*$")
+
+
+@dataclass
+class FastPathResult:
+    details: EventDetails
+    confidence: float
+
+
+def _resolve_day(match: re.Match, now: datetime) -> datetime:
+    if match.group("rel"):
+        return now + timedelta(days=RELATIVE_DAYS[match.group("rel")])
+    days_ahead = (WEEKDAYS[match.group("wd")] - now.weekday()) % 7
+    if days_ahead == 0 and match.group("next") != "this":
+        # "monday" said on a monday means the coming one, not today
+        days_ahead = 7
+    return now + timedelta(days=days_ahead)
+
+
+def _resolve_time(match: re.Match) -> Optional[tuple[int, int]]:
+    if match.group("noon"):
+        return 12, 0
+    hour, minute = int(match.group("h")), int(match.group("m") or 0)
+    ampm = (match.group("ampm") or "").replace(".", "")
+    if minute > 59:
+        return None
+    if ampm:
+        if not 1 <= hour <= 12:
+            return None
+        if ampm == "pm" and hour != 12:
+            hour += 12
+        elif ampm == "am" and hour == 12:
+            hour = 0
+        return hour, minute
+    # without am/pm only unambiguous 24h times are accepted ("14:00", not "at 3")
+    if match.group("m") is None or hour < 13 or hour > 23:
+        return None
+    return hour, minute
+
+
+def _resolve_duration(match: re.Match) -> int:
+    n = match.group("n")
+    amount = float(n) if n[0].isdigit() else WORD_NUMBERS[n]
+    return round(amount * 60) if match.group("unit").startswith("h") else round(amount)
+
+
+def _cut(text: str, match: re.Match) -> str:
+    return f"{text[:match.start()]} {text[match.end():]}"
+
+
+def _split_names(names: str, original: str) -> list[str]:
+    """Split the casefolded name list at its separators, returning the names as typed in `original` (same offsets)."""
+    pieces, start = [], 0
+    for separator in NAME_SPLIT_RE.finditer(names):
+        pieces.append(original[start:separator.start()])
+        start = separator.end()
+    pieces.append(original[start:])
+    return [piece.strip() for piece in pieces if piece.strip()]
+
+
+def parse_event_fast(user_prompt: str, now: Optional[datetime] = None) -> Optional[FastPathResult]:
+    """
+    Try to parse a prompt without the LLM.
+    Args:
+        user_prompt: The raw user prompt.
+        now: Reference time for relative dates (defaults to datetime.now()).
+    Returns:
+        The parsed details and a confidence score, or None when the prompt does not fit the grammar.
+    """
+    now = now or datetime.now()
+    # matched casefolded, while names & the title are taken from `original` at the same offsets
+    original = " ".join(user_prompt.split()).rstrip(".!")
+    text = original.casefold()
+    if not text or len(text) != len(original) or BAIL_WORDS.search(text) or QUESTION_RE.match(text):
+        return None
+    head = text.split()
+    while head and head[0] in LEADING_FILLER:
+        head.pop(0)
+    head_start = len(text.split()) - len(head)
+
+    participants: list[str] = []
+    names_match = PARTICIPANTS_RE.search(text)
+    if names_match:
+        names = names_match.group("names")
+        # "lunch with bob tomorrow at noon": the name list ends where the date/time/duration starts
+        ends = [m.start() for regex in (DAY_RE, TIME_RE, DURATION_RE) if (m := regex.search(names))]
+        rest = ""
+        if ends:
+            names, rest = names[:min(ends)], names[min(ends):]
+        names_start = names_match.start("names")
+        participants = _split_names(names, original[names_start:names_start + len(names)])
+        if not participants or any(len(n.split()) > 3 for n in participants):
+            return None
+        text = f"{text[:names_match.start()]} {rest}"
+
+    day_matches = list(DAY_RE.finditer(text))
+    if len(day_matches) != 1:
+        return None
+    day = _resolve_day(day_matches[0], now)
+    text = _cut(text, day_matches[0])
+
+    time_matches = [m for m in TIME_RE.finditer(text) if not DURATION_RE.match(text, m.start())]
+    if len(time_matches) != 1 or (clock := _resolve_time(time_matches[0])) is None:
+        return None
+    text = _cut(text, time_matches[0])
+
+    duration_matches = list(DURATION_RE.finditer(text))
+    if len(duration_matches) > 1:
+        return None
+    confidence = 1.0
+    if duration_matches:
+        duration_minutes = _resolve_duration(duration_matches[0])
+        text = _cut(text, duration_matches[0])
+    else:
+        # a guessed duration keeps the result under the default FAST_PATH_MIN_CONFIDENCE: the LLM path decides
+        duration_minutes = const.FAST_PATH_DEFAULT_DURATION_MINUTES
+        confidence -= 0.3
+    if not participants:
+        confidence -= 0.1
+    if not 0 < duration_minutes <= MAX_DURATION_MINUTES:
+        return None
+
+    words = text.split()
+    while words and words[0] in LEADING_FILLER:
+        words.pop(0)
+    # a connector left inside the title means a location or detail we did not parse
+    if not words or len(words) > 6 or CONNECTORS.intersection(words) or SUBJECTS.intersection(words):
+        return None
+    # the title must open the prompt, not be pieced together from words left between the parsed parts
+    if head[:len(words)] != words:
+        return None
+    if not TITLE_RE.match(" ".join(words)):
+        return None
+    title = " ".join(original.split()[head_start:head_start + len(words)])
+
+    start = day.replace(hour=clock[0], minute=clock[1], second=0, microsecond=0)
+    details = EventDetails(
+        name=title[0].upper() + title[1:],
+        date=start.isoformat(),
+        duration_minutes=duration_minutes,
+        participants=participants,
+    )
+    return FastPathResult(details=details, confidence=round(confidence, 2))
@@ -0,0 +1,172 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from telemetry.metrics import registry
+
+HEDGES = registry.counter(
+    "calendar_model_hedges_total", "Duplicate model calls fired for slow calls, by stage & which call answered first."
+)
+HEDGE_WON_SECONDS = registry.histogram(
+    "calendar_model_hedge_won_latency_seconds",
+    "Latency of duplicate model calls that answered first (the first call is cancelled, so the time saved is unknown).",
+)
+
+T = TypeVar("T")
+
+
+class LatencyWindow:
+    """The last `size` latencies of one stage, with a percentile recomputed only after new samples."""
+    __slots__ = ("samples", "_sorted")
+
+    def __init__(self, size: int):
+        self.samples: deque[float] = deque(maxlen=size)
+        self._sorted: Optional[list[float]] = None
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self._sorted = None
+
+    def percentile(self, percentile: float) -> float:
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        index = min(len(self._sorted) - 1, int(len(self._sorted) * percentile / 100))
+        return self._sorted[index]
+
+
+def _succeeded(task: asyncio.Task) -> bool:
+    """Done without an exception; `task.exception()` itself raises for a cancelled task."""
+    return not task.cancelled() and task.exception() is None
+
+
+class Hedger:
+    """
+    Hedged requests: when a call is still running after the `percentile`
+    latency of its stage, a duplicate is started and whichever answers first
+    is used and the other one is cancelled, so a won hedge costs no more than the
+    calls it actually needed. The first call's full latency, and so the time saved, is
+    then never known: only the duplicate's own latency is reported, and the first call's
+    running time so far goes into the stage's latency window (a lower bound, keeping the slow tail in).
+    Each call earns `max_extra_ratio` of a duplicate (up to `burst` saved up),
+    so duplicates stay within that share of all calls.
+    """
+    def __init__(
+        self,
+        percentile: float = 95,
+        min_samples: int = 20,
+        window: int = 200,
+        max_extra_ratio: float = 0.05,
+        burst: float = 5,
+    ):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.window = window
+        self.max_extra_ratio = max_extra_ratio
+        self.burst = burst
+        self._latencies: Dict[str, LatencyWindow] = {}
+        self._credit = 0.0
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_won = 0
+        self.hedge_won_seconds = 0.0
+
+    def delay(self, stage: str) -> Optional[float]:
+        """Seconds after which a call of `stage` is hedged, None while too few of its calls were seen."""
+        latencies = self._latencies.get(stage)
+        if latencies is None or len(latencies.samples) < self.min_samples:
+            return None
+        return latencies.percentile(self.percentile)
+
+    def _record(self, stage: str, started: float, task: asyncio.Task) -> None:
+        if _succeeded(task):
+            self._add_latency(stage, time.perf_counter() - started)
+
+    def _add_latency(self, stage: str, seconds: float) -> None:
+        latencies = self._latencies.get(stage)
+        if latencies is None:
+            latencies = self._latencies[stage] = LatencyWindow(self.window)
+        latencies.add(seconds)
+
+    def _take_credit(self) -> bool:
+        if self._credit < 1:
+            return False
+        self._credit -= 1
+        return True
+
+    async def run(
+        self,
+        stage: str,
+        attempt: Callable[[], Awaitable[T]],
+        may_hedge: Callable[[], bool] = lambda: True,
+    ) -> T:
+        """
+        Run `attempt()`, and a second `attempt()` if the first is slow for its stage.
+        Args:
+            stage: Calls are compared with earlier calls of the same stage.
+            attempt: Issues one call; called once more for the duplicate.
+            may_hedge: Checked before firing a duplicate (e.g. False while calls queue for rate limits).
+        Raises:
+            The first call's exception, when both calls fail.
+        """
+        self.calls += 1
+        self._credit = min(self.burst, self._credit + self.max_extra_ratio)
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(attempt())
+        # only first calls are sampled, so the percentile is not skewed by duplicates started late
+        primary.add_done_callback(lambda task: self._record(stage, started, task))
+        delay = self.delay(stage)
+        if delay is None:
+            return await primary
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done or not may_hedge() or not self._take_credit():
+            return await primary
+
+        self.hedged += 1
+        hedge_started = time.perf_counter()
+        hedge = asyncio.ensure_future(attempt())
+        pending = {primary, hedge}
+        winner: Optional[asyncio.Task] = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in (primary, hedge) if task in done and _succeeded(task)), None)
+        except asyncio.CancelledError:
+            primary.cancel()
+            hedge.cancel()
+            raise
+        if winner is None:
+            # both failed: the hedge's exception is retrieved too, so it is not logged as never retrieved
+            if not hedge.cancelled():
+                hedge.exception()
+            return primary.result()
+        answered = time.perf_counter()
+        if winner is primary:
+            hedge.cancel()
+            HEDGES.inc(stage=stage, winner="primary")
+        else:
+            self.hedge_won += 1
+            HEDGES.inc(stage=stage, winner="hedge")
+            if not primary.done():
+                # cancelled, so its done callback records nothing: keep its time so far as a sample
+                primary.cancel()
+                self._add_latency(stage, answered - started)
+            elif not primary.cancelled():
+                primary.exception()  # retrieved, so a failed loser is not reported as never awaited
+            latency = answered - hedge_started
+            self.hedge_won_seconds += latency
+            HEDGE_WON_SECONDS.labels(stage=stage).observe(latency)
+        return winner.result()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_won": self.hedge_won,
+            "hedge_won_latency_s": round(self.hedge_won_seconds, 3),
+            "hedge_after_s": {stage: self.delay(stage) for stage in self._latencies},
+        }
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Awaitable, Callable, Optional
+
+from app.model_scheduler import model_call_context
+from app.shared_state import SharedJobStore
+from models import EventConfirmation, EventJobStatus
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueueFull(Exception):
+    """The job queue is at capacity; the caller should retry later."""
+
+
+class EventJobManager:
+    """
+    Runs event-creation prompts in the background on a fixed set of worker tasks.
+    Submissions go through a bounded queue and are refused (not buffered) when it
+    is full. Finished jobs are kept for `retention_seconds` so clients can poll them.
+    With a `shared` store every status change is also written there, so the other
+    uvicorn workers can answer polls for jobs running in this one.
+    Each job runs inside the `model_call_context` it was submitted with, so its model
+    calls are queued, coalesced & keyed under the submitting API client.
+    """
+    def __init__(
+        self,
+        process: Callable[[str], Awaitable[Optional[EventConfirmation]]],
+        workers: int = 4,
+        max_queue: int = 100,
+        retention_seconds: float = 3600,
+        shared: Optional[SharedJobStore] = None,
+    ):
+        self.process = process
+        self.workers = workers
+        self.retention_seconds = retention_seconds
+        self.queue: asyncio.Queue[tuple[str, str, str, str]] = asyncio.Queue(maxsize=max_queue)
+        self.jobs: OrderedDict[str, tuple[float, EventJobStatus]] = OrderedDict()
+        self.shared = shared
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"event-job-worker-{i}") for i in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, prompt: str, client: str = "default", priority: str = "batch") -> EventJobStatus:
+        """
+        Queue a prompt.
+        Args:
+            prompt: The raw user prompt.
+            client: API client the job's model calls, coalescing & idempotency keys belong to.
+            priority: Scheduler priority class of the job's model calls; nobody waits on the
+                response, so by default jobs queue behind interactive calls.
+        Raises:
+            JobQueueFull: when `max_queue` jobs are already waiting.
+        """
+        self._prune()
+        job = EventJobStatus(job_id=uuid.uuid4().hex, status="queued")
+        try:
+            self.queue.put_nowait((job.job_id, prompt, client, priority))
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"{self.queue.maxsize} jobs already queued")
+        self.jobs[job.job_id] = (time.monotonic(), job)
+        if self.shared is not None:
+            self.shared.put(job)
+        return job
+
+    async def get(self, job_id: str) -> Optional[EventJobStatus]:
+        entry = self.jobs.get(job_id)
+        if entry is None and self.shared is not None:
+            # accepted by another worker; read off the event loop, the file is shared with the other workers
+            return await asyncio.to_thread(self.shared.get, job_id)
+        return entry[1] if entry else None
+
+    def _update(self, job_id: str, **fields) -> None:
+        entry = self.jobs.get(job_id)
+        if entry is not None:
+            # refresh the timestamp, retention counts from the last change
+            job = entry[1].model_copy(update=fields)
+            self.jobs[job_id] = (time.monotonic(), job)
+            self.jobs.move_to_end(job_id)
+            if self.shared is not None:
+                self.shared.put(job)
+
+    def _prune(self) -> None:
+        cutoff = time.monotonic() - self.retention_seconds
+        while self.jobs:
+            job_id, (updated, job) = next(iter(self.jobs.items()))
+            if updated >= cutoff or job.status in ("queued", "running"):
+                break
+            del self.jobs[job_id]
+        if self.shared is not None:
+            self.shared.prune(self.retention_seconds)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, prompt, client, priority = await self.queue.get()
+            self._update(job_id, status="running")
+            try:
+                with model_call_context(priority, client):
+                    confirmation = await self.process(prompt)
+            except Exception as e:
+                logger.warning(" --> [EventJobManager] job %s failed: %s", job_id, e)
+                self._update(job_id, status="failed", error=str(e))
+            else:
+                if confirmation is None:
+                    self._update(job_id, status="rejected")
+                else:
+                    self._update(job_id, status="succeeded", confirmation=confirmation)
+            finally:
+                self.queue.task_done()
@@ -0,0 +1,323 @@
+import asyncio
+import contextvars
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional, TypeVar
+
+from app.hedging import Hedger
+from const import const
+from telemetry.metrics import registry
+
+if TYPE_CHECKING:
+    from openai import RateLimitError
+
+logger = logging.getLogger(__name__)
+
+# served strictly in this order: batch calls only go out when no interactive call is waiting
+PRIORITIES = ("interactive", "batch")
+
+QUEUE_DEPTH = registry.gauge("calendar_model_queue_depth", "Model calls waiting for rate-limit capacity.")
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "calendar_model_queue_wait_seconds", "Time a model call waited for rate-limit capacity."
+)
+RATE_LIMITED = registry.counter("calendar_model_rate_limited_total", "Upstream 429 responses, retried after a pause.")
+
+T = TypeVar("T")
+
+_call_context: contextvars.ContextVar[tuple[str, str]] = contextvars.ContextVar(
+    "model_call_context", default=("interactive", "default")
+)
+
+
+@contextmanager
+def model_call_context(priority: str = "interactive", client: str = "default") -> Iterator[None]:
+    """Priority class and API client the model calls made inside the block are queued under."""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority {priority!r}, expected one of {PRIORITIES}")
+    token = _call_context.set((priority, client))
+    try:
+        yield
+    finally:
+        _call_context.reset(token)
+
+
+def current_client() -> str:
+    """API client set by the enclosing `model_call_context` ("default" outside of one)."""
+    return _call_context.get()[1]
+
+
+def _message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        content, tool_calls = message.get("content"), message.get("tool_calls")
+    else:  # ChatCompletionMessage echoed back into the conversation
+        content, tool_calls = getattr(message, "content", None), getattr(message, "tool_calls", None)
+    text = content if isinstance(content, str) else ""
+    for tool_call in tool_calls or ():
+        function = tool_call["function"] if isinstance(tool_call, dict) else tool_call.function
+        arguments = function["arguments"] if isinstance(function, dict) else function.arguments
+        text += arguments or ""
+    return text
+
+
+def estimate_prompt_tokens(messages: Iterable[Any], tools: Optional[list[dict[str, Any]]] = None) -> int:
+    """Rough prompt size (~4 characters per token, plus a few per message) for the tokens-per-minute budget."""
+    tokens = 0
+    for message in messages:
+        tokens += 4 + len(_message_text(message)) // 4
+    if tools:
+        tokens += len(json.dumps(tools)) // 4
+    return tokens
+
+
+def _retry_after(error: "RateLimitError", attempt: int) -> float:
+    """Seconds to back off after a 429: the `retry-after(-ms)` header when present, exponential otherwise."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return min(60.0, 2.0 ** attempt)
+
+
+class TokenBucket:
+    """
+    Continuously refilled budget of `per_minute` units, holding at most one
+    minute's worth. The level may go negative when a call used more than it
+    was charged up front; later calls then wait for the debt to refill.
+    A limit of 0 means unlimited.
+    """
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.level = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.per_minute, self.level + (now - self.updated) * self.per_minute / 60)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken (calls larger than the whole bucket only wait for a full one)."""
+        if self.per_minute <= 0:
+            return 0.0
+        self._refill(now)
+        missing = min(amount, self.per_minute) - self.level
+        return max(0.0, missing * 60 / self.per_minute)
+
+    def take(self, amount: float) -> None:
+        if self.per_minute > 0:
+            self.level -= amount
+
+
+class _Waiter:
+    __slots__ = ("future", "tokens", "priority", "client", "enqueued")
+
+    def __init__(self, future: asyncio.Future, tokens: int, priority: str, client: str):
+        self.future = future
+        self.tokens = tokens
+        self.priority = priority
+        self.client = client
+        self.enqueued = time.perf_counter()
+
+
+class ModelCallScheduler:
+    """
+    Shared gate in front of every outbound `chat.completions` call. Calls take
+    one request and their estimated tokens from two token buckets (RPM & TPM);
+    when either is short they wait instead of hitting the upstream limit.
+    Waiting calls are served by priority class first, then round-robin across
+    API clients within a class, so one busy client cannot starve the others.
+    A 429 from upstream pauses the whole scheduler for its `Retry-After` and
+    the call is queued again, up to `max_retries` times.
+    With a `hedger`, slow calls get a duplicate (itself rate limited), unless
+    calls are already queueing for capacity.
+    """
+    def __init__(
+        self,
+        rpm_limit: float = 0,
+        tpm_limit: float = 0,
+        completion_token_estimate: int = 256,
+        max_retries: int = 5,
+        hedger: Optional[Hedger] = None,
+    ):
+        self.requests = TokenBucket(rpm_limit)
+        self.tokens = TokenBucket(tpm_limit)
+        self.completion_token_estimate = completion_token_estimate
+        self.max_retries = max_retries
+        self.hedger = hedger
+        # priority -> client -> waiters, clients in round-robin order
+        self._queues: Dict[str, OrderedDict[str, deque[_Waiter]]] = {p: OrderedDict() for p in PRIORITIES}
+        self._depth: Dict[str, int] = dict.fromkeys(PRIORITIES, 0)
+        self._paused_until = 0.0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = 0
+        self.rate_limited = 0
+
+    async def call(
+        self,
+        make_call: Callable[[], Awaitable[T]],
+        messages: Iterable[Any],
+        tools: Optional[list[dict[str, Any]]] = None,
+        stage: str = "model",
+    ) -> T:
+        """
+        Run one model call once there is capacity for it.
+        Args:
+            make_call: Issues the request; called again for every retry after a 429 (and for a hedge).
+            messages: The chat messages sent, used to estimate the prompt tokens.
+            tools: The tool catalog sent with the call, if any (counted towards the estimate).
+            stage: Pipeline stage of the call; hedging compares calls of the same stage.
+        Returns:
+            The completion. Its `usage` replaces the estimate in the token budget.
+        Raises:
+            RateLimitError: when upstream still refuses after `max_retries` pauses.
+        """
+        priority, client = _call_context.get()
+        estimate = estimate_prompt_tokens(messages, tools) + self.completion_token_estimate
+        if self.hedger is None:
+            return await self._call(make_call, estimate, priority, client)
+        return await self.hedger.run(
+            stage,
+            lambda: self._call(make_call, estimate, priority, client),
+            may_hedge=lambda: not any(self._depth.values()),
+        )
+
+    async def _call(self, make_call: Callable[[], Awaitable[T]], estimate: int, priority: str, client: str) -> T:
+        # loaded with the OpenAI client, not on import (see main.py's startup)
+        from openai import RateLimitError
+
+        attempt = 0
+        while True:
+            await self._acquire(estimate, priority, client)
+            try:
+                response = await make_call()
+            except RateLimitError as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = _retry_after(e, attempt)
+                attempt += 1
+                self.rate_limited += 1
+                RATE_LIMITED.inc(priority=priority)
+                logger.warning(" --> [ModelCallScheduler] rate limited upstream, pausing %.1fs (retry %d)", delay, attempt)
+                self._pause(delay)
+                continue
+            usage = getattr(response, "usage", None)
+            if usage is not None and usage.total_tokens:
+                self.tokens.take(usage.total_tokens - estimate)
+                if any(self._depth.values()):
+                    self._dispatch()
+            return response
+
+    async def _acquire(self, tokens: int, priority: str, client: str) -> None:
+        if not any(self._depth.values()) and self._delay(tokens, time.monotonic()) <= 0:
+            self._grant(tokens)
+            QUEUE_WAIT_SECONDS.labels(priority=priority).observe(0.0)
+            return
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), tokens, priority, client)
+        self._queues[priority].setdefault(client, deque()).append(waiter)
+        self._set_depth(priority, 1)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            self._remove(waiter)
+            self._dispatch()
+            raise
+
+    def _delay(self, tokens: int, now: float) -> float:
+        return max(
+            self._paused_until - now,
+            self.requests.wait_time(1, now),
+            self.tokens.wait_time(tokens, now),
+        )
+
+    def _grant(self, tokens: int) -> None:
+        self.requests.take(1)
+        self.tokens.take(tokens)
+        self.granted += 1
+
+    def _set_depth(self, priority: str, change: int) -> None:
+        self._depth[priority] += change
+        QUEUE_DEPTH.set(self._depth[priority], priority=priority)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        clients = self._queues[waiter.priority]
+        waiters = clients.get(waiter.client)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del clients[waiter.client]
+        self._set_depth(waiter.priority, -1)
+
+    def _peek_next(self) -> Optional[_Waiter]:
+        """Head waiter of the next client in the highest non-empty priority class, skipping cancelled ones."""
+        for priority in PRIORITIES:
+            clients = self._queues[priority]
+            while clients:
+                client, waiters = next(iter(clients.items()))
+                waiter = waiters[0]
+                if waiter.future.done():
+                    self._remove(waiter)
+                    continue
+                return waiter
+        return None
+
+    def _dispatch(self) -> None:
+        """Grant queued calls while there is capacity, then sleep until the head call fits."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while (waiter := self._peek_next()) is not None:
+            delay = self._delay(waiter.tokens, time.monotonic())
+            if delay > 0:
+                self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+                return
+            self._remove(waiter)
+            # rotate the client to the back so the next grant goes to another client
+            clients = self._queues[waiter.priority]
+            if waiter.client in clients:
+                clients.move_to_end(waiter.client)
+            self._grant(waiter.tokens)
+            QUEUE_WAIT_SECONDS.labels(priority=waiter.priority).observe(time.perf_counter() - waiter.enqueued)
+            waiter.future.set_result(None)
+
+    def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        self.requests._refill(now)
+        self.tokens._refill(now)
+        return {
+            "rpm_limit": self.requests.per_minute,
+            "tpm_limit": self.tokens.per_minute,
+            "available_requests": self.requests.level if self.requests.per_minute > 0 else None,
+            "available_tokens": self.tokens.level if self.tokens.per_minute > 0 else None,
+            "queued": dict(self._depth),
+            "clients_waiting": {p: len(clients) for p, clients in self._queues.items()},
+            "paused_s": max(0.0, self._paused_until - now),
+            "granted": self.granted,
+            "rate_limited": self.rate_limited,
+            "hedging": self.hedger.stats() if self.hedger else None,
+        }
+
+
+# process-wide scheduler shared by every EventCreationHandler & the MCP client
+model_scheduler = ModelCallScheduler(
+    rpm_limit=const.MODEL_RPM_LIMIT,
+    tpm_limit=const.MODEL_TPM_LIMIT,
+    completion_token_estimate=const.MODEL_COMPLETION_TOKEN_ESTIMATE,
+    max_retries=const.MODEL_RATE_LIMIT_RETRIES,
+    hedger=Hedger(
+        percentile=const.MODEL_HEDGE_PERCENTILE,
+        min_samples=const.MODEL_HEDGE_MIN_SAMPLES,
+        window=const.MODEL_HEDGE_WINDOW,
+        max_extra_ratio=const.MODEL_HEDGE_MAX_EXTRA_RATIO,
+    ) if const.MODEL_HEDGE_ENABLED else None,
+)
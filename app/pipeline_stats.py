@@ -0,0 +1,85 @@
+from collections import deque
+from typing import Any, Iterable
+
+# latencies kept per mode / stage for the percentiles (most recent ones)
+LATENCY_SAMPLE_SIZE = 4096
+
+
+def latency_percentiles(latencies_s: Iterable[float]) -> dict[str, float]:
+    """p50/p95/p99 in milliseconds (nearest rank)."""
+    ordered = sorted(latencies_s)
+    if not ordered:
+        return {"p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0}
+    pick = lambda q: ordered[min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))] * 1000
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99)}
+
+
+class PipelineStats:
+    """Running latency and token totals, grouped by pipeline mode, plus latency per pipeline stage."""
+    def __init__(self):
+        self._modes: dict[str, dict[str, float]] = {}
+        self._stages: dict[str, dict[str, float]] = {}
+        self._samples: dict[str, deque[float]] = {}
+
+    def _sample(self, key: str, latency_s: float) -> None:
+        self._samples.setdefault(key, deque(maxlen=LATENCY_SAMPLE_SIZE)).append(latency_s)
+
+    def record(self, mode: str, latency_s: float, prompt_tokens: int, completion_tokens: int) -> None:
+        """
+        Record one pass through the extraction pipeline.
+        Args:
+            mode: The pipeline mode that served the request.
+            latency_s: Wall time spent in the model calls, in seconds.
+            prompt_tokens: Prompt tokens reported by the OpenAI `usage` field.
+            completion_tokens: Completion tokens reported by the OpenAI `usage` field.
+        """
+        totals = self._modes.setdefault(
+            mode, {"requests": 0, "latency_s": 0.0, "prompt_tokens": 0, "completion_tokens": 0}
+        )
+        totals["requests"] += 1
+        totals["latency_s"] += latency_s
+        totals["prompt_tokens"] += prompt_tokens
+        totals["completion_tokens"] += completion_tokens
+        self._sample(f"mode:{mode}", latency_s)
+
+    def record_stage(self, stage: str, latency_s: float) -> None:
+        """
+        Record the wall time of one pipeline stage (e.g. "event-creation", the MCP tool loop).
+        """
+        totals = self._stages.setdefault(stage, {"requests": 0, "latency_s": 0.0})
+        totals["requests"] += 1
+        totals["latency_s"] += latency_s
+        self._sample(f"stage:{stage}", latency_s)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Totals, per-request averages and latency percentiles for every mode seen so far.
+        """
+        result: dict[str, dict[str, Any]] = {}
+        for mode, totals in self._modes.items():
+            requests = totals["requests"] or 1
+            result[mode] = {
+                **totals,
+                "avg_latency_ms": totals["latency_s"] * 1000 / requests,
+                "avg_prompt_tokens": totals["prompt_tokens"] / requests,
+                "avg_completion_tokens": totals["completion_tokens"] / requests,
+                **latency_percentiles(self._samples.get(f"mode:{mode}", ())),
+            }
+        return result
+
+    def stages_snapshot(self) -> dict[str, dict[str, Any]]:
+        """
+        Request count, average and latency percentiles for every stage seen so far.
+        """
+        return {
+            stage: {
+                **totals,
+                "avg_latency_ms": totals["latency_s"] * 1000 / (totals["requests"] or 1),
+                **latency_percentiles(self._samples.get(f"stage:{stage}", ())),
+            }
+            for stage, totals in self._stages.items()
+        }
+
+
+# process-wide instance shared by every EventCreationHandler
+pipeline_stats = PipelineStats()
@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Type
+
+from pydantic import BaseModel
+
+from app.shared_state import connect
+from const import const
+
+
+def normalize_prompt(text: str) -> str:
+    """Case-fold and collapse whitespace so trivially different prompts share a key."""
+    return " ".join(text.casefold().split())
+
+
+_schema_fingerprints: dict[type, str] = {}
+
+
+def _schema_fingerprint(response_format: Type[BaseModel]) -> str:
+    fingerprint = _schema_fingerprints.get(response_format)
+    if fingerprint is None:
+        schema = json.dumps(response_format.model_json_schema(), sort_keys=True)
+        fingerprint = hashlib.sha256(schema.encode()).hexdigest()
+        _schema_fingerprints[response_format] = fingerprint
+    return fingerprint
+
+
+def make_cache_key(prompt: str, model: str, response_format: Type[BaseModel], date_context: str) -> str:
+    """
+    Content address for one structured LLM call.
+    Args:
+        prompt: The user prompt sent to the model (normalized before hashing).
+        model: The OpenAI model name.
+        response_format: The Pydantic schema the response is parsed into.
+        date_context: The "Today is ..." string the system prompt was built with.
+    Returns:
+        A hex sha256 digest.
+    """
+    payload = json.dumps(
+        [model, response_format.__name__, _schema_fingerprint(response_format), date_context, normalize_prompt(prompt)]
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Base class for LLM response caches. Values are the parsed response model,
+    stored as JSON. Entries are tagged with the date context they were produced
+    under and dropped as soon as a lookup arrives with a newer one, since
+    relative dates ("tomorrow", "next Tuesday") are no longer valid.
+    The async accessors are the ones to use on the event loop: tiers doing blocking
+    I/O (`blocking = True`) are run in a worker thread there.
+    """
+    blocking = False
+
+    def __init__(self):
+        self.hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expirations: int = 0
+
+    def get(self, key: str, date_context: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, date_context: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def get_model(self, key: str, date_context: str, response_format: Type[BaseModel]) -> Optional[BaseModel]:
+        value = self.get(key, date_context)
+        if value is None:
+            return None
+        return response_format.model_validate_json(value)
+
+    def set_model(self, key: str, value: BaseModel, date_context: str) -> None:
+        self.set(key, value.model_dump_json(), date_context)
+
+    async def aget(self, key: str, date_context: str) -> Optional[str]:
+        if self.blocking:
+            return await asyncio.to_thread(self.get, key, date_context)
+        return self.get(key, date_context)
+
+    async def aset(self, key: str, value: str, date_context: str) -> None:
+        if self.blocking:
+            await asyncio.to_thread(self.set, key, value, date_context)
+        else:
+            self.set(key, value, date_context)
+
+    async def aget_model(self, key: str, date_context: str, response_format: Type[BaseModel]) -> Optional[BaseModel]:
+        value = await self.aget(key, date_context)
+        if value is None:
+            return None
+        return response_format.model_validate_json(value)
+
+    async def aset_model(self, key: str, value: BaseModel, date_context: str) -> None:
+        await self.aset(key, value.model_dump_json(), date_context)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class LRUResponseCache(ResponseCache):
+    """Bounded in-memory LRU with a per-entry TTL."""
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str, str]] = OrderedDict()
+        self._date_context: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _rollover(self, date_context: str) -> None:
+        if self._date_context == date_context:
+            return
+        stale = [key for key, (_, _, ctx) in self._entries.items() if ctx != date_context]
+        for key in stale:
+            del self._entries[key]
+        self.expirations += len(stale)
+        self._date_context = date_context
+
+    def get(self, key: str, date_context: str) -> Optional[str]:
+        self._rollover(date_context)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value, _ = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: str, date_context: str) -> None:
+        self._rollover(date_context)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, date_context)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    On-disk cache tier that survives restarts. Uses wall-clock expiry. Safe to
+    share between processes (see app/shared_state.py): the uvicorn workers of a
+    node then answer from each other's entries.
+    Reads never write, so workers only contend for the write lock on `set`: entries
+    are evicted oldest-written first (the memory tier in front keeps the hot ones),
+    and expired & surplus rows are trimmed every `trim_every` sets, not on each one.
+    """
+    blocking = True
+
+    def __init__(self, path: str, ttl_seconds: float = 3600, max_entries: int = 100_000, trim_every: int = 256):
+        super().__init__()
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.trim_every = trim_every
+        self._sets_since_trim = 0
+        self._lock = threading.Lock()
+        self._conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS response_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, date_context TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS response_cache_accessed ON response_cache (accessed_at)")
+        self._date_context: Optional[str] = None
+
+    def _rollover(self, date_context: str) -> None:
+        if self._date_context == date_context:
+            return
+        cursor = self._conn.execute("DELETE FROM response_cache WHERE date_context != ?", (date_context,))
+        self.expirations += cursor.rowcount
+        self._date_context = date_context
+
+    def get(self, key: str, date_context: str) -> Optional[str]:
+        with self._lock:
+            self._rollover(date_context)
+            row = self._conn.execute(
+                "SELECT value FROM response_cache WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str, date_context: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._rollover(date_context)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?, ?, ?)",
+                (key, value, date_context, now + self.ttl_seconds, now),
+            )
+            self._sets_since_trim += 1
+            if self._sets_since_trim >= self.trim_every:
+                self._sets_since_trim = 0
+                self._trim(now)
+
+    def _trim(self, now: float) -> None:
+        """Drop expired rows, then the oldest-written ones above `max_entries`."""
+        cursor = self._conn.execute("DELETE FROM response_cache WHERE expires_at < ?", (now,))
+        self.expirations += cursor.rowcount
+        # `accessed_at` is the write time: entries are not touched on reads
+        cursor = self._conn.execute(
+            "DELETE FROM response_cache WHERE key IN "
+            "(SELECT key FROM response_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self.evictions += cursor.rowcount
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM response_cache")
+
+
+class TieredResponseCache(ResponseCache):
+    """Memory LRU in front of a SQLite tier; disk hits are promoted into memory."""
+    def __init__(self, memory: LRUResponseCache, disk: SQLiteResponseCache):
+        super().__init__()
+        self.memory = memory
+        self.disk = disk
+
+    def get(self, key: str, date_context: str) -> Optional[str]:
+        value = self.memory.get(key, date_context)
+        if value is None:
+            value = self.disk.get(key, date_context)
+            if value is not None:
+                self.memory.set(key, value, date_context)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str, date_context: str) -> None:
+        self.memory.set(key, value, date_context)
+        self.disk.set(key, value, date_context)
+
+    async def aget(self, key: str, date_context: str) -> Optional[str]:
+        value = self.memory.get(key, date_context)
+        if value is None:
+            value = await self.disk.aget(key, date_context)
+            if value is not None:
+                self.memory.set(key, value, date_context)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def aset(self, key: str, value: str, date_context: str) -> None:
+        self.memory.set(key, value, date_context)
+        await self.disk.aset(key, value, date_context)
+
+    def clear(self) -> None:
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            **super().stats(),
+            "evictions": self.memory.evictions + self.disk.evictions,
+            "expirations": self.memory.expirations + self.disk.expirations,
+            "memory": self.memory.stats(),
+            "disk": self.disk.stats(),
+        }
+
+
+def build_response_cache() -> Optional[ResponseCache]:
+    """
+    Build the process-wide cache from the RESPONSE_CACHE_* settings.
+    Returns None when caching is disabled.
+    """
+    if not const.RESPONSE_CACHE_ENABLED:
+        return None
+    memory = LRUResponseCache(
+        max_entries=const.RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=const.RESPONSE_CACHE_TTL_SECONDS,
+    )
+    # the SQLite tier goes to the workers' shared state file unless it has its own path
+    path = const.RESPONSE_CACHE_SQLITE_PATH or const.SHARED_STATE_PATH
+    if not path:
+        return memory
+    disk = SQLiteResponseCache(
+        path,
+        ttl_seconds=const.RESPONSE_CACHE_TTL_SECONDS,
+    )
+    return TieredResponseCache(memory, disk)
+
+
+response_cache: Optional[ResponseCache] = build_response_cache()
@@ -0,0 +1,252 @@
+import re
+import zlib
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+import numpy as np
+
+from app.fast_path import (
+    BAIL_WORDS,
+    CONNECTORS,
+    DAY_RE,
+    DURATION_RE,
+    LEADING_FILLER,
+    NAME_SPLIT_RE,
+    PARTICIPANTS_RE,
+    RELATIVE_DAYS,
+    TIME_RE,
+    WEEKDAYS,
+    _resolve_day,
+    _resolve_duration,
+    _resolve_time,
+)
+from const import const
+from models import EventDetails, EventExtraction
+
+# shorthand seen in chat-style prompts, spelled out before embedding & fact extraction
+SHORTHAND = {
+    "w/": "with", "w": "with", "tmrw": "tomorrow", "tmr": "tomorrow", "tmw": "tomorrow", "2moro": "tomorrow",
+    "mtg": "meeting", "mins": "min", "minutes": "min", "minute": "min", "hrs": "h", "hr": "h", "hours": "h",
+    "hour": "h", "@": "at", "+": "and", "pls": "please", "plz": "please",
+}
+TOKEN_RE = re.compile(r"w/|[\w:.']+|[@+&,?]")
+DIGITS_RE = re.compile(r"\d+")
+# words that do not change which event is meant
+TOPIC_FILLER = LEADING_FILLER | CONNECTORS | {"meeting", "event", "?", ",", "&"}
+NGRAM_SIZES = (3, 4, 5)
+
+
+def canonicalize(prompt: str) -> str:
+    """Case-folded prompt with shorthand spelled out & punctuation other than `@ + & , ?` dropped."""
+    tokens = TOKEN_RE.findall(prompt.casefold())
+    return " ".join(SHORTHAND.get(token.rstrip("."), token) for token in tokens)
+
+
+def embed(text: str, dim: int) -> np.ndarray:
+    """
+    Offline text embedding: signed feature hashing of the character 3-5-grams of
+    the canonical text (crc32, so vectors are stable across processes), L2-normalized.
+    Prompts differing by a few characters share most n-grams & land close together.
+    """
+    padded = f" {canonicalize(text)} ".encode()
+    hashes = np.fromiter(
+        (zlib.crc32(padded[i:i + n]) for n in NGRAM_SIZES for i in range(len(padded) - n + 1)), dtype=np.int64
+    )
+    vector = np.zeros(dim, dtype=np.float32)
+    np.add.at(vector, hashes % dim, np.where(hashes & 0x80000000, 1.0, -1.0).astype(np.float32))
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+@dataclass(frozen=True)
+class PromptFacts:
+    """The parts of a prompt a near-duplicate has to agree on exactly: what kind of request, what, when, how long & with whom."""
+    intents: frozenset
+    topic: frozenset
+    days: tuple
+    clocks: tuple
+    durations: tuple
+    numbers: tuple
+    participants: frozenset
+
+
+def prompt_facts(prompt: str) -> PromptFacts:
+    text = canonicalize(prompt)
+    participants: frozenset = frozenset()
+    rest = text
+    names_match = PARTICIPANTS_RE.search(text)
+    if names_match:
+        names = names_match.group("names")
+        ends = [m.start() for regex in (DAY_RE, TIME_RE, DURATION_RE) if (m := regex.search(names))]
+        names, after = (names[:min(ends)], names[min(ends):]) if ends else (names, "")
+        participants = frozenset(n.strip() for n in NAME_SPLIT_RE.split(names) if n.strip())
+        rest = f"{text[:names_match.start()]} {after}"
+    days = tuple(
+        ("rel", RELATIVE_DAYS[m.group("rel")]) if m.group("rel") else ("wd", WEEKDAYS[m.group("wd")], m.group("next"))
+        for m in DAY_RE.finditer(text)
+    )
+    durations = tuple(_resolve_duration(m) for m in DURATION_RE.finditer(text))
+    clocks = tuple(
+        _resolve_time(m) or m.group(0).strip()
+        for m in TIME_RE.finditer(text)
+        if not DURATION_RE.match(text, m.start())
+    )
+    for regex in (DAY_RE, DURATION_RE, TIME_RE):
+        rest = regex.sub(" ", rest)
+    # what is left names the event: "sync", "design review", "room 4"; its numbers have to match as well
+    words = [word.replace("'", "") for word in rest.split()]
+    topic = frozenset(word for word in words if word not in TOPIC_FILLER and not word.isdigit())
+    numbers = tuple(sorted(DIGITS_RE.findall(rest)))
+    # "cancel", "every", "move", ... change what is asked for, not just how it is phrased
+    intents = frozenset(m.group(0) for m in BAIL_WORDS.finditer(text))
+    return PromptFacts(intents, topic, days, clocks, durations, numbers, participants)
+
+
+def shift_dates(details: EventDetails, days: int) -> EventDetails:
+    """`details` with its date (& recurrence end) moved by `days` days."""
+    if not days:
+        return details
+    moved = details.model_copy(update={"date": (datetime.fromisoformat(details.date) + timedelta(days=days)).isoformat()})
+    if details.recurrence is not None and details.recurrence.until:
+        until = details.recurrence.until
+        # a date-only until stays date-only: it means that whole day, midnight would drop its occurrence
+        until = (date.fromisoformat(until) if "T" not in until else datetime.fromisoformat(until)) + timedelta(days=days)
+        until = until.isoformat()
+        moved.recurrence = details.recurrence.model_copy(update={"until": until})
+    return moved
+
+
+@dataclass
+class _Entry:
+    prompt: str
+    facts: PromptFacts
+    day_match: Optional[re.Match]
+    anchor: date
+    extraction: EventExtraction
+    details: Optional[EventDetails]
+
+
+class SemanticCache:
+    """
+    Near-duplicate cache for the gate & detail-parsing results. Prompts are
+    embedded (`embed`) into the rows of a fixed-capacity matrix; a lookup is
+    one matrix-vector product over all rows, and the best rows above
+    `threshold` are then checked for the same `PromptFacts`, so "sync w/ Bob
+    tmrw 3pm" reuses "sync with Bob tomorrow at 3pm" but not "... at 4pm".
+    Relative days are resolved again for the lookup's date: an entry stored
+    yesterday for "tomorrow" comes back one day later. When full, the least
+    recently used row is overwritten.
+    """
+    CANDIDATES = 4
+
+    def __init__(self, capacity: int = 4096, dim: int = 1024, threshold: float = 0.7):
+        self.capacity = capacity
+        self.dim = dim
+        self.threshold = threshold
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._last_used = np.zeros(capacity, dtype=np.int64)
+        self._entries: list[Optional[_Entry]] = [None] * capacity
+        self._size = 0
+        self._tick = 0
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def lookup(self, prompt: str, now: Optional[datetime] = None) -> Optional[tuple[EventExtraction, Optional[EventDetails]]]:
+        """
+        Cached results of a near-duplicate prompt, dates resolved for `now`.
+        Returns:
+            The gate result & the details (None when the gate rejected the prompt), or None on a miss.
+        """
+        now = now or datetime.now()
+        if self._size == 0:
+            self.misses += 1
+            return None
+        scores = self._vectors[:self._size] @ embed(prompt, self.dim)
+        count = min(self.CANDIDATES, self._size)
+        best = np.argpartition(-scores, count - 1)[:count]
+        facts: Optional[PromptFacts] = None
+        for row in best[np.argsort(-scores[best])]:
+            if scores[row] < self.threshold:
+                break
+            entry = self._entries[row]
+            facts = facts or prompt_facts(prompt)
+            result = self._reuse(entry, facts, now)
+            if result is None:
+                self.rejected += 1
+                continue
+            self._tick += 1
+            self._last_used[row] = self._tick
+            self.hits += 1
+            return result
+        self.misses += 1
+        return None
+
+    def _reuse(self, entry: _Entry, facts: PromptFacts, now: datetime) -> Optional[tuple[EventExtraction, Optional[EventDetails]]]:
+        if facts != entry.facts:
+            return None
+        details = entry.details
+        if details is None or entry.anchor == now.date():
+            return entry.extraction, details
+        if entry.day_match is None:
+            # stored on another day without a day we know how to re-resolve ("in 2 days", "next week")
+            return None
+        # same day expression, resolved today instead of on the day the entry was stored
+        then = datetime.combine(entry.anchor, datetime.min.time())
+        shift = _resolve_day(entry.day_match, now).date() - _resolve_day(entry.day_match, then).date()
+        try:
+            return entry.extraction, shift_dates(details, shift.days)
+        except ValueError:
+            return None
+
+    def add(
+        self,
+        prompt: str,
+        extraction: EventExtraction,
+        details: Optional[EventDetails],
+        now: Optional[datetime] = None,
+    ) -> None:
+        """Store the model's results for a prompt, resolved against `now`."""
+        now = now or datetime.now()
+        facts = prompt_facts(prompt)
+        day_matches = list(DAY_RE.finditer(canonicalize(prompt)))
+        entry = _Entry(prompt, facts, day_matches[0] if len(day_matches) == 1 else None, now.date(), extraction, details)
+        if self._size < self.capacity:
+            row = self._size
+            self._size += 1
+        else:
+            row = int(np.argmin(self._last_used))
+            self.evictions += 1
+        self._vectors[row] = embed(prompt, self.dim)
+        self._entries[row] = entry
+        self._tick += 1
+        self._last_used[row] = self._tick
+
+    def clear(self) -> None:
+        self._entries = [None] * self.capacity
+        self._last_used[:] = 0
+        self._size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+            "entries": self._size,
+        }
+
+
+# process-wide semantic cache in front of the gate & detail-parsing calls, None when disabled
+semantic_cache: Optional[SemanticCache] = (
+    SemanticCache(
+        capacity=const.SEMANTIC_CACHE_CAPACITY,
+        dim=const.SEMANTIC_CACHE_DIM,
+        threshold=const.SEMANTIC_CACHE_THRESHOLD,
+    ) if const.SEMANTIC_CACHE_ENABLED else None
+)
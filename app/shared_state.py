@@ -0,0 +1,143 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Optional, Union
+
+from const import const
+from models import EventJobStatus
+
+logger = logging.getLogger(__name__)
+
+# Node-local state shared by the uvicorn workers (`--workers N`) through one SQLite file
+# (SHARED_STATE_PATH), no external service needed. The response cache's SQLite tier and the
+# async job statuses live there; idempotency keys already do, in the MCP event store
+# (EVENT_STORE_PATH), which every worker's MCP server opens.
+
+
+def connect(path: str) -> sqlite3.Connection:
+    """
+    Autocommit connection to a SQLite file several processes write to: WAL (readers
+    never block), and a writer waits up to `SHARED_STATE_BUSY_TIMEOUT_MS` for the
+    write lock instead of failing with "database is locked".
+    """
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(const.SHARED_STATE_BUSY_TIMEOUT_MS)}")
+    return conn
+
+
+class SharedJobStore:
+    """
+    Status of the async /event-create jobs, readable by every worker: a job runs in
+    the worker that accepted it, but `GET /jobs/{id}` may land on any other one.
+    Writes are queued & done in order by a background thread, batched into one
+    transaction, so no caller (the event loop included) waits for the write lock
+    other workers may hold; a poll may see a status a few milliseconds late.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        # the writer thread has its own connection: readers never queue behind a write waiting for the lock
+        self._conn = connect(path)
+        self._read_lock = threading.Lock()
+        self._read_conn = connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS event_jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, job TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS event_jobs_updated ON event_jobs (updated_at)")
+        # a job status to write, the retention of a prune, or None: stop once everything before it is written
+        self._writes: queue.SimpleQueue[Union[EventJobStatus, float, None]] = queue.SimpleQueue()
+        self._writer_lock = threading.Lock()
+        self._writer: Optional[threading.Thread] = None
+
+    def _enqueue(self, item: Union[EventJobStatus, float]) -> None:
+        # the writer is (re)started on demand, so a store used again after `close()` keeps writing
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="shared-job-writer", daemon=True)
+                self._writer.start()
+            self._writes.put(item)
+
+    def put(self, job: EventJobStatus) -> None:
+        self._enqueue(job)
+
+    def prune(self, retention_seconds: float) -> None:
+        """Drop finished jobs not updated for `retention_seconds` (in the background, like `put`)."""
+        self._enqueue(retention_seconds)
+
+    def close(self) -> None:
+        """Write out the queued statuses and stop the writer thread (blocking: call it off the event loop)."""
+        with self._writer_lock:
+            writer, self._writer = self._writer, None
+            if writer is None:
+                return
+            self._writes.put(None)
+        writer.join()
+
+    def _write_loop(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self._writes.get()]
+            while batch[-1] is not None:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                stop = True
+                batch.pop()
+            if not batch:
+                continue
+            try:
+                self._write(batch)
+            except sqlite3.Error as e:
+                logger.warning("Shared job store: dropped %d writes: %s", len(batch), e)
+
+    def _write(self, batch: list[Union[EventJobStatus, float]]) -> None:
+        now = time.time()
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            for item in batch:
+                if isinstance(item, EventJobStatus):
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO event_jobs VALUES (?, ?, ?, ?)",
+                        (item.job_id, item.status, item.model_dump_json(), now),
+                    )
+                else:
+                    self._conn.execute(
+                        "DELETE FROM event_jobs WHERE updated_at < ? AND status NOT IN ('queued', 'running')",
+                        (now - item,),
+                    )
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def get(self, job_id: str) -> Optional[EventJobStatus]:
+        with self._read_lock:
+            row = self._read_conn.execute("SELECT job FROM event_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return EventJobStatus.model_validate_json(row[0]) if row else None
+
+    def stats(self) -> dict[str, Any]:
+        with self._read_lock:
+            rows = self._read_conn.execute("SELECT status, COUNT(*) FROM event_jobs GROUP BY status").fetchall()
+        return dict(rows)
+
+
+def shared_state_stats() -> Optional[dict[str, Any]]:
+    """For GET /pipeline-stats: the shared file & which worker answered (the other counters there are per worker)."""
+    if not const.SHARED_STATE_PATH:
+        return None
+    return {
+        "path": const.SHARED_STATE_PATH,
+        "worker_pid": os.getpid(),
+        "jobs": shared_job_store.stats() if shared_job_store else None,
+    }
+
+
+# process-wide handle on the shared job table, None when SHARED_STATE_PATH is not set
+shared_job_store: Optional[SharedJobStore] = SharedJobStore(const.SHARED_STATE_PATH) if const.SHARED_STATE_PATH else None
@@ -0,0 +1,118 @@
+from collections import deque
+from typing import Any, Optional
+
+from app.response_cache import normalize_prompt
+from app.semantic_cache import prompt_facts
+from const import const
+from telemetry.metrics import registry
+
+SPECULATIONS = registry.counter(
+    "calendar_speculations_total",
+    "Detail calls started next to the gate call, by outcome (used, rejected by the gate, rerun on the gate's description).",
+)
+SPECULATION_WASTED_TOKENS = registry.counter(
+    "calendar_speculation_wasted_tokens_total", "Tokens of speculative detail calls whose result was thrown away."
+)
+SPECULATION_SAVED_SECONDS = registry.histogram(
+    "calendar_speculation_saved_seconds", "Latency saved by a used speculative detail call: how long it overlapped the gate call."
+)
+
+
+def materially_differs(prompt: str, description: str) -> bool:
+    """
+    Whether the gate's `description` of a prompt could parse to other details
+    than the prompt itself: a different day, time, duration, number or participant.
+    Rewording the title ("Sync" vs "a sync meeting") does not count.
+    """
+    if normalize_prompt(prompt) == normalize_prompt(description):
+        return False
+    ours, theirs = prompt_facts(prompt), prompt_facts(description)
+    return (
+        (ours.days, ours.clocks, ours.durations, ours.numbers, ours.participants)
+        != (theirs.days, theirs.clocks, theirs.durations, theirs.numbers, theirs.participants)
+    )
+
+
+class SpeculationGovernor:
+    """
+    Bookkeeping for the "speculative" pipeline mode, which parses the details of
+    the raw prompt while the gate call is still running. The gate results of the
+    last `window` prompts decide whether speculating pays off: above
+    `max_rejection_rate` rejections (once `min_samples` are known) the handler
+    falls back to two-pass, and speculates again when the rate comes back down.
+    Tokens of thrown-away detail calls are counted against the latency saved.
+    """
+    def __init__(self, max_rejection_rate: float = 0.2, window: int = 100, min_samples: int = 20):
+        self.max_rejection_rate = max_rejection_rate
+        self.min_samples = min_samples
+        self._gates: deque[bool] = deque(maxlen=window)
+        self.used = 0
+        self.rejected = 0
+        self.rerun = 0
+        self.cancelled = 0
+        self.fallbacks = 0
+        self.wasted_prompt_tokens = 0
+        self.wasted_completion_tokens = 0
+        self.saved_seconds = 0.0
+
+    def rejection_rate(self) -> float:
+        return self._gates.count(False) / len(self._gates) if self._gates else 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return len(self._gates) < self.min_samples or self.rejection_rate() <= self.max_rejection_rate
+
+    def record_gate(self, passed: bool) -> None:
+        """Gate result of one prompt, speculated on or not."""
+        self._gates.append(passed)
+
+    def record_fallback(self) -> None:
+        self.fallbacks += 1
+
+    def record_used(self, saved_seconds: float) -> None:
+        self.used += 1
+        self.saved_seconds += saved_seconds
+        SPECULATIONS.inc(outcome="used")
+        SPECULATION_SAVED_SECONDS.labels().observe(saved_seconds)
+
+    def record_wasted(self, outcome: str, usage: Optional[dict[str, int]]) -> None:
+        """
+        A speculative detail call that was thrown away.
+        Args:
+            outcome: "rejected" (the gate rejected the prompt) or "rerun" (the gate's description differs).
+            usage: Its token usage, None when it was cancelled before answering.
+        """
+        if outcome == "rejected":
+            self.rejected += 1
+        else:
+            self.rerun += 1
+        SPECULATIONS.inc(outcome=outcome)
+        if not usage:
+            self.cancelled += 1
+            return
+        self.wasted_prompt_tokens += usage["prompt_tokens"]
+        self.wasted_completion_tokens += usage["completion_tokens"]
+        SPECULATION_WASTED_TOKENS.inc(usage["prompt_tokens"], kind="prompt")
+        SPECULATION_WASTED_TOKENS.inc(usage["completion_tokens"], kind="completion")
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "rejection_rate": round(self.rejection_rate(), 3),
+            "used": self.used,
+            "rejected": self.rejected,
+            "rerun": self.rerun,
+            "cancelled": self.cancelled,
+            "fallbacks": self.fallbacks,
+            "wasted_prompt_tokens": self.wasted_prompt_tokens,
+            "wasted_completion_tokens": self.wasted_completion_tokens,
+            "saved_s": round(self.saved_seconds, 3),
+        }
+
+
+# process-wide governor of the "speculative" pipeline mode (unused in the other modes)
+speculation = SpeculationGovernor(
+    max_rejection_rate=const.SPECULATION_MAX_REJECTION_RATE,
+    window=const.SPECULATION_WINDOW,
+    min_samples=const.SPECULATION_MIN_SAMPLES,
+)
@@ -0,0 +1,95 @@
+import asyncio
+import importlib
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Optional
+
+from const import const
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+
+async def import_modules(*names: str) -> None:
+    """
+    Import heavy modules (`openai`, `mcp`, ...) in a worker thread, so the event
+    loop keeps answering `/` & `/ready` meanwhile. Imports hold the GIL most of the
+    time: the gain is in overlapping them with I/O, e.g. the MCP server's own boot.
+    """
+    def load() -> None:
+        for name in names:
+            importlib.import_module(name)
+
+    await asyncio.to_thread(load)
+
+
+async def create_openai_client() -> "AsyncOpenAI":
+    """
+    AsyncOpenAI client whose idle connections are kept for `OPENAI_KEEPALIVE_SECONDS`
+    (httpx closes them after 5 s by default, which would undo the warm-up between requests).
+    """
+    await import_modules("httpx", "openai")
+    import httpx
+    import openai
+
+    limits = openai.DEFAULT_CONNECTION_LIMITS
+    return openai.AsyncOpenAI(
+        api_key=const.OPEN_AI_API_KEY,
+        base_url=const.OPEN_AI_BASE_URL or None,
+        http_client=openai.DefaultAsyncHttpxClient(
+            limits=httpx.Limits(
+                max_connections=limits.max_connections,
+                max_keepalive_connections=limits.max_keepalive_connections,
+                keepalive_expiry=const.OPENAI_KEEPALIVE_SECONDS,
+            ),
+        ),
+    )
+
+
+async def warm_up(client: "AsyncOpenAI", connections: int, timeout: float) -> int:
+    """
+    Open `connections` keep-alive connections (DNS, TCP & TLS) with concurrent
+    `GET /models` requests, which cost no tokens, so the first real calls skip the setup.
+    Failures are logged, not raised: a cold connection is no reason to stay unready.
+    Returns:
+        The number of warm-up requests that succeeded.
+    """
+    quick = client.with_options(max_retries=0, timeout=timeout)
+    results = await asyncio.gather(*(quick.models.list() for _ in range(connections)), return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        logger.warning("OpenAI warm-up: %d of %d requests failed: %s", len(errors), connections, errors[0])
+    return connections - len(errors)
+
+
+class StartupState:
+    """Progress of the background startup, served on GET /ready."""
+    def __init__(self):
+        self.started = time.monotonic()
+        self.status = "starting"
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.ready_after_s: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def mark_ready(self) -> None:
+        self.status = "ready"
+        self.ready_after_s = round(time.monotonic() - self.started, 3)
+
+    def mark_retrying(self, error: BaseException) -> None:
+        self.status = "retrying"
+        self.error = f"{type(error).__name__}: {error}"
+        self.attempts += 1
+
+    def mark_failed(self, error: BaseException) -> None:
+        self.status = "failed"
+        self.error = f"{type(error).__name__}: {error}"
+        self.attempts += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {"status": self.status, "error": self.error, "failed_attempts": self.attempts, "ready_after_s": self.ready_after_s}
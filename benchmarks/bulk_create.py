@@ -0,0 +1,81 @@
+"""
+Per-event cost of creating events with `create_calendar_events` (one bulk call)
+vs. one `create_calendar_event` call per event, through a real MCP server over stdio.
+
+    python -m benchmarks.bulk_create --events 2000 --batch-sizes 1 10 50 200
+
+Run from the repository root. Events go to a throwaway store in a temporary directory.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from mcp import StdioServerParameters
+from mcp.client.stdio import get_default_environment
+from mcp_client.pool import MCPSessionPool
+
+
+def make_events(count: int, offset: int) -> list[dict]:
+    """Non-overlapping events, so every one is stored & the cost is not hidden by rejections."""
+    base = datetime(2030, 1, 1, 9) + timedelta(hours=offset)
+    return [
+        {
+            "domain_type": "google",
+            "title": f"Benchmark sync {offset + i}",
+            "start_time": (base + timedelta(hours=i)).isoformat(),
+            "end_time": (base + timedelta(hours=i, minutes=30)).isoformat(),
+            "attendees": [f"user{(offset + i) % 50}@example.com", "bench@example.com"],
+            "organizer": "bench@example.com",
+        }
+        for i in range(count)
+    ]
+
+
+async def run(pool: MCPSessionPool, events: int, batch_size: int, offset: int) -> dict:
+    started = time.perf_counter()
+    if batch_size == 1:
+        for event in make_events(events, offset):
+            await pool.call_tool("create_calendar_event", {"event": event})
+    else:
+        for start in range(0, events, batch_size):
+            batch = make_events(min(batch_size, events - start), offset + start)
+            await pool.call_tool("create_calendar_events", {"events": batch})
+    elapsed = time.perf_counter() - started
+    return {
+        "batch_size": batch_size,
+        "calls": -(-events // batch_size),
+        "events_per_s": round(events / elapsed, 1),
+        "us_per_event": round(elapsed * 1e6 / events, 1),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=2000, help="events created per batch size")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 10, 50, 200],
+                        help="1 means single create_calendar_event calls")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**get_default_environment(), "EVENT_STORE_PATH": os.path.join(tmp, "events.db")}
+        pool = MCPSessionPool(
+            StdioServerParameters(command="python", args=["mcp_server/server.py"], env=env),
+            size=1,
+            health_check_interval=0,
+        )
+        await pool.start()
+        try:
+            print(f"{'batch':>6} {'calls':>7} {'events/s':>10} {'us/event':>10}")
+            for n, batch_size in enumerate(args.batch_sizes):
+                # each run books its own hours, so runs do not conflict with each other
+                row = await run(pool, args.events, batch_size, offset=n * args.events)
+                print(f"{row['batch_size']:>6} {row['calls']:>7} {row['events_per_s']:>10} {row['us_per_event']:>10}")
+        finally:
+            await pool.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
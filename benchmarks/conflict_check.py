@@ -0,0 +1,76 @@
+"""
+Conflict-check latency of the in-memory interval index for busy calendars.
+
+    python -m benchmarks.conflict_check --events-per-user 50000 --users 20
+
+Loads a temporary event store, builds the ConflictIndex from it, then times
+find_conflicts for a 3-attendee meeting and the incremental add/remove that
+follows every create/delete.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from mcp_server.conflicts import ConflictIndex
+from mcp_server.models import CalendarEvent
+from mcp_server.store import EventStore, to_timestamp
+
+EPOCH = datetime(2026, 1, 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events-per-user", type=int, default=50_000)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--checks", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EventStore(os.path.join(tmp, "events.db"))
+        for user in range(args.users):
+            slots = rng.sample(range(5 * 365 * 24 * 2), args.events_per_user)  # half-hour slots over 5 years
+            store.add_events(
+                CalendarEvent(
+                    domain_type="google",
+                    title=f"busy {user}",
+                    start_time=(start := EPOCH + timedelta(minutes=30 * slot)).isoformat(),
+                    end_time=(start + timedelta(minutes=rng.choice((15, 30, 60)))).isoformat(),
+                    organizer=f"user{user}@example.com",
+                )
+                for slot in slots
+            )
+
+        started = time.perf_counter()
+        index = ConflictIndex(store)
+        print(f"index built from {store.count():,} events in {time.perf_counter() - started:.2f}s")
+
+        samples = []
+        for _ in range(args.checks):
+            people = [f"user{u}@example.com" for u in rng.sample(range(args.users), 3)]
+            start = to_timestamp((EPOCH + timedelta(minutes=15 * rng.randrange(5 * 365 * 24 * 4))).isoformat())
+            t0 = time.perf_counter()
+            index.find_conflicts(people, start, start + 3600)
+            samples.append((time.perf_counter() - t0) * 1e6)
+        samples.sort()
+        print(f"find_conflicts (3 attendees x {args.events_per_user:,} events): "
+              f"mean {statistics.mean(samples):.1f} us   p99 {samples[int(len(samples) * 0.99)]:.1f} us")
+
+        samples = []
+        for i in range(1000):
+            start = rng.randrange(to_timestamp(EPOCH.isoformat()), to_timestamp((EPOCH + timedelta(days=5 * 365)).isoformat()))
+            t0 = time.perf_counter()
+            index.add(10**9 + i, start, start + 1800, ["user0@example.com"])
+            index.remove(10**9 + i, start, ["user0@example.com"])
+            samples.append((time.perf_counter() - t0) * 1e6)
+        print(f"incremental add + remove: mean {statistics.mean(samples):.1f} us")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Range-query latency of the SQLite event store with a large calendar.
+
+    python -m benchmarks.event_store_range --events 1000000 --participants 10000
+
+Fills a temporary database, then times "what is on <participant>'s calendar
+in this window" through the (participant, start_ts) index and, for comparison,
+as a full scan of the events table.
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from mcp_server.models import CalendarEvent
+from mcp_server.store import EventStore, to_timestamp
+
+EPOCH = datetime(2026, 1, 1)
+
+
+def generate_events(count: int, participants: int, seed: int):
+    rng = random.Random(seed)
+    for i in range(count):
+        start = EPOCH + timedelta(minutes=15 * rng.randrange(365 * 24 * 4))
+        people = rng.sample(range(participants), 3)
+        yield CalendarEvent(
+            domain_type="google",
+            title=f"Event {i}",
+            start_time=start.isoformat(),
+            end_time=(start + timedelta(minutes=rng.choice((15, 30, 45, 60, 90, 120)))).isoformat(),
+            organizer=f"user{people[0]}@example.com",
+            attendees=[f"user{p}@example.com" for p in people[1:]],
+        )
+
+
+def timed(fn, repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summary(samples: list[float]) -> str:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1]
+    return f"mean {statistics.mean(samples):8.3f} ms   p95 {p95:8.3f} ms"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--participants", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--window-days", type=int, default=7)
+    parser.add_argument("--batch", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = EventStore(os.path.join(tmp, "events.db"))
+        started = time.perf_counter()
+        batch = []
+        for event in generate_events(args.events, args.participants, args.seed):
+            batch.append(event)
+            if len(batch) == args.batch:
+                store.add_events(batch)
+                batch.clear()
+        if batch:
+            store.add_events(batch)
+        load_s = time.perf_counter() - started
+        print(f"loaded {store.count():,} events in {load_s:.1f}s ({store.count() / load_s:,.0f} events/s)")
+
+        rng = random.Random(args.seed + 1)
+
+        def window() -> tuple[str, str, str]:
+            start = EPOCH + timedelta(days=rng.randrange(365 - args.window_days))
+            end = start + timedelta(days=args.window_days)
+            return f"user{rng.randrange(args.participants)}@example.com", start.isoformat(), end.isoformat()
+
+        found = []
+
+        def indexed_query() -> None:
+            who, start, end = window()
+            found.append(len(store.list_events(start, end, participant=who)))
+
+        indexed = timed(indexed_query, args.queries)
+        print(f"indexed range query ({args.window_days}d, avg {statistics.mean(found):.1f} hits): {summary(indexed)}")
+
+        def scan() -> None:
+            who, start, end = window()
+            store._conn.execute(
+                "SELECT id FROM events NOT INDEXED WHERE end_ts > ? AND start_ts < ? "
+                "AND (organizer = ? OR attendees LIKE ?)",
+                (to_timestamp(start), to_timestamp(end), who, f'%"{who}"%'),
+            ).fetchall()
+
+        scanned = timed(scan, max(3, args.queries // 100))
+        print(f"full table scan:                              {summary(scanned)}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Hit rate and accuracy of the rule-based fast path against a labelled corpus.
+
+    python -m benchmarks.fast_path_accuracy [--corpus benchmarks/fixtures/fast_path_corpus.jsonl] [-v]
+
+Each corpus line is {"prompt": ..., "now": ISO reference time, "expected": EventDetails | null};
+null marks prompts that must not become an event. A hit is a prompt the fast path
+answers on its own (confidence >= FAST_PATH_MIN_CONFIDENCE); every hit saves the
+LLM calls of the configured pipeline mode.
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.fast_path import parse_event_fast
+from const import const
+from models import EventDetails
+
+LLM_CALLS_PER_REQUEST = {"two-pass": 2, "single-pass": 1}
+
+
+def matches(got: EventDetails, expected: Optional[dict]) -> bool:
+    if expected is None:
+        return False
+    return (
+        got.name.casefold() == expected["name"].casefold()
+        and got.date == expected["date"]
+        and got.duration_minutes == expected["duration_minutes"]
+        # names as typed: "bob@acme.com" or "McDonald" recased is a wrong answer
+        and sorted(got.participants) == sorted(expected["participants"])
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="benchmarks/fixtures/fast_path_corpus.jsonl")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every miss-parse")
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    hits = correct = false_events = 0
+    started = time.perf_counter()
+    for row in rows:
+        result = parse_event_fast(row["prompt"], datetime.fromisoformat(row["now"]))
+        if result is None or result.confidence < const.FAST_PATH_MIN_CONFIDENCE:
+            continue
+        hits += 1
+        if matches(result.details, row["expected"]):
+            correct += 1
+            continue
+        if row["expected"] is None:
+            false_events += 1
+        if args.verbose:
+            print(f"  wrong: {row['prompt']!r}\n    got      {result.details.model_dump()}\n    expected {row['expected']}")
+    elapsed = time.perf_counter() - started
+
+    total = len(rows)
+    calls_per_request = LLM_CALLS_PER_REQUEST.get(const.EVENT_PIPELINE_MODE, 2)
+    print(f"prompts:          {total}")
+    print(f"fast-path hits:   {hits} ({hits / total:.1%})")
+    print(f"accuracy on hits: {correct}/{hits} ({correct / max(hits, 1):.1%})")
+    print(f"false events:     {false_events}")
+    print(f"LLM calls saved:  {hits * calls_per_request} of {total * calls_per_request} ({const.EVENT_PIPELINE_MODE})")
+    print(f"parse time:       {elapsed * 1e6 / total:.1f} us/prompt")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Latency of the NumPy free-slot finder for large meetings.
+
+    python -m benchmarks.free_slots --participants 50 --days 90 --events-per-day 6
+
+Builds an in-memory ConflictIndex (no database) with busy calendars, then
+times find_free_slots for all participants across the whole window.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+
+from mcp_server.conflicts import ConflictIndex, ParticipantIntervals
+from mcp_server.slots import find_free_slots
+
+WINDOW_START = int(datetime(2026, 1, 5, tzinfo=timezone.utc).timestamp())
+
+
+def build_index(participants: int, days: int, events_per_day: int, seed: int) -> ConflictIndex:
+    rng = random.Random(seed)
+    index = ConflictIndex.__new__(ConflictIndex)
+    index.participants, index.seq = {}, 0
+    for p in range(participants):
+        intervals = ParticipantIntervals()
+        starts = sorted(
+            WINDOW_START + day * 86400 + rng.randrange(8 * 4, 18 * 4) * 900
+            for day in range(days)
+            for _ in range(events_per_day)
+        )
+        for i, start in enumerate(starts):
+            intervals.append(start, start + rng.choice((900, 1800, 3600)), p * 10**6 + i)
+        index.participants[f"user{p}@example.com"] = intervals
+    return index
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--participants", type=int, default=50)
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--events-per-day", type=int, default=6)
+    parser.add_argument("--granularity", type=int, default=15, help="slot size in minutes")
+    parser.add_argument("--duration", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    index = build_index(args.participants, args.days, args.events_per_day, args.seed)
+    people = list(index.participants)
+    window_end = WINDOW_START + args.days * 86400
+
+    samples, slots = [], []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        slots = find_free_slots(
+            index, people, args.duration, WINDOW_START, window_end,
+            count=5, granularity_minutes=args.granularity, weekdays_only=False,
+            day_start_minute=0, day_end_minute=24 * 60,
+        )
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    total_events = sum(len(i) for i in index.participants.values())
+    print(f"{args.participants} participants, {args.days} days, {total_events:,} busy intervals, "
+          f"{args.granularity}-minute slots")
+    print(f"find_free_slots: mean {statistics.mean(samples):.2f} ms   max {samples[-1]:.2f} ms   "
+          f"({len(slots)} slots found)")
+
+
+if __name__ == "__main__":
+    main()
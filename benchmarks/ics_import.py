@@ -0,0 +1,91 @@
+"""
+Streaming .ics import & export of a large calendar.
+
+    python -m benchmarks.ics_import --events 500000
+
+Writes a synthetic .ics file with `--events` VEVENTs, imports it into a
+temporary event store and exports it again, reporting throughput and the
+peak Python heap (tracemalloc) of each direction, which should stay flat
+as the event count grows.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from mcp_server.ics import export_ics, import_ics
+from mcp_server.store import EventStore
+
+EPOCH = datetime(2026, 1, 1)
+
+
+def write_ics(path: str, count: int, participants: int, seed: int) -> None:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//benchmark//EN\r\n")
+        for i in range(count):
+            start = EPOCH + timedelta(minutes=15 * rng.randrange(365 * 24 * 4))
+            end = start + timedelta(minutes=rng.choice((15, 30, 45, 60, 90, 120)))
+            people = rng.sample(range(participants), 3)
+            f.write(
+                "BEGIN:VEVENT\r\n"
+                f"UID:{i}@benchmark\r\n"
+                f"DTSTART:{start:%Y%m%dT%H%M%S}Z\r\n"
+                f"DTEND:{end:%Y%m%dT%H%M%S}Z\r\n"
+                f"SUMMARY:Event {i}\\, imported\r\n"
+                f"DESCRIPTION:A fairly long description of event {i} that needs folding because it runs past\r\n"
+                "  the 75 octet limit of a content line\r\n"
+                f"ORGANIZER;CN=User {people[0]}:mailto:user{people[0]}@example.com\r\n"
+                + "".join(f"ATTENDEE;RSVP=TRUE:mailto:user{p}@example.com\r\n" for p in people[1:])
+                + "END:VEVENT\r\n"
+            )
+        f.write("END:VCALENDAR\r\n")
+
+
+def measured(fn):
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=500_000)
+    parser.add_argument("--participants", type=int, default=10_000)
+    parser.add_argument("--batch", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source, target = os.path.join(tmp, "in.ics"), os.path.join(tmp, "out.ics")
+        write_ics(source, args.events, args.participants, args.seed)
+        print(f"wrote {args.events:,} VEVENTs ({os.path.getsize(source) / 2**20:,.1f} MiB)")
+        store = EventStore(os.path.join(tmp, "events.db"))
+
+        def run_import():
+            with open(source, encoding="utf-8", newline="") as f:
+                return import_ics(store, f, batch_size=args.batch)
+
+        counts, elapsed, peak = measured(run_import)
+        print(f"import: {counts['imported']:,} events ({counts['skipped']} skipped) in {elapsed:.1f}s "
+              f"({counts['imported'] / elapsed:,.0f} events/s), peak heap {peak / 2**20:.1f} MiB")
+
+        def run_export():
+            with open(target, "w", encoding="utf-8", newline="") as f:
+                return export_ics(store, f)
+
+        exported, elapsed, peak = measured(run_export)
+        print(f"export: {exported:,} events in {elapsed:.1f}s ({exported / elapsed:,.0f} events/s), "
+              f"peak heap {peak / 2**20:.1f} MiB")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
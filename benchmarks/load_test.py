@@ -0,0 +1,323 @@
+"""
+End-to-end load test of the FastAPI app (main.py), fully offline: the OpenAI calls go
+to the stub server (benchmarks/stub_openai.py), tool calls to the real mcp_server/server.py.
+
+    python -m benchmarks.load_test --rps 20 --concurrency 32 --requests 400
+    python -m benchmarks.load_test --concurrency 16 --duration 60 --env EVENT_PIPELINE_MODE=single-pass
+    python -m benchmarks.load_test --latency lognormal:800,0.5 --compare benchmarks/results/<earlier run>.json
+
+Replays a prompt corpus (JSONL with a `desciption`, `prompt` or `body` field per line;
+default benchmarks/fixtures/requests.jsonl) against POST /event-create. With `--rps` requests
+are sent on a fixed schedule (open loop; latency counts from the scheduled send time, so
+queueing shows up), `--rps 0` keeps `--concurrency` requests in flight (closed loop).
+Throughput, end-to-end & per-stage p50/p95/p99 (from GET /pipeline-stats) and the memory
+of the app & MCP server processes are printed and saved to benchmarks/results/ as JSON.
+Run from the repository root.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+
+from app.pipeline_stats import latency_percentiles
+
+DEFAULT_CORPUS = Path(__file__).parent / "fixtures" / "requests.jsonl"
+RESULTS_DIR = Path(__file__).parent / "results"
+FAILED_MESSAGE = "Failed to create event"
+
+
+def load_corpus(path: Path) -> List[str]:
+    prompts = []
+    for line in path.read_text().splitlines():
+        if not line.strip():
+            continue
+        row = json.loads(line)
+        prompt = row.get("desciption") or row.get("prompt") or row.get("body")
+        if prompt:
+            prompts.append(prompt)
+    if not prompts:
+        raise SystemExit(f"No prompts in {path}")
+    return prompts
+
+
+def process_tree(pid: int) -> List[int]:
+    """pid and all its descendants (Linux /proc)."""
+    pids, pending = [], [pid]
+    while pending:
+        current = pending.pop()
+        pids.append(current)
+        for children in Path(f"/proc/{current}/task").glob("*/children"):
+            try:
+                pending.extend(int(child) for child in children.read_text().split())
+            except OSError:
+                pass
+    return pids
+
+
+def rss_mb(pid: int, field: str = "VmRSS") -> float:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+class MemorySampler:
+    """Polls the RSS of the app process & of its children (the MCP servers) during the run."""
+    def __init__(self, app_pid: int, interval: float = 0.25):
+        self.app_pid = app_pid
+        self.interval = interval
+        self.app_start = self.mcp_start = self.app_peak = self.mcp_peak = 0.0
+
+    def sample(self) -> tuple[float, float]:
+        app = rss_mb(self.app_pid)
+        mcp = sum(rss_mb(pid) for pid in process_tree(self.app_pid)[1:])
+        self.app_peak, self.mcp_peak = max(self.app_peak, app), max(self.mcp_peak, mcp)
+        return app, mcp
+
+    async def run(self) -> None:
+        self.app_start, self.mcp_start = self.sample()
+        while True:
+            await asyncio.sleep(self.interval)
+            self.sample()
+
+    def report(self) -> Dict[str, float]:
+        app_end, mcp_end = self.sample()
+        return {
+            "app_start_mb": round(self.app_start, 1),
+            "app_end_mb": round(app_end, 1),
+            "app_peak_mb": round(max(self.app_peak, rss_mb(self.app_pid, "VmHWM")), 1),
+            "mcp_start_mb": round(self.mcp_start, 1),
+            "mcp_end_mb": round(mcp_end, 1),
+            "mcp_peak_mb": round(self.mcp_peak, 1),
+        }
+
+
+async def send(client: httpx.AsyncClient, prompt: str) -> str:
+    try:
+        response = await client.post("/event-create", json={"desciption": prompt})
+    except httpx.HTTPError:
+        return "error"
+    if response.status_code != 200:
+        return "error"
+    return "rejected" if response.json()["confirmation_message"].startswith(FAILED_MESSAGE) else "created"
+
+
+async def open_loop(
+    client: httpx.AsyncClient, prompts: Iterator[str], total: int, rps: float, concurrency: int
+) -> List[tuple[str, float]]:
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    started = loop.time()
+
+    async def scheduled(prompt: str, at: float) -> tuple[str, float]:
+        await asyncio.sleep(max(0.0, at - loop.time()))
+        async with semaphore:
+            status = await send(client, prompt)
+        return status, loop.time() - at
+
+    return await asyncio.gather(*(scheduled(next(prompts), started + i / rps) for i in range(total)))
+
+
+async def closed_loop(
+    client: httpx.AsyncClient, prompts: Iterator[str], total: int, concurrency: int, duration: Optional[float]
+) -> List[tuple[str, float]]:
+    results: List[tuple[str, float]] = []
+    counter = itertools.count()
+    deadline = time.perf_counter() + duration if duration else float("inf")
+
+    async def worker() -> None:
+        while next(counter) < total and time.perf_counter() < deadline:
+            started = time.perf_counter()
+            status = await send(client, next(prompts))
+            results.append((status, time.perf_counter() - started))
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return results
+
+
+async def wait_ready(client: httpx.AsyncClient, process: subprocess.Popen, path: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"{process.args} exited with code {process.returncode}")
+        try:
+            if (await client.get(path)).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit(f"{process.args} not ready after {timeout}s")
+
+
+def stop(process: subprocess.Popen) -> None:
+    if process.poll() is not None:
+        return
+    # SIGINT lets uvicorn run the lifespan shutdown, which closes the MCP servers
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    prompts = load_corpus(Path(args.corpus))
+    if args.duration:
+        # open loop: the schedule covers the duration, closed loop: run until the deadline
+        total = int(args.rps * args.duration) if args.rps else sys.maxsize
+    else:
+        total = args.requests
+    workdir = Path(tempfile.mkdtemp(prefix="load_test-"))
+
+    stub_cmd = [sys.executable, "-m", "benchmarks.stub_openai", "--port", str(args.stub_port),
+                "--reject-rate", str(args.reject_rate)]
+    for spec in args.latency:
+        stub_cmd += ["--latency", spec]
+    app_env = {
+        **os.environ,
+        "OPEN_AI_BASE_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+        "OPEN_AI_API_KEY": "stub",
+        "EVENT_STORE_PATH": str(workdir / "events.db"),
+        "RESPONSE_CACHE_SQLITE_PATH": "",
+        # the stub has no rate limits; pass --env MODEL_RPM_LIMIT=... to exercise the scheduler
+        "MODEL_RPM_LIMIT": "0",
+        "MODEL_TPM_LIMIT": "0",
+        **dict(kv.split("=", 1) for kv in args.env),
+    }
+    app_cmd = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port), "--log-level", "warning"]
+
+    with open(workdir / "stub.log", "w") as stub_log, open(workdir / "app.log", "w") as app_log:
+        stub = subprocess.Popen(stub_cmd, stdout=stub_log, stderr=subprocess.STDOUT)
+        app = subprocess.Popen(app_cmd, env=app_env, stdout=app_log, stderr=subprocess.STDOUT)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.stub_port}") as stub_client, \
+                    httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.app_port}", timeout=args.timeout, limits=limits) as client:
+                await wait_ready(stub_client, stub, "/stats", 30)
+                await wait_ready(client, app, "/ready", 60)
+
+                sampler = MemorySampler(app.pid)
+                sampler_task = asyncio.create_task(sampler.run())
+                corpus = itertools.cycle(prompts)
+                started = time.perf_counter()
+                if args.rps > 0:
+                    results = await open_loop(client, corpus, total, args.rps, args.concurrency)
+                else:
+                    results = await closed_loop(client, corpus, total, args.concurrency, args.duration)
+                elapsed = time.perf_counter() - started
+                sampler_task.cancel()
+
+                stats = (await client.get("/pipeline-stats")).json()
+                llm_calls = (await stub_client.get("/stats")).json()
+                memory = sampler.report()
+        finally:
+            stop(app)
+            stop(stub)
+
+    latencies = [latency for _, latency in results]
+    statuses = [status for status, _ in results]
+    return {
+        "benchmark": "load_test",
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "config": {
+            "corpus": str(args.corpus),
+            "requests": len(results),
+            "rps": args.rps,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "reject_rate": args.reject_rate,
+            "env": args.env,
+        },
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(results) / elapsed, 2),
+        "requests": {status: statuses.count(status) for status in ("created", "rejected", "error")},
+        "latency_ms": {
+            "mean": round(sum(latencies) * 1000 / len(latencies), 2),
+            **{k: round(v, 2) for k, v in latency_percentiles(latencies).items()},
+            "max": round(max(latencies) * 1000, 2),
+        },
+        "stages": stats["stages"],
+        "modes": stats["modes"],
+        "response_cache": stats["response_cache"],
+        "llm_calls": llm_calls,
+        "memory": memory,
+        "logs": str(workdir),
+    }
+
+
+def key_metrics(result: Dict[str, Any]) -> Dict[str, float]:
+    metrics = {"throughput_rps": result["throughput_rps"]}
+    metrics.update({f"e2e {k}": v for k, v in result["latency_ms"].items() if k.startswith("p")})
+    for group in ("modes", "stages"):
+        for name, row in result[group].items():
+            metrics.update({f"{name} {k}": row[k] for k in ("p50_ms", "p95_ms", "p99_ms")})
+    metrics.update({k: v for k, v in result["memory"].items() if k.endswith("peak_mb")})
+    return metrics
+
+
+def print_report(result: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> None:
+    print(f"{result['requests']} in {result['elapsed_s']}s, LLM calls: {result['llm_calls']}")
+    before = key_metrics(previous) if previous else {}
+    print(f"{'metric':<28} {'value':>10}" + (f" {'previous':>10} {'change':>8}" if previous else ""))
+    for name, value in key_metrics(result).items():
+        line = f"{name:<28} {value:>10.2f}"
+        if name in before:
+            change = (value - before[name]) / before[name] * 100 if before[name] else 0.0
+            line += f" {before[name]:>10.2f} {change:>+7.1f}%"
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--rps", type=float, default=0, help="requests per second, 0 = closed loop")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead of --requests")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", action="append", default=[], help="stub latency spec, see benchmarks.stub_openai")
+    parser.add_argument("--reject-rate", type=float, default=0.1)
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the app process, repeatable")
+    parser.add_argument("--app-port", type=int, default=8098)
+    parser.add_argument("--stub-port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="result file (default benchmarks/results/load_test-<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier result file to diff against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+    previous = json.loads(Path(args.compare).read_text()) if args.compare else None
+    print_report(result, previous)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"load_test-{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"saved {output}")
+
+
+if __name__ == "__main__":
+    main()
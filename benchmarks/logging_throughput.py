@@ -0,0 +1,117 @@
+"""
+EventCreationHandler throughput with logging off, synchronous, and through the
+non-blocking queue pipeline (telemetry/log_pipeline.py).
+
+    python -m benchmarks.logging_throughput --requests 5000 --concurrency 64 --sink-delay-ms 0.5
+
+The OpenAI & MCP clients are in-process fakes that answer immediately, so the
+numbers are the pipeline's own overhead. `--sink-delay-ms` makes every write to
+the text sink sleep, like a slow terminal or a full pipe.
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from app.event_handler import EventCreationHandler
+from models import EventConfirmation, EventDetails, EventExtraction
+from telemetry.log_pipeline import TEXT_FORMAT, dropped_records, setup_logging, shutdown_logging
+
+CANNED = {
+    EventExtraction: EventExtraction(description="Team sync with Alice and Bob", is_calendar_event=True, confidence_score=0.95),
+    EventDetails: EventDetails(name="Team sync", date="2026-10-19T14:00:00", duration_minutes=60, participants=["Alice", "Bob"]),
+}
+CONFIRMATION = EventConfirmation(confirmation_message="Event 'Team sync' created.", calendar_link=None)
+USAGE = SimpleNamespace(prompt_tokens=120, completion_tokens=40)
+
+
+class FakeCompletions:
+    async def parse(self, model, messages, response_format):
+        await asyncio.sleep(0)
+        message = SimpleNamespace(parsed=CANNED[response_format])
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=USAGE)
+
+
+class FakeMCPClient:
+    async def process_query(self, prompt):
+        await asyncio.sleep(0)
+        return CONFIRMATION
+
+
+class SlowSink(io.TextIOBase):
+    """Discards text, sleeping `delay_s` per write."""
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+
+    def write(self, text: str) -> int:
+        if self.delay_s:
+            time.sleep(self.delay_s)
+        return len(text)
+
+
+def configure(mode: str, sink: SlowSink, json_path: str) -> None:
+    shutdown_logging()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    if mode == "off":
+        root.setLevel(logging.WARNING)
+    elif mode.startswith("sync"):
+        # what the old print calls amounted to: format & write on the event loop
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.DEBUG if mode.endswith("debug") else logging.INFO)
+    else:
+        setup_logging(
+            level="DEBUG" if mode.endswith("debug") else "INFO",
+            json_path=json_path if mode.endswith("json") else "",
+            stream=sink,
+        )
+
+
+async def run_requests(requests: int, concurrency: int) -> float:
+    handler = EventCreationHandler(
+        openai_client=SimpleNamespace(beta=SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))),
+        mcp_client=FakeMCPClient(),
+        pipeline_mode="two-pass",
+        response_cache=None,
+        fast_path=False,
+    )
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            await handler.initialize_event(f"Team sync #{i} with Alice and Bob")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0)
+    parser.add_argument("--modes", nargs="+", default=["off", "sync", "queue", "queue-json", "sync-debug", "queue-debug"])
+    args = parser.parse_args()
+
+    sink = SlowSink(args.sink_delay_ms / 1000)
+    json_path = os.path.join(tempfile.mkdtemp(prefix="logging_throughput-"), "log.jsonl")
+    print(f"{'mode':<12} {'req/s':>10} {'dropped':>8}")
+    for mode in args.modes:
+        configure(mode, sink, json_path)
+        dropped_before = dropped_records()
+        elapsed = asyncio.run(run_requests(args.requests, args.concurrency))
+        dropped = dropped_records() - dropped_before
+        shutdown_logging()
+        print(f"{mode:<12} {args.requests / elapsed:>10.0f} {dropped:>8}")
+
+
+if __name__ == "__main__":
+    main()
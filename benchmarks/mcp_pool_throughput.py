@@ -0,0 +1,70 @@
+"""
+Tool-call throughput of MCPSessionPool as the pool size grows.
+
+    python -m benchmarks.mcp_pool_throughput --sizes 1 2 4 8 --calls 2000 --concurrency 64
+
+Run from the repository root; every pool member starts its own mcp_server/server.py.
+"""
+import argparse
+import asyncio
+import time
+
+from mcp import StdioServerParameters
+from mcp_client.pool import MCPSessionPool
+
+SAMPLE_EVENT = {
+    "domain_type": "google",
+    "title": "Benchmark sync",
+    "start_time": "2026-01-05T09:00:00",
+    "end_time": "2026-01-05T09:30:00",
+    "attendees": ["alice@example.com", "bob@example.com"],
+    "organizer": "alice@example.com",
+}
+
+
+async def run_pool(size: int, calls: int, concurrency: int, strategy: str) -> dict:
+    pool = MCPSessionPool(
+        StdioServerParameters(command="python", args=["mcp_server/server.py"]),
+        size=size,
+        strategy=strategy,
+        health_check_interval=0,
+    )
+    started = time.perf_counter()
+    await pool.start()
+    startup_s = time.perf_counter() - started
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_call() -> None:
+        async with semaphore:
+            await pool.call_tool("create_calendar_event", {"event": SAMPLE_EVENT})
+
+    try:
+        started = time.perf_counter()
+        await asyncio.gather(*(one_call() for _ in range(calls)))
+        elapsed = time.perf_counter() - started
+    finally:
+        await pool.close()
+    return {
+        "pool_size": size,
+        "startup_s": round(startup_s, 3),
+        "calls_per_s": round(calls / elapsed, 1),
+        "mean_ms": round(elapsed * 1000 * concurrency / calls, 2),
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--strategy", choices=MCPSessionPool.STRATEGIES, default="least-busy")
+    args = parser.parse_args()
+
+    print(f"{'pool':>5} {'startup s':>10} {'calls/s':>10} {'mean ms':>10}")
+    for size in args.sizes:
+        row = await run_pool(size, args.calls, args.concurrency, args.strategy)
+        print(f"{row['pool_size']:>5} {row['startup_s']:>10} {row['calls_per_s']:>10} {row['mean_ms']:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Cold start and per-call latency of the two MCP transports: `stdio` (a server
+subprocess, JSON-RPC over pipes) vs. `memory` (the FastMCP server mounted in this process).
+
+    python -m benchmarks.mcp_transport --calls 500 --transports stdio memory
+
+Cold start is the time from nothing to a listed tool catalog: spawning & booting
+the server process for stdio, importing mcp_server/server.py for memory (so run
+`memory` first in a fresh process for an honest number). Calls are sequential, so the
+latency is the transport's round trip plus the tool itself. Run from the repository
+root; events go to a throwaway store in a temporary directory.
+"""
+import argparse
+import asyncio
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+from mcp import StdioServerParameters
+from mcp.client.stdio import get_default_environment
+
+from app.pipeline_stats import latency_percentiles
+from benchmarks.bulk_create import make_events
+from mcp_client.pool import MCPSessionPool, memory_transport
+
+
+async def start_pool(transport: str) -> tuple[MCPSessionPool, float]:
+    started = time.perf_counter()
+    if transport == "memory":
+        already_loaded = "mcp_server.server" in sys.modules
+        server = importlib.import_module("mcp_server.server").mcp
+        if already_loaded:
+            print("  (mcp_server.server was already imported, memory cold start excludes the import)")
+        pool = MCPSessionPool(memory_transport(server), size=1, health_check_interval=0)
+    else:
+        env = {**get_default_environment(), "EVENT_STORE_PATH": os.environ["EVENT_STORE_PATH"]}
+        pool = MCPSessionPool(
+            StdioServerParameters(command="python", args=["mcp_server/server.py"], env=env),
+            size=1,
+            health_check_interval=0,
+        )
+    await pool.start()
+    await pool.list_tools()
+    return pool, time.perf_counter() - started
+
+
+async def time_calls(pool: MCPSessionPool, calls: list[tuple[str, dict]]) -> dict:
+    latencies = []
+    for name, arguments in calls:
+        started = time.perf_counter()
+        await pool.call_tool(name, arguments)
+        latencies.append(time.perf_counter() - started)
+    return {"mean_ms": round(sum(latencies) * 1000 / len(latencies), 3), **latency_percentiles(latencies)}
+
+
+async def run(transport: str, calls: int, offset: int) -> dict:
+    pool, cold_start_s = await start_pool(transport)
+    try:
+        creates = [("create_calendar_event", {"event": event}) for event in make_events(calls, offset)]
+        created = await time_calls(pool, creates)
+        first = creates[0][1]["event"]
+        reads = [("list_calendar_events", {"start_time": first["start_time"], "end_time": first["end_time"]})] * calls
+        listed = await time_calls(pool, reads)
+    finally:
+        await pool.close()
+    return {"transport": transport, "cold_start_s": round(cold_start_s, 3), "create": created, "list": listed}
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=500, help="sequential calls per tool & transport")
+    parser.add_argument("--transports", nargs="+", choices=("stdio", "memory"), default=["memory", "stdio"])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # read by mcp_server/store.py on import (memory) & forwarded to the subprocess (stdio)
+        os.environ["EVENT_STORE_PATH"] = os.path.join(tmp, "events.db")
+        print(f"{'transport':>9} {'cold start s':>13} {'tool':>7} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for n, transport in enumerate(args.transports):
+            # each run books its own hours, so runs do not conflict with each other
+            row = await run(transport, args.calls, offset=n * args.calls)
+            for tool in ("create", "list"):
+                t = row[tool]
+                print(
+                    f"{row['transport']:>9} {row['cold_start_s']:>13} {tool:>7} {t['mean_ms']:>8} "
+                    f"{t['p50_ms']:>8.3f} {t['p95_ms']:>8.3f} {t['p99_ms']:>8.3f}"
+                )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,128 @@
+"""
+Response-cache hit rate, throughput and cross-worker job polls of the app as the
+number of uvicorn workers grows, with per-process state vs. the shared SQLite state
+(SHARED_STATE_PATH, app/shared_state.py). Fully offline, like load_test: the OpenAI
+calls go to the stub server (benchmarks/stub_openai.py).
+
+    python -m benchmarks.multi_worker --workers 1 2 4 --requests 800 --unique 100
+
+`--unique` prompts of the corpus are replayed round-robin, so every prompt after the
+first round could be a cache hit. The hit rate is counted at the stub: the share of
+requests that did not need a gate (EventExtraction) call. The fast path, semantic
+cache & request coalescing are turned off so the response cache is the only shortcut.
+`job polls found` submits async jobs (`Prefer: respond-async`) and polls each one
+once on a new connection, which may reach another worker. Run from the repository root.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import httpx
+
+from benchmarks.load_test import DEFAULT_CORPUS, closed_loop, load_corpus, stop, wait_ready
+
+
+async def job_polls_found(base_url: str, prompts: list[str], jobs: int) -> float:
+    found = 0
+    # no keep-alive: every request is a new connection, accepted by whichever worker is free
+    limits = httpx.Limits(max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        for prompt in itertools.islice(itertools.cycle(prompts), jobs):
+            response = await client.post("/event-create", json={"desciption": prompt}, headers={"Prefer": "respond-async"})
+            job_id = response.json()["job_id"]
+            found += (await client.get(f"/jobs/{job_id}")).status_code == 200
+    return found / jobs
+
+
+async def run(args: argparse.Namespace, workers: int, shared: bool, workdir: Path, stub_client: httpx.AsyncClient) -> Dict[str, Any]:
+    name = f"{workers}-{'shared' if shared else 'local'}"
+    app_env = {
+        **os.environ,
+        "OPEN_AI_BASE_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+        "OPEN_AI_API_KEY": "stub",
+        "EVENT_STORE_PATH": str(workdir / f"events-{name}.db"),
+        "RESPONSE_CACHE_SQLITE_PATH": "",
+        "SHARED_STATE_PATH": str(workdir / f"shared-{name}.db") if shared else "",
+        "FAST_PATH_ENABLED": "false",
+        "SEMANTIC_CACHE_ENABLED": "false",
+        "EVENT_COALESCING_ENABLED": "false",
+        "MODEL_RPM_LIMIT": "0",
+        "MODEL_TPM_LIMIT": "0",
+    }
+    app_cmd = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port),
+               "--workers", str(workers), "--log-level", "warning"]
+    prompts = load_corpus(Path(args.corpus))[:args.unique]
+    base_url = f"http://127.0.0.1:{args.app_port}"
+    with open(workdir / f"app-{name}.log", "w") as app_log:
+        app = subprocess.Popen(app_cmd, env=app_env, stdout=app_log, stderr=subprocess.STDOUT)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+                # each new connection may reach another worker: ask /ready on a few so they have all started
+                await wait_ready(client, app, "/ready", 60)
+                for _ in range(workers * 4):
+                    async with httpx.AsyncClient(base_url=base_url, limits=httpx.Limits(max_keepalive_connections=0)) as fresh:
+                        await wait_ready(fresh, app, "/ready", 60)
+                before = (await stub_client.get("/stats")).json()
+                started = time.perf_counter()
+                results = await closed_loop(client, itertools.cycle(prompts), args.requests, args.concurrency, None)
+                elapsed = time.perf_counter() - started
+                after = (await stub_client.get("/stats")).json()
+            polls_found = await job_polls_found(base_url, prompts, args.jobs)
+        finally:
+            stop(app)
+    gate_calls = after.get("EventExtraction", 0) - before.get("EventExtraction", 0)
+    return {
+        "workers": workers,
+        "state": "shared" if shared else "local",
+        "throughput_rps": round(len(results) / elapsed, 1),
+        "hit_rate": 1 - gate_calls / len(results),
+        "errors": sum(status == "error" for status, _ in results),
+        "job_polls_found": polls_found,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=800)
+    parser.add_argument("--unique", type=int, default=100, help="distinct prompts replayed round-robin")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--jobs", type=int, default=40, help="async jobs submitted & polled once each")
+    parser.add_argument("--corpus", default=str(DEFAULT_CORPUS))
+    parser.add_argument("--latency", default="fixed:100", help="stub latency spec, see benchmarks.stub_openai")
+    parser.add_argument("--app-port", type=int, default=8098)
+    parser.add_argument("--stub-port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="multi_worker-"))
+    stub_cmd = [sys.executable, "-m", "benchmarks.stub_openai", "--port", str(args.stub_port),
+                "--reject-rate", "0", "--latency", args.latency]
+    with open(workdir / "stub.log", "w") as stub_log:
+        stub = subprocess.Popen(stub_cmd, stdout=stub_log, stderr=subprocess.STDOUT)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.stub_port}") as stub_client:
+                await wait_ready(stub_client, stub, "/stats", 30)
+                print(f"{'workers':>8} {'state':>7} {'req/s':>8} {'hit rate':>9} {'errors':>7} {'job polls found':>16}")
+                for workers in args.workers:
+                    for shared in (False, True):
+                        row = await run(args, workers, shared, workdir, stub_client)
+                        print(
+                            f"{row['workers']:>8} {row['state']:>7} {row['throughput_rps']:>8} {row['hit_rate']:>9.1%} "
+                            f"{row['errors']:>7} {row['job_polls_found']:>16.0%}"
+                        )
+        finally:
+            stop(stub)
+    print(f"logs: {workdir}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
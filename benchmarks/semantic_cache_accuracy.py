@@ -0,0 +1,90 @@
+"""
+Hit rate and false-positive rate of the semantic near-duplicate cache against a labelled corpus.
+
+    python -m benchmarks.semantic_cache_accuracy [--corpus benchmarks/fixtures/semantic_cache_corpus.jsonl]
+        [--thresholds 0.75 0.8 0.85 0.9] [-v]
+
+Each corpus line is {"prompt": ..., "now": ISO reference time, "group": ..., "expected": EventDetails | null}.
+Prompts of one group ask for the same event (null: not an event). The prompts are replayed
+in order: a miss stores the expected result (as the model would have answered), a hit
+is correct when the reused details, re-resolved for its "now", match the expected ones.
+Hit rate is the share of prompts whose group was seen before that hit; a false positive is a wrong hit.
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Optional
+
+from app.semantic_cache import SemanticCache
+from const import const
+from models import EventDetails, EventExtraction
+
+
+def matches(got: Optional[EventDetails], expected: Optional[dict]) -> bool:
+    if got is None or expected is None:
+        return got is None and expected is None
+    return (
+        got.name.casefold() == expected["name"].casefold()
+        and got.date == expected["date"]
+        and got.duration_minutes == expected["duration_minutes"]
+        and sorted(p.casefold() for p in got.participants) == sorted(p.casefold() for p in expected["participants"])
+    )
+
+
+def run(rows: list[dict], threshold: float, verbose: bool) -> dict:
+    cache = SemanticCache(capacity=const.SEMANTIC_CACHE_CAPACITY, dim=const.SEMANTIC_CACHE_DIM, threshold=threshold)
+    seen: set[str] = set()
+    repeats = repeat_hits = hits = false_hits = 0
+    started = time.perf_counter()
+    for row in rows:
+        now = datetime.fromisoformat(row["now"])
+        repeat = row["group"] in seen
+        repeats += repeat
+        result = cache.lookup(row["prompt"], now)
+        if result is None:
+            expected = row["expected"]
+            extraction = EventExtraction(description=row["prompt"], is_calendar_event=expected is not None, confidence_score=0.9)
+            cache.add(row["prompt"], extraction, EventDetails(**expected) if expected else None, now)
+        else:
+            hits += 1
+            repeat_hits += repeat
+            if not matches(result[1], row["expected"]):
+                false_hits += 1
+                if verbose:
+                    print(f"  wrong hit: {row['prompt']!r}\n    got      {result[1]}\n    expected {row['expected']}")
+        seen.add(row["group"])
+    elapsed = time.perf_counter() - started
+    return {
+        "threshold": threshold,
+        "hit_rate": repeat_hits / repeats if repeats else 0.0,
+        "false_positive_rate": false_hits / hits if hits else 0.0,
+        "hits": hits,
+        "false_hits": false_hits,
+        "repeats": repeats,
+        "us_per_prompt": elapsed * 1e6 / len(rows),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default="benchmarks/fixtures/semantic_cache_corpus.jsonl")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[const.SEMANTIC_CACHE_THRESHOLD])
+    parser.add_argument("-v", "--verbose", action="store_true", help="print every wrong hit")
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+
+    print(f"{len(rows)} prompts")
+    print(f"{'threshold':>10} {'hit rate':>9} {'false pos':>10} {'hits':>5} {'repeats':>8} {'us/prompt':>10}")
+    for threshold in args.thresholds:
+        r = run(rows, threshold, args.verbose)
+        print(
+            f"{r['threshold']:>10} {r['hit_rate']:>9.1%} {r['false_positive_rate']:>10.1%} "
+            f"{r['hits']:>5} {r['repeats']:>8} {r['us_per_prompt']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Cost of the pipeline instrumentation (telemetry.tracing spans & histograms) per stage.
+
+    python -m benchmarks.span_overhead --iterations 200000
+
+Compares an empty loop with one that opens a span per iteration, with and
+without an active request trace, and reports the added time per span.
+"""
+import argparse
+import time
+from types import SimpleNamespace
+
+from telemetry.tracing import SlowTraceLog, span, trace_request
+import telemetry.tracing as tracing
+
+USAGE = SimpleNamespace(prompt_tokens=120, completion_tokens=40)
+
+
+def bare(iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        pass
+    return time.perf_counter() - started
+
+
+def spans(iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        with span("benchmark") as current:
+            current.add_usage(USAGE)
+    return time.perf_counter() - started
+
+
+def traced_spans(iterations: int, spans_per_trace: int = 5) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations // spans_per_trace):
+        with trace_request("benchmark"):
+            for _ in range(spans_per_trace):
+                with span("benchmark") as current:
+                    current.add_usage(USAGE)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+    # keep the slow-trace file sink out of the measurement
+    tracing.slow_traces = SlowTraceLog(path="", keep=50)
+
+    baseline = bare(args.iterations)
+    for name, run in (("span", spans), ("span in a request trace", traced_spans)):
+        elapsed = run(args.iterations)
+        print(f"{name:<26} {(elapsed - baseline) / args.iterations * 1e6:8.2f} us per span")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Cold-start cost of the app: import time of main.py, and how long a freshly started
+uvicorn process takes to listen (`GET /`), to be ready (`GET /ready`) and to
+serve its first successful `POST /event-create`. Fully offline, like load_test:
+the OpenAI calls go to the stub server (benchmarks/stub_openai.py).
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --env OPENAI_WARMUP_CONNECTIONS=0 --env MCP_TRANSPORT=memory
+
+The first request is sent as soon as the process is started and repeated every
+`--poll` seconds until one creates an event, so it measures what a client hitting
+a new pod would see (without a readiness probe holding it back). Run from the repository root.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+import httpx
+
+from benchmarks.load_test import FAILED_MESSAGE, stop, wait_ready
+
+# a prompt the stub's gate accepts; the fast path is turned off so the first request makes every model call
+FIRST_PROMPT = "Quarterly planning with Alice and Bob tomorrow at 3pm for 45 minutes"
+
+
+def import_time(runs: int) -> Dict[str, float]:
+    """Median seconds to `import main` in a fresh interpreter (also for `openai` & `mcp` alone)."""
+    result = {}
+    for module in ("main", "openai", "mcp"):
+        samples = []
+        for _ in range(runs):
+            code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+            out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+            samples.append(float(out.strip().splitlines()[-1]))
+        result[module] = round(statistics.median(samples), 3)
+    return result
+
+
+async def first_success(client: httpx.AsyncClient, process: subprocess.Popen, poll: float, timeout: float) -> float:
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if process.poll() is not None:
+            raise SystemExit(f"{process.args} exited with code {process.returncode}")
+        try:
+            response = await client.post("/event-create", json={"desciption": FIRST_PROMPT})
+            if response.status_code == 200 and not response.json()["confirmation_message"].startswith(FAILED_MESSAGE):
+                return time.monotonic()
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(poll)
+    raise SystemExit(f"no successful /event-create after {timeout}s")
+
+
+async def until(client: httpx.AsyncClient, process: subprocess.Popen, path: str, timeout: float) -> float:
+    await wait_ready(client, process, path, timeout)
+    return time.monotonic()
+
+
+async def cold_start(args: argparse.Namespace, workdir: Path, run: int) -> Dict[str, float]:
+    app_env = {
+        **os.environ,
+        "OPEN_AI_BASE_URL": f"http://127.0.0.1:{args.stub_port}/v1",
+        "OPEN_AI_API_KEY": "stub",
+        "EVENT_STORE_PATH": str(workdir / f"events-{run}.db"),
+        "RESPONSE_CACHE_SQLITE_PATH": "",
+        "FAST_PATH_ENABLED": "false",
+        **dict(kv.split("=", 1) for kv in args.env),
+    }
+    app_cmd = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.app_port), "--log-level", "warning"]
+    with open(workdir / f"app-{run}.log", "w") as app_log:
+        started = time.monotonic()
+        app = subprocess.Popen(app_cmd, env=app_env, stdout=app_log, stderr=subprocess.STDOUT)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.app_port}", timeout=args.timeout) as client:
+                listening, ready, served = await asyncio.gather(
+                    until(client, app, "/", args.timeout),
+                    until(client, app, "/ready", args.timeout),
+                    first_success(client, app, args.poll, args.timeout),
+                )
+        finally:
+            stop(app)
+    return {
+        "listening_s": listening - started,
+        "ready_s": ready - started,
+        "first_success_s": served - started,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per measurement (medians are reported)")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE for the app process, repeatable")
+    parser.add_argument("--poll", type=float, default=0.05, help="seconds between first-request attempts")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--app-port", type=int, default=8098)
+    parser.add_argument("--stub-port", type=int, default=8099)
+    parser.add_argument("--latency", default="fixed:50", help="stub latency spec, see benchmarks.stub_openai")
+    args = parser.parse_args()
+
+    imports = import_time(args.runs)
+    print("import s (median): " + ", ".join(f"{module} {seconds}" for module, seconds in imports.items()))
+
+    workdir = Path(tempfile.mkdtemp(prefix="startup-"))
+    stub_cmd = [sys.executable, "-m", "benchmarks.stub_openai", "--port", str(args.stub_port),
+                "--reject-rate", "0", "--latency", args.latency]
+    with open(workdir / "stub.log", "w") as stub_log:
+        stub = subprocess.Popen(stub_cmd, stdout=stub_log, stderr=subprocess.STDOUT)
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.stub_port}") as stub_client:
+                await wait_ready(stub_client, stub, "/stats", 30)
+            runs = [await cold_start(args, workdir, run) for run in range(args.runs)]
+        finally:
+            stop(stub)
+
+    print(f"{'':>18} {'median s':>9} {'min s':>7} {'max s':>7}")
+    for key in ("listening_s", "ready_s", "first_success_s"):
+        values = [r[key] for r in runs]
+        print(f"{key:>18} {statistics.median(values):>9.3f} {min(values):>7.3f} {max(values):>7.3f}")
+    print(f"logs: {workdir}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
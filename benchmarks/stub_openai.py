@@ -0,0 +1,232 @@
+"""
+Stub OpenAI-compatible server for offline benchmarks: `POST /v1/chat/completions`
+answers with canned structured outputs after a configurable simulated latency
+(`GET /v1/models`, the app's warm-up request, answers at once).
+
+    python -m benchmarks.stub_openai --port 8099 --latency lognormal:400,0.35 --latency EventConfirmation=fixed:150
+
+Latency specs (milliseconds): `fixed:MS`, `uniform:LO,HI`, `normal:MEAN,SD`, `lognormal:MEDIAN,SIGMA`.
+`NAME=SPEC` overrides the default for one kind of call: a response schema name
+(EventExtraction, EventDetails, EventParseResult, EventConfirmation, ...) or `tools`
+for the tool-selection call. Point the app at it with OPEN_AI_BASE_URL=http://127.0.0.1:8099/v1.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+CREATE_PROMPT_RE = re.compile(
+    r"named '(?P<name>.*)' on (?P<date>\S+) for (?P<minutes>\d+) minutes with participants: (?P<participants>.*)\.$"
+)
+WITH_RE = re.compile(r"\bwith\s+(?P<names>[^.?!]+)", re.IGNORECASE)
+# the canned gate only accepts prompts that mention some day or time
+WHEN_RE = re.compile(
+    r"\b(today|tonight|tomorrow|morning|afternoon|evening|noon|week|month|\w+day|\d{1,2}(:\d{2})?\s*(am|pm)|"
+    r"\d{1,2}:\d{2}|\d{1,2}(st|nd|rd|th))\b",
+    re.IGNORECASE,
+)
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Latency spec to a sampler returning seconds."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed" and len(values) == 1:
+        return lambda rng: values[0] / 1000
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000
+    if kind == "normal" and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1])) / 1000
+    if kind == "lognormal" and len(values) == 2:
+        # parameterised by the median, so "lognormal:400,0.35" has p50 ~400ms
+        return lambda rng: values[0] * rng.lognormvariate(0, values[1]) / 1000
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def stable_fraction(text: str) -> float:
+    """Deterministic value in [0, 1) per text, so repeated prompts get the same canned answer."""
+    return int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "big") / 2**64
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def sample_from_schema(schema: Dict[str, Any], defs: Dict[str, Any]) -> Any:
+    """Placeholder value matching a JSON schema, for response formats without a canned answer."""
+    if "$ref" in schema:
+        return sample_from_schema(defs[schema["$ref"].rsplit("/", 1)[-1]], defs)
+    if "anyOf" in schema:
+        options = [s for s in schema["anyOf"] if s.get("type") != "null"]
+        return sample_from_schema(options[0], defs) if options else None
+    kind = schema.get("type")
+    if kind == "object":
+        return {name: sample_from_schema(prop, defs) for name, prop in schema.get("properties", {}).items()}
+    return {"string": "stub", "integer": 0, "number": 0.0, "boolean": True, "array": []}.get(kind)
+
+
+class StubOpenAI:
+    """Canned chat completions for the calendar event pipeline."""
+    def __init__(
+        self,
+        latency: Callable[[random.Random], float],
+        overrides: Optional[Dict[str, Callable[[random.Random], float]]] = None,
+        reject_rate: float = 0.1,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.overrides = overrides or {}
+        self.reject_rate = reject_rate
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+
+    def _is_event(self, text: str) -> bool:
+        return bool(WHEN_RE.search(text)) and stable_fraction(text) >= self.reject_rate
+
+    def _event_details(self, text: str) -> Dict[str, Any]:
+        # spread events over the working hours of the next days so conflicts happen now and then
+        fraction = stable_fraction(text)
+        day = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1 + int(fraction * 5))
+        start = day + timedelta(minutes=30 * int(fraction * 1000 % 16))
+        names = WITH_RE.search(text)
+        participants = re.split(r"\s*(?:,|\band\b|&)\s*", names.group("names")) if names else ["Alice"]
+        return {
+            "name": " ".join(text.split()[:4]).strip(".,!?") or "Meeting",
+            "date": start.isoformat(),
+            "duration_minutes": 30,
+            "participants": [p.strip() for p in participants if p.strip()][:5],
+        }
+
+    def _structured(self, name: str, schema: Dict[str, Any], messages: List[Dict[str, Any]]) -> Any:
+        user_text = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        is_event = self._is_event(user_text)
+        extraction = {"description": user_text, "is_calendar_event": is_event, "confidence_score": 0.92 if is_event else 0.15}
+        if name == "EventExtraction":
+            return extraction
+        if name == "EventDetails":
+            return self._event_details(user_text)
+        if name == "EventParseResult":
+            return {"extraction": extraction, "details": self._event_details(user_text) if is_event else None}
+        if name == "EventConfirmation":
+            tool_output = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "tool"), "")
+            created = '"created":true' in tool_output.replace(" ", "")
+            return {
+                "confirmation_message": ("Event created. " if created else "Event not created. ") + tool_output[:200],
+                "calendar_link": None,
+            }
+        return sample_from_schema(schema, schema.get("$defs", {}))
+
+    def _tool_call(self, tools: List[Dict[str, Any]], messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        names = [t["function"]["name"] for t in tools]
+        name = "create_calendar_event" if "create_calendar_event" in names else names[0]
+        user_text = next((m.get("content") or "" for m in reversed(messages) if m.get("role") == "user"), "")
+        match = CREATE_PROMPT_RE.search(user_text)
+        if match:
+            start = datetime.fromisoformat(match.group("date"))
+            participants = [p.strip() for p in match.group("participants").split(",") if p.strip()]
+            event = {
+                "domain_type": "google",
+                "title": match.group("name"),
+                "start_time": start.isoformat(),
+                "end_time": (start + timedelta(minutes=int(match.group("minutes")))).isoformat(),
+                "attendees": participants,
+                "organizer": participants[0] if participants else None,
+            }
+        else:
+            event = {"domain_type": "google", "title": "Stub event", "start_time": "2026-01-05T09:00:00", "end_time": "2026-01-05T09:30:00"}
+        return {
+            "id": f"call_{uuid.uuid4().hex[:24]}",
+            "type": "function",
+            "function": {"name": name, "arguments": json.dumps({"event": event})},
+        }
+
+    async def chat_completion(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        messages: List[Dict[str, Any]] = body.get("messages", [])
+        tools = body.get("tools") or []
+        response_format = body.get("response_format") or {}
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        finish_reason = "stop"
+
+        has_tool_results = any(m.get("role") == "tool" for m in messages)
+        if tools and body.get("tool_choice") != "none" and not has_tool_results:
+            kind = "tools"
+            message["tool_calls"] = [self._tool_call(tools, messages)]
+            finish_reason = "tool_calls"
+        elif response_format.get("type") == "json_schema":
+            json_schema = response_format["json_schema"]
+            kind = json_schema.get("name", "json_schema")
+            message["content"] = json.dumps(self._structured(kind, json_schema.get("schema", {}), messages))
+        else:
+            kind = "text"
+            message["content"] = "OK"
+
+        self.calls[kind] += 1
+        await asyncio.sleep(self.overrides.get(kind, self.latency)(self.rng))
+
+        prompt_text = "".join(str(m.get("content") or "") for m in messages) + json.dumps(tools)
+        completion_text = message["content"] or json.dumps(message.get("tool_calls"))
+        usage = {"prompt_tokens": estimate_tokens(prompt_text), "completion_tokens": estimate_tokens(completion_text)}
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return {
+            "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": message, "finish_reason": finish_reason, "logprobs": None}],
+            "usage": usage,
+        }
+
+
+def build_app(stub: StubOpenAI) -> FastAPI:
+    app = FastAPI(title="Stub OpenAI")
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        return await stub.chat_completion(await request.json())
+
+    # the app's startup warm-up request (opens keep-alive connections)
+    @app.get("/v1/models")
+    async def models():
+        stub.calls["models"] += 1
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "created": 0, "owned_by": "stub"}]}
+
+    # calls served per kind, read by the load test after a run
+    @app.get("/stats")
+    async def stats():
+        return dict(stub.calls)
+
+    return app
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", action="append", default=[], help="SPEC or NAME=SPEC, repeatable")
+    parser.add_argument("--reject-rate", type=float, default=0.1, help="share of dated prompts the gate call rejects anyway")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    default, overrides = parse_latency("lognormal:400,0.35"), {}
+    for spec in args.latency:
+        name, sep, value = spec.partition("=")
+        if sep:
+            overrides[name] = parse_latency(value)
+        else:
+            default = parse_latency(spec)
+    stub = StubOpenAI(default, overrides, reject_rate=args.reject_rate, seed=args.seed)
+    uvicorn.run(build_app(stub), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,3 +2,114 @@ import os
 
 OPEN_AI_API_KEY = os.getenv("OPEN_AI_API_KEY", "your-openai-api-key-here")
 OPEN_AI_MODEL = os.getenv("OPEN_AI_MODEL", "gpt-4o-mini")
+# any OpenAI-compatible endpoint, e.g. the stub server used by `benchmarks/load_test.py` (empty = api.openai.com)
+OPEN_AI_BASE_URL = os.getenv("OPEN_AI_BASE_URL", "")
+# startup warm-up: keep-alive connections opened with `GET /models` (no tokens) before GET /ready reports ready
+# (0 = no warm-up); idle connections are kept OPENAI_KEEPALIVE_SECONDS instead of httpx's 5 seconds
+OPENAI_WARMUP_CONNECTIONS = int(os.getenv("OPENAI_WARMUP_CONNECTIONS", "2"))
+OPENAI_WARMUP_TIMEOUT_SECONDS = float(os.getenv("OPENAI_WARMUP_TIMEOUT_SECONDS", "5"))
+OPENAI_KEEPALIVE_SECONDS = float(os.getenv("OPENAI_KEEPALIVE_SECONDS", "60"))
+# background startup attempts (bad key, MCP server that does not spawn, ...), STARTUP_RETRY_BACKOFF_SECONDS apart & doubling;
+# after the last one GET / (the liveness probe) answers 503 so the process gets restarted
+STARTUP_MAX_ATTEMPTS = int(os.getenv("STARTUP_MAX_ATTEMPTS", "3"))
+STARTUP_RETRY_BACKOFF_SECONDS = float(os.getenv("STARTUP_RETRY_BACKOFF_SECONDS", "2"))
+
+# event pipeline: "two-pass" (gate call + details call), "single-pass" (one combined call)
+# or "speculative" (gate & details calls at the same time, the details thrown away when the gate rejects)
+EVENT_PIPELINE_MODES = ("two-pass", "single-pass", "speculative")
+EVENT_PIPELINE_MODE = os.getenv("EVENT_PIPELINE_MODE", "two-pass")
+if EVENT_PIPELINE_MODE not in EVENT_PIPELINE_MODES:
+    raise ValueError(f"Unknown EVENT_PIPELINE_MODE {EVENT_PIPELINE_MODE!r}, expected one of {EVENT_PIPELINE_MODES}")
+EVENT_CONFIDENCE_THRESHOLD = float(os.getenv("EVENT_CONFIDENCE_THRESHOLD", "0.7"))
+# "speculative" falls back to two-pass while more than SPECULATION_MAX_REJECTION_RATE of the last
+# SPECULATION_WINDOW gate checks rejected the prompt (judged once SPECULATION_MIN_SAMPLES are known)
+SPECULATION_MAX_REJECTION_RATE = float(os.getenv("SPECULATION_MAX_REJECTION_RATE", "0.2"))
+SPECULATION_WINDOW = int(os.getenv("SPECULATION_WINDOW", "100"))
+SPECULATION_MIN_SAMPLES = int(os.getenv("SPECULATION_MIN_SAMPLES", "20"))
+
+# LLM response cache: in-memory LRU, plus an optional SQLite tier when a path is given
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_SQLITE_PATH = os.getenv("RESPONSE_CACHE_SQLITE_PATH", "")
+
+# state shared by the uvicorn workers of a node (`--workers N`) through one SQLite file: the response cache's
+# SQLite tier (unless RESPONSE_CACHE_SQLITE_PATH is set) & the async job statuses; empty = per-process state
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH", "")
+SHARED_STATE_BUSY_TIMEOUT_MS = float(os.getenv("SHARED_STATE_BUSY_TIMEOUT_MS", "5000"))
+
+# near-duplicate prompts ("sync w/ Bob tmrw 3pm" ~ "sync with Bob tomorrow at 3pm") reuse the gate & details results:
+# hashed character n-gram embeddings, cosine similarity >= SEMANTIC_CACHE_THRESHOLD plus the same date/time/participants
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+SEMANTIC_CACHE_CAPACITY = int(os.getenv("SEMANTIC_CACHE_CAPACITY", "4096"))
+SEMANTIC_CACHE_DIM = int(os.getenv("SEMANTIC_CACHE_DIM", "1024"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.7"))
+
+# /events/batch: prompts processed concurrently per batch (callers may lower it, never raise it past the max)
+EVENT_BATCH_CONCURRENCY = int(os.getenv("EVENT_BATCH_CONCURRENCY", "8"))
+EVENT_BATCH_MAX_CONCURRENCY = int(os.getenv("EVENT_BATCH_MAX_CONCURRENCY", "64"))
+# NDJSON batch bodies are run as they arrive, read at most this many received chunks ahead of the workers
+EVENT_BATCH_READ_AHEAD_CHUNKS = int(os.getenv("EVENT_BATCH_READ_AHEAD_CHUNKS", "16"))
+
+# MCP session pool: server processes per app process, checkout strategy ("least-busy" or "round-robin")
+MCP_POOL_SIZE = int(os.getenv("MCP_POOL_SIZE", "1"))
+MCP_POOL_STRATEGY = os.getenv("MCP_POOL_STRATEGY", "least-busy")
+MCP_POOL_HEALTH_CHECK_INTERVAL = float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", "30"))
+# MCP transport: "stdio" (server subprocesses) or "memory" (the server's tools mounted in the app process, run on one background thread,
+# single-node deployments; MCP_POOL_SIZE=1 is enough there)
+MCP_TRANSPORT = os.getenv("MCP_TRANSPORT", "stdio")
+# tool calls of one model turn run concurrently, at most this many at a time, each cut off after the timeout
+MCP_TOOL_CALL_CONCURRENCY = int(os.getenv("MCP_TOOL_CALL_CONCURRENCY", "8"))
+MCP_TOOL_CALL_TIMEOUT_SECONDS = float(os.getenv("MCP_TOOL_CALL_TIMEOUT_SECONDS", "30"))
+# MCP tool loop: model turns that may call tools before the confirmation, and the time after which no new turn starts
+MCP_MAX_TOOL_TURNS = int(os.getenv("MCP_MAX_TOOL_TURNS", "3"))
+MCP_TOOL_LOOP_DEADLINE_SECONDS = float(os.getenv("MCP_TOOL_LOOP_DEADLINE_SECONDS", "30"))
+
+# rule-based fast path that skips the LLM for formulaic prompts
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", "0.8"))
+FAST_PATH_DEFAULT_DURATION_MINUTES = int(os.getenv("FAST_PATH_DEFAULT_DURATION_MINUTES", "30"))
+
+# environment variables forwarded to the MCP server processes (e.g. EVENT_STORE_PATH)
+MCP_SERVER_ENV_PREFIXES = ("EVENT_STORE_",)
+
+# async /event-create jobs (`Prefer: respond-async`): worker tasks, queue bound (429 when full), result retention
+EVENT_JOB_WORKERS = int(os.getenv("EVENT_JOB_WORKERS", "4"))
+EVENT_JOB_QUEUE_SIZE = int(os.getenv("EVENT_JOB_QUEUE_SIZE", "100"))
+EVENT_JOB_RETENTION_SECONDS = float(os.getenv("EVENT_JOB_RETENTION_SECONDS", "3600"))
+
+# slow-request traces: the TRACE_SLOW_KEEP slowest are served on GET /traces/slow; requests over the threshold
+# are also appended (a TRACE_SLOW_SAMPLE_RATE share of them) to TRACE_SLOW_LOG_PATH as JSON lines when a path is set
+TRACE_SLOW_KEEP = int(os.getenv("TRACE_SLOW_KEEP", "50"))
+TRACE_SLOW_THRESHOLD_MS = float(os.getenv("TRACE_SLOW_THRESHOLD_MS", "2000"))
+TRACE_SLOW_SAMPLE_RATE = float(os.getenv("TRACE_SLOW_SAMPLE_RATE", "1.0"))
+TRACE_SLOW_LOG_PATH = os.getenv("TRACE_SLOW_LOG_PATH", "")
+
+# logging: records go through a bounded queue to a writer thread (dropped, not waited on, when it is full);
+# LOG_JSON_PATH adds a JSON-lines file sink next to the text output on stdout
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_STDOUT = os.getenv("LOG_STDOUT", "true").lower() in ("1", "true", "yes")
+LOG_JSON_PATH = os.getenv("LOG_JSON_PATH", "")
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+# outbound model calls: shared token-bucket limits (requests & estimated tokens per minute, 0 = unlimited).
+# Off by default: set them to (a little under) the account tier's limits for the model, as the limits differ per tier.
+# Calls over the limit wait in priority/per-client fair queues; upstream 429s are retried after Retry-After.
+MODEL_RPM_LIMIT = float(os.getenv("MODEL_RPM_LIMIT", "0"))
+MODEL_TPM_LIMIT = float(os.getenv("MODEL_TPM_LIMIT", "0"))
+MODEL_COMPLETION_TOKEN_ESTIMATE = int(os.getenv("MODEL_COMPLETION_TOKEN_ESTIMATE", "256"))
+MODEL_RATE_LIMIT_RETRIES = int(os.getenv("MODEL_RATE_LIMIT_RETRIES", "5"))
+
+# hedged model calls: a call still running at the MODEL_HEDGE_PERCENTILE latency of its stage (over the last
+# MODEL_HEDGE_WINDOW calls, once MODEL_HEDGE_MIN_SAMPLES are known) gets a duplicate, first answer wins.
+# Duplicates are capped at MODEL_HEDGE_MAX_EXTRA_RATIO of all calls.
+MODEL_HEDGE_ENABLED = os.getenv("MODEL_HEDGE_ENABLED", "false").lower() in ("1", "true", "yes")
+MODEL_HEDGE_PERCENTILE = float(os.getenv("MODEL_HEDGE_PERCENTILE", "95"))
+MODEL_HEDGE_MIN_SAMPLES = int(os.getenv("MODEL_HEDGE_MIN_SAMPLES", "20"))
+MODEL_HEDGE_WINDOW = int(os.getenv("MODEL_HEDGE_WINDOW", "200"))
+MODEL_HEDGE_MAX_EXTRA_RATIO = float(os.getenv("MODEL_HEDGE_MAX_EXTRA_RATIO", "0.05"))
+
+# /event-create single-flight: identical prompts (normalized) from the same client share one in-flight pipeline,
+# and clients arriving up to EVENT_COALESCE_LINGER_SECONDS after it finished get the same confirmation
+EVENT_COALESCING_ENABLED = os.getenv("EVENT_COALESCING_ENABLED", "true").lower() in ("1", "true", "yes")
+EVENT_COALESCE_LINGER_SECONDS = float(os.getenv("EVENT_COALESCE_LINGER_SECONDS", "2"))
@@ -1,61 +1,165 @@
+import asyncio
 import logging
+import anyio
 
 from const import const
-from fastapi import FastAPI, Depends
-from pydantic import BaseModel
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING, Optional
+from fastapi import FastAPI, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, ValidationError
 from contextlib import asynccontextmanager
 
+from app.batch import UploadStreamingResponse, iter_ndjson_prompts, read_ahead, run_event_batch
+from app.coalescing import event_coalescer
 from app.event_handler import EventCreationHandler, EventConfirmation
+from app.jobs import EventJobManager, JobQueueFull
+from app.model_scheduler import model_call_context, model_scheduler
+from app.pipeline_stats import pipeline_stats
+from app.response_cache import response_cache
+from app.semantic_cache import semantic_cache
+from app.shared_state import shared_job_store, shared_state_stats
+from app.speculation import speculation
+from app.startup import StartupState, create_openai_client, import_modules, warm_up
 from mcp_client.client import MCPOpenAIClient
+from models import EventJobStatus, FreeSlotList, FreeSlotQuery
+from telemetry.log_pipeline import setup_logging, shutdown_logging
+from telemetry.metrics import registry
+from telemetry.tracing import slow_traces
 
-# configure the loggings
-logging.basicConfig(level=logging.INFO)
+# `openai` & `mcp` are imported during startup, off the event loop (see app/startup.py)
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+# configure the loggings (the queue pipeline itself is started in the lifespan)
 logger = logging.getLogger(__name__)
 
 #
 # intance for keeping the OpenAI instance & MCP client instance. 
 openai_client = None
 mcp_client_instance = None
+event_job_manager = None
+startup_state = StartupState()
+
+async def initialize_once(app: FastAPI):
+    """
+        Initialize the OpenAI client & the MCP sessions in parallel, then start the
+        job workers. Raises on failure, leaving the clients created so far for `reset_clients`.
+    """
+    global mcp_client_instance
+    global openai_client
+    global event_job_manager
+
+    # MCP client: the server processes boot while the OpenAI client is set up & warmed up
+    logger.info("📡 Initializing MCP client...")
+    await import_modules("mcp_client.pool")
+    mcp_client_instance = MCPOpenAIClient(
+        model=const.OPEN_AI_MODEL,  # Use the model defined in const
+        openai_client=None,  # attached below, once it exists
+        scheduler=model_scheduler  # shared RPM/TPM limits, see app/model_scheduler.py
+    )
+    mcp_connected = asyncio.create_task(mcp_client_instance.connect_to_server("mcp_server/server.py"))
+    #
+    # Initialize OpenAI client
+    logger.info("📡 Initializing OpenAI client...")
+    try:
+        openai_client = await create_openai_client()
+        if const.OPENAI_WARMUP_CONNECTIONS > 0:
+            warm = await warm_up(openai_client, const.OPENAI_WARMUP_CONNECTIONS, const.OPENAI_WARMUP_TIMEOUT_SECONDS)
+            logger.info("✅ OpenAI client initialized successfully (%d warm connections)", warm)
+        else:
+            logger.info("✅ OpenAI client initialized successfully")
+    except BaseException:
+        mcp_connected.cancel()
+        await asyncio.gather(mcp_connected, return_exceptions=True)
+        raise
+    mcp_client_instance.openai_client = openai_client
+    await mcp_connected
+    logger.info("✅ MCP client initialized successfully")
+    #
+    # Start the background workers for async event creation
+    event_job_manager = EventJobManager(
+        process=lambda prompt: EventCreationHandler(
+            openai_client=openai_client,
+            mcp_client=mcp_client_instance
+        ).initialize_event(prompt),
+        workers=const.EVENT_JOB_WORKERS,
+        max_queue=const.EVENT_JOB_QUEUE_SIZE,
+        retention_seconds=const.EVENT_JOB_RETENTION_SECONDS,
+        shared=shared_job_store,  # job statuses readable by every uvicorn worker (SHARED_STATE_PATH)
+    )
+    event_job_manager.start()
+    logger.info("✅ Event job workers started")
+    #
+    # Store in app state (the request dependencies answer 503 until then)
+    app.state.openai_client = openai_client
+    app.state.mcp_client = mcp_client_instance
+    app.state.event_job_manager = event_job_manager
+    startup_state.mark_ready()
+    logger.info("✅ FastAPI application ready after %.2fs", startup_state.ready_after_s)
+
+async def reset_clients():
+    """Close whatever a failed startup attempt created, so the next one starts clean."""
+    global mcp_client_instance
+    global openai_client
+
+    if mcp_client_instance is not None:
+        await mcp_client_instance.cleanup()
+        mcp_client_instance = None
+    if openai_client is not None:
+        try:
+            await openai_client.close()
+        except Exception as e:
+            logger.warning(f"Error closing the OpenAI client: {e}")
+        openai_client = None
+
+async def initialize(app: FastAPI):
+    """
+        Background startup: `initialize_once`, retried with exponential backoff up to
+        STARTUP_MAX_ATTEMPTS times. GET /ready answers 503 until it succeeds; when every
+        attempt failed GET / answers 503 too, so the liveness probe restarts the process.
+    """
+    delay = const.STARTUP_RETRY_BACKOFF_SECONDS
+    for attempt in range(1, const.STARTUP_MAX_ATTEMPTS + 1):
+        try:
+            await initialize_once(app)
+            return
+        except Exception as e:
+            logger.error(f"❌ Failed to initialize the application (attempt {attempt}/{const.STARTUP_MAX_ATTEMPTS}): {e}")
+            await reset_clients()
+            if attempt == const.STARTUP_MAX_ATTEMPTS:
+                startup_state.mark_failed(e)
+                return
+            startup_state.mark_retrying(e)
+            await asyncio.sleep(delay)
+            delay *= 2
+
 
 # Lifespan event handler for FastAPI
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
         Manage application lifespan - startup and shutdown events.
+        The app listens (`/` answers) right away, the clients are initialized in the background.
     """
-    global mcp_client_instance
-    global openai_client
-    
     # Startup
+    # non-blocking log pipeline: records are written by a background thread, see telemetry/log_pipeline.py
+    setup_logging()
     logger.info("🚀 Starting FastAPI application...")
-    try:
-        # Initialize OpenAI client
-        logger.info("📡 Initializing OpenAI client...")
-        openai_client = AsyncOpenAI(api_key=const.OPEN_AI_API_KEY)
-        app.state.openai_client = openai_client
-        logger.info("✅ OpenAI client initialized successfully")
-        #
-        # Initialize MCP client
-        logger.info("📡 Initializing MCP client...")
-        mcp_client_instance = MCPOpenAIClient(
-            model=const.OPEN_AI_MODEL,  # Use the model defined in const
-            openai_client=openai_client  # Pass the OpenAI client instance
-        )
-        await mcp_client_instance.connect_to_server("mcp_server/server.py")  
-        # Store in app state
-        app.state.mcp_client = mcp_client_instance
-        logger.info("✅ MCP client initialized successfully")
-        logger.info("✅ FastAPI application startup complete")
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize MCP client: {e}")
-        raise
+    initializing = asyncio.create_task(initialize(app), name="app-startup")
     #
     yield  # Application runs here.
     #
     # Shutdown
     logger.info("🛑 Shutting down FastAPI application...")
+    if not initializing.done():
+        initializing.cancel()
+        await asyncio.gather(initializing, return_exceptions=True)
+    if event_job_manager:
+        await event_job_manager.stop()
+        logger.info("✅ Event job workers stopped")
+    if shared_job_store:
+        # statuses still queued (e.g. a job that just succeeded) are written before the worker exits
+        await asyncio.to_thread(shared_job_store.close)
     try:
         if mcp_client_instance:
             await mcp_client_instance.cleanup()
@@ -64,6 +168,8 @@ async def lifespan(app: FastAPI):
         logger.error(f"❌ Error during MCP client cleanup: {e}")
     #
     logger.info("✅ FastAPI application shutdown complete")
+    slow_traces.close()
+    shutdown_logging()
 
 
 # Create FastAPI app with lifespan event handler
@@ -78,42 +184,181 @@ app = FastAPI(
 class UserPromptTxt(BaseModel):
     desciption: str
 
+class EventBatchRequest(BaseModel):
+    prompts: list[str]
+
+# requests arriving before the background startup finished (see GET /ready)
+def not_ready() -> HTTPException:
+    return HTTPException(status_code=503, detail=f"Application {startup_state.status}", headers={"Retry-After": "1"})
+
 # dependency injection for OpenAI model
 def get_openai_model():
-    if not hasattr(app.state, 'openai_model'):
-        raise RuntimeError("OpenAI model not initialized")
-    return app.state.openai_model
+    if not hasattr(app.state, 'openai_client'):
+        raise not_ready()
+    return app.state.openai_client
 
 # dependency injection for MCP client
 def get_mcp_client():
     if not hasattr(app.state, 'mcp_client'):
-        raise RuntimeError("MCP client not initialized")
+        raise not_ready()
     return app.state.mcp_client
 
+# dependency injection for the async job manager
+def get_event_job_manager():
+    if not hasattr(app.state, 'event_job_manager'):
+        raise not_ready()
+    return app.state.event_job_manager
+
+# API client the model calls of a request are fair-queued under (`X-Client-Id`, else the peer address)
+def get_api_client_id(request: Request, x_client_id: Optional[str] = Header(default=None)):
+    if x_client_id:
+        return x_client_id
+    return request.client.host if request.client else "default"
+
 #
 # Root endpoint
+# liveness probe: 503 once startup has given up (see `initialize`), so the process gets restarted
 @app.get("/")
 async def root():
+    if startup_state.status == "failed":
+        return JSONResponse(status_code=503, content=startup_state.snapshot())
     return {"message": "Hello World", "app": "Calander Event Planner!"}
 
-@app.post("/event-create", response_model=EventConfirmation)
+# readiness probe: 200 once the OpenAI client & MCP sessions are up (and a session is alive), 503 before/otherwise
+@app.get("/ready")
+async def ready():
+    state = startup_state.snapshot()
+    if startup_state.ready and mcp_client_instance is not None and mcp_client_instance.pool is not None:
+        state["mcp_sessions_alive"] = sum(member.alive for member in mcp_client_instance.pool.members)
+        if state["mcp_sessions_alive"] == 0:
+            state["status"] = "degraded"
+    return JSONResponse(status_code=200 if state["status"] == "ready" else 503, content=state)
+
+# latency & token totals per pipeline mode (two-pass vs single-pass), per-stage latency percentiles and response cache counters
+@app.get("/pipeline-stats")
+async def get_pipeline_stats():
+    return {
+        "active_mode": const.EVENT_PIPELINE_MODE,
+        "modes": pipeline_stats.snapshot(),
+        "stages": pipeline_stats.stages_snapshot(),
+        "response_cache": response_cache.stats() if response_cache else None,
+        "semantic_cache": semantic_cache.stats() if semantic_cache else None,
+        "speculation": speculation.stats() if const.EVENT_PIPELINE_MODE == "speculative" else None,
+        "model_scheduler": model_scheduler.stats(),
+        "coalescing": event_coalescer.stats() if event_coalescer else None,
+        "shared_state": await asyncio.to_thread(shared_state_stats),
+    }
+
+# per-stage latency & token histograms in the Prometheus text format
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# span breakdown of the slowest requests seen so far (see TRACE_SLOW_* in const)
+@app.get("/traces/slow")
+async def get_slow_traces():
+    return slow_traces.slowest()
+
+@app.post(
+    "/event-create",
+    response_model=EventConfirmation,
+    responses={202: {"model": EventJobStatus}, 429: {"description": "Job queue is full"}},
+)
 async def create_event(
     user_prompt: UserPromptTxt,
-    openai_model: AsyncOpenAI = Depends(get_openai_model),
-    mcp_client_instance: MCPOpenAIClient = Depends(get_mcp_client)
+    prefer: Optional[str] = Header(default=None),
+    openai_model: "AsyncOpenAI" = Depends(get_openai_model),
+    mcp_client_instance: MCPOpenAIClient = Depends(get_mcp_client),
+    job_manager: EventJobManager = Depends(get_event_job_manager),
+    client_id: str = Depends(get_api_client_id)
     ):
+    # opt-in async mode (`Prefer: respond-async`): queue the job, answer 202 & let the client poll /jobs/{id}
+    if prefer and "respond-async" in prefer:
+        try:
+            job = job_manager.submit(user_prompt.desciption, client=client_id)
+        except JobQueueFull as e:
+            raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+        return JSONResponse(
+            status_code=202,
+            content=job.model_dump(),
+            headers={"Location": f"/jobs/{job.job_id}"},
+        )
+    #
     # simulate event creation logic ...
     event_handler = EventCreationHandler(
         openai_client=openai_model,
         mcp_client=mcp_client_instance
     )
-    event_confirmation: EventConfirmation = await event_handler.initialize_event(user_prompt.desciption)
+    with model_call_context("interactive", client_id):
+        event_confirmation: EventConfirmation = await event_handler.initialize_event(user_prompt.desciption)
     if event_confirmation is None:
         return {
             "confirmation_message": "Failed to create event. Please try again.",
             "calendar_link": None
         }
     return event_confirmation
+
+@app.get("/jobs/{job_id}", response_model=EventJobStatus)
+async def get_job(job_id: str, job_manager: EventJobManager = Depends(get_event_job_manager)):
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.post("/events/batch")
+async def create_events_batch(
+    request: Request,
+    concurrency: Optional[int] = None,
+    openai_model: "AsyncOpenAI" = Depends(get_openai_model),
+    mcp_client_instance: MCPOpenAIClient = Depends(get_mcp_client),
+    client_id: str = Depends(get_api_client_id)
+    ):
+    """
+        Create many events in one call. The body is either JSON ({"prompts": [...]})
+        or NDJSON (`application/x-ndjson`, one prompt per line). Results are streamed
+        back as NDJSON `EventBatchItemResult` lines in completion order.
+    """
+    body_read = anyio.Event()
+    if "ndjson" in request.headers.get("content-type", ""):
+        # prompts are run as their lines arrive, the body read at most EVENT_BATCH_READ_AHEAD_CHUNKS ahead, so it is
+        # never held in memory as a whole; UploadStreamingResponse only listens for a disconnect once it has been read
+        prompts = iter_ndjson_prompts(read_ahead(request.stream(), const.EVENT_BATCH_READ_AHEAD_CHUNKS, body_read))
+    else:
+        body_read.set()
+        try:
+            prompts = EventBatchRequest.model_validate_json(await request.body()).prompts
+        except ValidationError as e:
+            raise HTTPException(status_code=422, detail=e.errors(include_url=False))
+    #
+    limit = min(concurrency or const.EVENT_BATCH_CONCURRENCY, const.EVENT_BATCH_MAX_CONCURRENCY)
+
+    # batch items queue behind interactive /event-create calls when the model rate limits are reached
+    async def event_handler(prompt: str):
+        with model_call_context("batch", client_id):
+            return await EventCreationHandler(
+                openai_client=openai_model,
+                mcp_client=mcp_client_instance
+            ).initialize_event(prompt)
+
+    async def stream_results():
+        async for item in run_event_batch(prompts, event_handler, limit):
+            yield item.model_dump_json() + "\n"
+
+    return UploadStreamingResponse(stream_results(), body_read, media_type="application/x-ndjson")
+
+@app.post("/slots/find", response_model=FreeSlotList)
+async def find_free_slots(
+    query: FreeSlotQuery,
+    mcp_client_instance: MCPOpenAIClient = Depends(get_mcp_client)
+    ):
+    """
+        Earliest common free slots for the participants, computed by the MCP server's `find_free_slots` tool.
+    """
+    try:
+        result = await mcp_client_instance.call_tool("find_free_slots", query.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FreeSlotList.model_validate_json(result)
 #
 #
 if __name__ == "__main__":
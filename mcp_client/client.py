@@ -1,76 +1,211 @@
 import asyncio
+import functools
+import hashlib
 import json
+import logging
+import os
+import time
 
-from contextlib import AsyncExitStack
-from typing import Any, Dict, List, Optional
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional
+from const import const
 from models import EventConfirmation
+from telemetry.tracing import span
+
+# `mcp` & `openai` take about a second to import: they are only loaded when the client connects
+# (main.py does that off the event loop during startup), so importing this module stays cheap
+if TYPE_CHECKING:
+    from mcp import types
+    from openai import AsyncOpenAI
+    from app.model_scheduler import ModelCallScheduler
+    from mcp_client.pool import MCPSessionPool
+
+logger = logging.getLogger(__name__)
+
+
+def _strict_schema(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    A pydantic JSON schema in the form strict structured outputs accept: every object
+    closed (`additionalProperties: false`) with all its properties required, no null defaults.
+    """
+    schema = {key: value for key, value in schema.items() if not (key == "default" and value is None)}
+    if schema.get("type") == "object" and "properties" in schema:
+        schema["properties"] = {name: _strict_schema(value) for name, value in schema["properties"].items()}
+        schema["required"] = list(schema["properties"])
+        schema["additionalProperties"] = False
+    if "items" in schema:
+        schema["items"] = _strict_schema(schema["items"])
+    for key in ("anyOf", "allOf"):
+        if key in schema:
+            schema[key] = [_strict_schema(variant) for variant in schema[key]]
+    if "$defs" in schema:
+        schema["$defs"] = {name: _strict_schema(value) for name, value in schema["$defs"].items()}
+    return schema
+
+
+@functools.cache
+def confirmation_format() -> Dict[str, Any]:
+    """Strict JSON-schema format of EventConfirmation; `create` takes it next to (non-strict) tools, `parse` does not."""
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": EventConfirmation.__name__,
+            "schema": _strict_schema(EventConfirmation.model_json_schema()),
+            "strict": True,
+        },
+    }
+
+# single-item tool -> (bulk tool, argument holding the item, bulk argument holding the list).
+# Several calls of the single tool in one model turn are sent as one bulk call when the server has it.
+BULK_TOOLS = {
+    "create_calendar_event": ("create_calendar_events", "event", "events"),
+}
+
+
+def tool_call_idempotency_key(request_key: str, tool: str, position: int) -> str:
+    """
+    Idempotency key of one call of a single-item tool: the request's key (built from the
+    parsed event details), the tool & the call's position among the query's calls of that
+    tool. The model's wording of the arguments (title casing, description, ...) is left
+    out, so a retried request that phrases the same create differently reuses the key,
+    also when the call goes out as a bulk item; two creates of one request differ by position.
+    """
+    payload = json.dumps([request_key, tool, position])
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# bulk tool -> (single-item tool, bulk argument holding the list), for bulk calls the model makes itself
+SINGLE_TOOLS = {bulk: (single, items) for single, (bulk, _, items) in BULK_TOOLS.items()}
 
 
 class MCPOpenAIClient:
     """Client for interacting with OpenAI models using MCP tools."""
-    def __init__(self, model: str, openai_client: AsyncOpenAI):
+    def __init__(
+        self,
+        model: str,
+        openai_client: "AsyncOpenAI",
+        scheduler: Optional["ModelCallScheduler"] = None,
+        tool_concurrency: int = const.MCP_TOOL_CALL_CONCURRENCY,
+        tool_timeout: float = const.MCP_TOOL_CALL_TIMEOUT_SECONDS,
+        max_tool_turns: int = const.MCP_MAX_TOOL_TURNS,
+        tool_loop_deadline: float = const.MCP_TOOL_LOOP_DEADLINE_SECONDS,
+    ):
         """
         Initialize the OpenAI MCP client.
         Args:
             model: The OpenAI model to use.
+            scheduler: Rate-limit scheduler the model calls go through (None calls OpenAI directly).
+            tool_concurrency: Tool calls of one model turn running at the same time.
+            tool_timeout: Seconds a tool call may take before it is reported to the model as failed (0 = no limit).
+            max_tool_turns: Model turns that may call tools in one query (1 = one round, then the confirmation).
+            tool_loop_deadline: Seconds into a query after which no further tool turn starts.
         """
-        # Initialize session and client objects
-        self.session: Optional[ClientSession] = None
-        self.exit_stack = AsyncExitStack()
+        # Initialize session pool and client objects
+        self.pool: Optional["MCPSessionPool"] = None
         self.openai_client = openai_client
         self.model = model
-        self.stdio: Optional[Any] = None
-        self.write: Optional[Any] = None
+        self.scheduler = scheduler
+        self.tool_concurrency = max(1, tool_concurrency)
+        self.tool_timeout = tool_timeout
+        self.max_tool_turns = max(1, max_tool_turns)
+        self.tool_loop_deadline = tool_loop_deadline
+        # tool catalog in OpenAI format, built once & reused until the server says it changed
+        self._tools: Optional[List[Dict[str, Any]]] = None
+        self._tools_lock = asyncio.Lock()
 
-    async def connect_to_server(self, server_script_path: str = "server.py"):
+    async def connect_to_server(
+        self,
+        server_script_path: str = "server.py",
+        pool_size: int = const.MCP_POOL_SIZE,
+        transport: str = const.MCP_TRANSPORT,
+    ):
         """
         Connect to an MCP server.
         Args:
-            server_script_path: Path to the server script.
+            server_script_path: Path to the server script (stdio transport).
+            pool_size: Number of server processes (each with its own session) to spread tool calls over.
+            transport: "stdio" spawns the server script, "memory" mounts mcp_server/server.py's
+                FastMCP server in this process (its tools running on one background thread).
         """
+        from mcp import StdioServerParameters
+        from mcp.client.stdio import get_default_environment
+        from mcp_client.pool import MCPSessionPool, memory_transport
+
         try:
-            # Server configuration
-            server_params = StdioServerParameters(
-                command="python",
-                args=[server_script_path],
-            )
+            if transport == "memory":
+                # imported here, so the stdio-only app never loads the server's modules
+                from mcp_server.server import mcp as server
 
-            # Connect to the server
-            stdio_transport = await self.exit_stack.enter_async_context(
-                stdio_client(server_params)
-            )
-            self.stdio, self.write = stdio_transport
-            self.session = await self.exit_stack.enter_async_context(
-                ClientSession(self.stdio, self.write)
-            )
+                server_connection = memory_transport(server)
+            elif transport == "stdio":
+                # Server configuration
+                server_connection = StdioServerParameters(
+                    command="python",
+                    args=[server_script_path],
+                    # the stdio transport only passes a minimal environment, forward the server settings explicitly
+                    env={
+                        **get_default_environment(),
+                        **{k: v for k, v in os.environ.items() if k.startswith(const.MCP_SERVER_ENV_PREFIXES)},
+                    },
+                )
+            else:
+                raise ValueError(f"Unknown MCP transport: {transport}")
 
-            # Initialize the connection
-            await self.session.initialize()
+            # Start the server processes (or in-process sessions) & initialize their sessions
+            self.pool = MCPSessionPool(
+                server_connection,
+                size=pool_size,
+                strategy=const.MCP_POOL_STRATEGY,
+                health_check_interval=const.MCP_POOL_HEALTH_CHECK_INTERVAL,
+                message_handler=self._handle_server_message,
+            )
+            await self.pool.start()
 
             # List available tools
-            tools_result = await self.session.list_tools()
-            print("Connected to server with tools:")
+            tools_result = await self.pool.list_tools()
+            self._tools = self._to_openai_tools(tools_result.tools)
+            logger.info("Connected to server (%d sessions, %d tools)", self.pool.size, len(tools_result.tools))
             for tool in tools_result.tools:
-                print(f"  - {tool.name}: {tool.description}")
-                
+                logger.debug("  - %s: %s", tool.name, tool.description)
+
         except Exception as e:
-            print(f"Error connecting to server: {e}")
+            logger.error("Error connecting to server: %s", e)
             await self.cleanup()
             raise
 
+    async def _handle_server_message(self, message: Any) -> None:
+        """Drop the cached tool catalog when the server announces `tools/list_changed`."""
+        from mcp import types
+
+        if isinstance(message, types.ServerNotification) and isinstance(
+            message.root, types.ToolListChangedNotification
+        ):
+            self.invalidate_tools()
+
+    def invalidate_tools(self) -> None:
+        """Force the next `get_mcp_tools` call to fetch the catalog from the server again."""
+        self._tools = None
+
     async def get_mcp_tools(self) -> List[Dict[str, Any]]:
         """
         Get available tools from the MCP server in OpenAI format.
+        The catalog is cached; it is only fetched again after `invalidate_tools`.
         Returns:
-            A list of tools in OpenAI format.
+            A list of tools in OpenAI format. Shared between callers, do not mutate.
         """
-        if not self.session:
+        if not self.pool:
             raise RuntimeError("Not connected to server")
-            
-        tools_result = await self.session.list_tools()
+
+        tools = self._tools
+        if tools is not None:
+            return tools
+        async with self._tools_lock:
+            if self._tools is None:
+                tools_result = await self.pool.list_tools()
+                self._tools = self._to_openai_tools(tools_result.tools)
+            return self._tools
+
+    @staticmethod
+    def _to_openai_tools(mcp_tools: List["types.Tool"]) -> List[Dict[str, Any]]:
         return [
             {
                 "type": "function",
@@ -80,31 +215,206 @@ class MCPOpenAIClient:
                     "parameters": tool.inputSchema,
                 },
             }
-            for tool in tools_result.tools
+            for tool in mcp_tools
         ]
 
-    async def process_query(self, prompt: list[dict[str, Any]]) -> EventConfirmation:
+    async def call_tool(self, name: str, arguments: Dict[str, Any]) -> str:
+        """
+        Call an MCP tool directly, without the model in the loop.
+        Returns:
+            The tool's text output.
+        Raises:
+            ValueError: when the tool reports an error.
+        """
+        if not self.pool:
+            raise RuntimeError("Not connected to server")
+
+        result = await self.pool.call_tool(name, arguments=arguments)
+        text = "".join(content.text for content in result.content if content.type == "text")
+        if result.isError:
+            raise ValueError(text)
+        return text
+
+    async def _complete(
+        self,
+        make_call: Callable[[], Awaitable[Any]],
+        messages: List[Any],
+        tools: Optional[List[Dict[str, Any]]] = None,
+        stage: str = "model",
+    ) -> Any:
+        """Issue one model call, through the scheduler when one is set."""
+        if self.scheduler is None:
+            return await make_call()
+        return await self.scheduler.call(make_call, messages, tools, stage=stage)
+
+    @staticmethod
+    def _group_tool_calls(tool_calls: List[Any], tool_names: set[str]) -> tuple[List[Any], Dict[tuple, List[tuple[Any, Any]]]]:
+        """
+        Split a model turn's tool calls into calls made one by one & groups sent as one bulk call
+        (see BULK_TOOLS). Calls are only grouped with calls of the same tool & the same other arguments.
+        Returns:
+            The single calls, and the (tool call, item) pairs per (bulk tool, items argument, other arguments as JSON).
+        """
+        candidates: Dict[tuple, List[tuple[Any, Any]]] = {}
+        singles = []
+        for tool_call in tool_calls:
+            bulk = BULK_TOOLS.get(tool_call.function.name)
+            arguments = None
+            if bulk is not None and bulk[0] in tool_names:
+                try:
+                    arguments = json.loads(tool_call.function.arguments)
+                except ValueError:
+                    pass
+            if not isinstance(arguments, dict) or bulk[1] not in arguments:
+                singles.append(tool_call)
+                continue
+            item = arguments.pop(bulk[1])
+            arguments.pop("idempotency_key", None)
+            shared = tuple(sorted((k, json.dumps(v, sort_keys=True)) for k, v in arguments.items()))
+            candidates.setdefault((bulk[0], bulk[2], shared), []).append((tool_call, item))
+        bulks = {}
+        for key, calls in candidates.items():
+            if len(calls) == 1:
+                singles.append(calls[0][0])
+            else:
+                bulks[key] = calls
+        return singles, bulks
+
+    async def _call_tool_with_timeout(self, name: str, arguments: Dict[str, Any]) -> str:
+        if self.tool_timeout <= 0:
+            return await self.call_tool(name, arguments=arguments)
+        try:
+            return await asyncio.wait_for(self.call_tool(name, arguments=arguments), self.tool_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"tool {name} did not answer within {self.tool_timeout:g}s") from None
+
+    async def _run_tool_calls(
+        self,
+        tool_calls: List[Any],
+        tools: List[Dict[str, Any]],
+        idempotency_key: Optional[str] = None,
+        positions: Optional[Dict[str, int]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute the tool calls of one model turn. The model issues them together, so they
+        are independent of each other & run concurrently (at most `tool_concurrency` at a
+        time, spread over the pool's sessions), each bounded by `tool_timeout`.
+        Args:
+            positions: Calls of each single-item tool made so far in the query, for the
+                idempotency keys (see `tool_call_idempotency_key`); updated in place.
+        Returns:
+            One `tool` message per call, in the order of `tool_calls`; failed calls report their error.
+        """
+        parameters = {tool["function"]["name"]: tool["function"]["parameters"].get("properties", {}) for tool in tools}
+        # tool call id -> the keys of its items, numbered in the order the model made the calls
+        keys: Dict[str, List[str]] = {}
+        if idempotency_key:
+            positions = {} if positions is None else positions
+
+            def next_key(tool: str) -> str:
+                position = positions[tool] = positions.get(tool, 0) + 1
+                return tool_call_idempotency_key(idempotency_key, tool, position)
+
+            for tool_call in tool_calls:
+                name = tool_call.function.name
+                if "idempotency_key" in parameters.get(name, {}):
+                    keys[tool_call.id] = [next_key(name)]
+                elif "idempotency_keys" in parameters.get(name, {}) and name in SINGLE_TOOLS:
+                    single, items_argument = SINGLE_TOOLS[name]
+                    try:
+                        items = json.loads(tool_call.function.arguments).get(items_argument)
+                    except (ValueError, AttributeError):
+                        continue
+                    if isinstance(items, list):
+                        keys[tool_call.id] = [next_key(single) for _ in items]
+        tool_names = set(parameters)
+        outputs: Dict[str, str] = {}
+        semaphore = asyncio.Semaphore(self.tool_concurrency)
+
+        async def run_single(tool_call: Any) -> None:
+            try:
+                arguments = json.loads(tool_call.function.arguments)
+                if tool_call.id in keys:
+                    if "idempotency_key" in parameters[tool_call.function.name]:
+                        arguments["idempotency_key"] = keys[tool_call.id][0]
+                    else:
+                        arguments["idempotency_keys"] = keys[tool_call.id]
+                async with semaphore:
+                    with span("mcp-call-tool", tool=tool_call.function.name):
+                        outputs[tool_call.id] = await self._call_tool_with_timeout(tool_call.function.name, arguments)
+            except Exception as e:
+                logger.warning("Error executing tool call: %s", e)
+                outputs[tool_call.id] = f"Error: {str(e)}"
+
+        # one bulk call per (tool, shared arguments); every original call gets its own item's result
+        async def run_bulk(bulk_name: str, items_argument: str, shared: tuple, calls: List[tuple[Any, Any]]) -> None:
+            arguments = {name: json.loads(value) for name, value in shared}
+            if "idempotency_keys" in parameters[bulk_name] and all(tool_call.id in keys for tool_call, _ in calls):
+                # per item, the key the call would have had on its own
+                arguments["idempotency_keys"] = [keys[tool_call.id][0] for tool_call, _ in calls]
+            arguments[items_argument] = [item for _, item in calls]
+            try:
+                async with semaphore:
+                    with span("mcp-call-tool", tool=bulk_name, items=len(calls)):
+                        results = json.loads(await self._call_tool_with_timeout(bulk_name, arguments))["results"]
+                for (tool_call, _), result in zip(calls, results):
+                    outputs[tool_call.id] = json.dumps(result)
+            except Exception as e:
+                logger.warning("Error executing bulk tool call: %s", e)
+                for tool_call, _ in calls:
+                    outputs[tool_call.id] = f"Error: {str(e)}"
+
+        singles, bulks = self._group_tool_calls(tool_calls, tool_names)
+        await asyncio.gather(
+            *(run_single(tool_call) for tool_call in singles),
+            *(run_bulk(*key, calls) for key, calls in bulks.items()),
+        )
+        # the conversation needs one answer per call, in the order the model made them
+        return [
+            {
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": outputs[tool_call.id],
+            }
+            for tool_call in tool_calls
+        ]
+
+    async def process_query(self, prompt: list[dict[str, Any]], idempotency_key: Optional[str] = None) -> EventConfirmation:
         """
         Process a query using OpenAI and available MCP tools.
+        The model may call tools for up to `max_tool_turns` turns; every turn after the
+        first also offers the `EventConfirmation` format, so a model that is done answers
+        with the confirmation right away. No new turn starts after `tool_loop_deadline`.
         Args:
             query: The user query.
+            idempotency_key: Request key that every call of a tool taking an `idempotency_key`
+                gets its own key from, by the call's position in the query (see
+                `tool_call_idempotency_key`, overriding whatever the model filled in), so a
+                repeated query does not write twice.
         Returns:
             The response from OpenAI.
         """
-        if not self.session:
+        if not self.pool:
             raise RuntimeError("Not connected to server")
             
         # Get available tools
         tools = await self.get_mcp_tools()
+        deadline = time.monotonic() + self.tool_loop_deadline
 
-        # Initial OpenAI API call
-        response = await self.openai_client.chat.completions.create(
-            model=self.model,
-            messages=prompt,
-            tools=tools,
-            tool_choice="auto",
-            response_format=EventConfirmation,
-        )
+        # Initial OpenAI API call, the model decides which tools to call
+        with span("tool-selection") as current:
+            response = await self._complete(
+                lambda: self.openai_client.chat.completions.create(
+                    model=self.model,
+                    messages=prompt,
+                    tools=tools,
+                    tool_choice="auto",
+                ),
+                prompt,
+                tools,
+                stage="tool-selection",
+            )
+            current.add_usage(response.usage)
 
         # Get assistant's response
         assistant_message = response.choices[0].message
@@ -115,54 +425,62 @@ class MCPOpenAIClient:
             assistant_message,
         ]
 
-        # Handle tool calls if present
-        if assistant_message.tool_calls:
-            # Process each tool call
-            for tool_call in assistant_message.tool_calls:
+        # Handle tool calls if present, then let the model call more tools or confirm
+        turn = 1
+        positions: Dict[str, int] = {}
+        while assistant_message.tool_calls:
+            messages.extend(await self._run_tool_calls(assistant_message.tool_calls, tools, idempotency_key, positions))
+            if turn >= self.max_tool_turns or time.monotonic() >= deadline:
+                break
+            turn += 1
+            turn_messages = list(messages)
+            with span("tool-loop", turn=turn) as current:
+                response = await self._complete(
+                    lambda: self.openai_client.chat.completions.create(
+                        model=self.model,
+                        messages=turn_messages,
+                        tools=tools,
+                        tool_choice="auto",
+                        response_format=confirmation_format(),
+                    ),
+                    turn_messages,
+                    tools,
+                    stage="tool-loop",
+                )
+                current.add_usage(response.usage)
+            assistant_message = response.choices[0].message
+            if not assistant_message.tool_calls and assistant_message.content:
                 try:
-                    # Execute tool call
-                    result = await self.session.call_tool(
-                        tool_call.function.name,
-                        arguments=json.loads(tool_call.function.arguments),
-                    )
-                    # Add tool response to conversation
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": result.content[0].text,
-                        }
-                    )
-                except Exception as e:
-                    print(f"Error executing tool call: {e}")
-                    # Add error message to conversation
-                    messages.append(
-                        {
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": f"Error: {str(e)}",
-                        }
-                    )
-
-            # Get final response from OpenAI with tool results
-            final_response = await self.openai_client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=tools,
-                tool_choice="none",  # Don't allow more tool calls
-                response_format=EventConfirmation,
+                    return EventConfirmation.model_validate_json(assistant_message.content)
+                except ValueError as e:
+                    logger.warning("Unparsable confirmation in tool turn %d: %s", turn, e)
+                break
+            messages.append(assistant_message)
+
+        # Final structured response with the tool results. `parse` only accepts strict
+        # function tools & the MCP schemas are not, so no further tool calls are offered.
+        with span("confirmation") as current:
+            final_response = await self._complete(
+                lambda: self.openai_client.beta.chat.completions.parse(
+                    model=self.model,
+                    messages=messages,
+                    response_format=EventConfirmation,
+                ),
+                messages,
+                stage="confirmation",
             )
-            return final_response.choices[0].message.parsed
-        #
-        # No tool calls, just return the direct response
-        return assistant_message.message.parsed
+            current.add_usage(final_response.usage)
+        return final_response.choices[0].message.parsed
 
     async def cleanup(self):
         """Clean up resources."""
         try:
-            await self.exit_stack.aclose()
+            if self.pool:
+                await self.pool.close()
+                self.pool = None
+            self._tools = None
         except Exception as e:
-            print(f"Warning: Error during cleanup: {e}")
+            logger.warning("Error during cleanup: %s", e)
 
     async def __aenter__(self):
         """Context manager entry."""
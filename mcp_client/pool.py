@@ -0,0 +1,320 @@
+import asyncio
+import itertools
+import logging
+import threading
+
+import anyio
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.session import MessageHandlerFnT
+from mcp.client.stdio import stdio_client
+from mcp.shared.memory import create_client_server_memory_streams
+
+if TYPE_CHECKING:
+    from mcp.server.fastmcp import FastMCP
+    from mcp.server.lowlevel import Server
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# opens the (read, write) streams of one MCP session, for as long as the context is entered
+Transport = Callable[[], AsyncContextManager[Tuple[Any, Any]]]
+
+
+def stdio_transport(server_params: StdioServerParameters) -> Transport:
+    """A new server process per session, JSON-RPC over its stdin/stdout."""
+    return lambda: stdio_client(server_params)
+
+
+class ToolLoopThread:
+    """
+    One thread running one long-lived event loop, for the tools of an in-process server.
+    They do blocking SQLite work (the conflict index loads the whole store on first use),
+    so they must stay off the app's loop; running them all on this loop keeps the store
+    on one thread, as in the single-loop stdio server, without a new loop per call.
+    Started by the first `acquire()`, stopped by the last `release()`.
+    """
+    def __init__(self, name: str = "mcp-tools"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._users = 0
+
+    def acquire(self) -> None:
+        self._users += 1
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+            self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+            self._thread.start()
+
+    async def release(self) -> None:
+        self._users -= 1
+        if self._users or self._loop is None:
+            return
+        loop, thread = self._loop, self._thread
+        self._loop = self._thread = None
+        loop.call_soon_threadsafe(loop.stop)
+        # a tool still running finishes first: wait for it off the app's loop
+        await asyncio.to_thread(thread.join)
+        loop.close()
+
+    async def run(self, coroutine: Awaitable[T]) -> T:
+        """Run `coroutine` on the tool loop; cancelling the caller cancels it there too."""
+        if self._loop is None:
+            raise RuntimeError("tool loop is not running")
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, self._loop))
+
+
+def in_process_server(server: "FastMCP", tool_loop: ToolLoopThread) -> "Server":
+    """
+    Low-level MCP server serving `server`'s tools through its public `list_tools` &
+    `call_tool`, the calls running on `tool_loop`.
+    """
+    from mcp.server.lowlevel import Server
+
+    lowlevel: Server = Server(server.name)
+
+    @lowlevel.list_tools()
+    async def list_tools():
+        return await server.list_tools()
+
+    @lowlevel.call_tool()
+    async def call_tool(name: str, arguments: Dict[str, Any]):
+        return await tool_loop.run(server.call_tool(name, arguments))
+
+    return lowlevel
+
+
+def memory_transport(server: "FastMCP") -> Transport:
+    """
+    Sessions with `server` running in this process: messages are handed over as
+    objects through in-memory streams, no subprocess, no JSON over pipes. Tool
+    calls run on one background thread & loop (see `ToolLoopThread`), kept while any session is open,
+    so they do not block the app's loop.
+    """
+    tool_loop = ToolLoopThread()
+    lowlevel = in_process_server(server, tool_loop)
+
+    @asynccontextmanager
+    async def connect() -> AsyncIterator[Tuple[Any, Any]]:
+        tool_loop.acquire()
+        try:
+            async with create_client_server_memory_streams() as (client_streams, (server_read, server_write)):
+                async with anyio.create_task_group() as tg:
+                    tg.start_soon(
+                        lambda: lowlevel.run(server_read, server_write, lowlevel.create_initialization_options(), raise_exceptions=False)
+                    )
+                    try:
+                        yield client_streams
+                    finally:
+                        tg.cancel_scope.cancel()
+        finally:
+            await tool_loop.release()
+
+    return connect
+
+
+class PooledSession:
+    """
+    One MCP server connection (a server process over stdio, or an in-process server
+    over memory streams, see `Transport`) and its ClientSession.
+    The session lives inside its own task, because the transports are built
+    on anyio task groups that must be entered and exited by the same task. That
+    lets the health checker respawn a member and the FastAPI lifespan close it.
+    """
+    def __init__(
+        self,
+        index: int,
+        transport: Transport,
+        message_handler: Optional[MessageHandlerFnT] = None,
+    ):
+        self.index = index
+        self.transport = transport
+        self.message_handler = message_handler
+        self.session: Optional[ClientSession] = None
+        self.in_flight: int = 0
+        self.calls: int = 0
+        self.restarts: int = 0
+        self.healthy: bool = False
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Future] = None
+        self._stop: Optional[asyncio.Event] = None
+
+    async def start(self) -> None:
+        """Open the transport (e.g. spawn the server process) and wait for the MCP handshake to finish."""
+        loop = asyncio.get_running_loop()
+        self._ready = loop.create_future()
+        self._stop = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.index}")
+        await self._ready
+        self.healthy = True
+
+    async def _run(self) -> None:
+        try:
+            async with AsyncExitStack() as stack:
+                read, write = await stack.enter_async_context(self.transport())
+                session = await stack.enter_async_context(ClientSession(read, write, message_handler=self.message_handler))
+                await session.initialize()
+                self.session = session
+                self._ready.set_result(None)
+                await self._stop.wait()
+        except asyncio.CancelledError as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            raise
+        except Exception as e:
+            if not self._ready.done():
+                self._ready.set_exception(e)
+            else:
+                logger.warning("MCP session %d stopped unexpectedly: %s", self.index, e)
+        finally:
+            self.healthy = False
+            self.session = None
+
+    @property
+    def alive(self) -> bool:
+        return self.healthy and self._task is not None and not self._task.done()
+
+    async def ping(self, timeout: float) -> bool:
+        if not self.alive:
+            return False
+        try:
+            await asyncio.wait_for(self.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stop.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=5)
+        except (asyncio.TimeoutError, Exception):
+            self._task.cancel()
+        self._task = None
+        self.healthy = False
+
+    async def restart(self) -> None:
+        await self.stop()
+        await self.start()
+        self.restarts += 1
+
+
+class MCPSessionPool:
+    """
+    Fixed-size pool of MCP server processes, so concurrent tool calls do not
+    queue on one stdio pipe. Dead members are respawned on checkout and by a
+    periodic health check. `server` is the stdio server to spawn, or any
+    `Transport` (e.g. `memory_transport`, where one session is enough).
+    """
+    STRATEGIES = ("least-busy", "round-robin")
+
+    def __init__(
+        self,
+        server: Union[StdioServerParameters, Transport],
+        size: int = 1,
+        strategy: str = "least-busy",
+        health_check_interval: float = 30.0,
+        health_check_timeout: float = 5.0,
+        message_handler: Optional[MessageHandlerFnT] = None,
+    ):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown pool strategy: {strategy}")
+        transport = stdio_transport(server) if isinstance(server, StdioServerParameters) else server
+        self.members = [PooledSession(i, transport, message_handler) for i in range(max(1, size))]
+        self.strategy = strategy
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self._round_robin = itertools.cycle(range(len(self.members)))
+        self._health_task: Optional[asyncio.Task] = None
+        self._respawn_locks = [asyncio.Lock() for _ in self.members]
+
+    @property
+    def size(self) -> int:
+        return len(self.members)
+
+    async def start(self) -> None:
+        """Start every member in parallel, then the health-check loop."""
+        results = await asyncio.gather(*(m.start() for m in self.members), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await self.close()
+            raise errors[0]
+        if self.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop(), name="mcp-pool-health")
+
+    async def _respawn(self, member: PooledSession) -> None:
+        async with self._respawn_locks[member.index]:
+            if member.alive:
+                return
+            logger.info("Respawning MCP session %d", member.index)
+            await member.restart()
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for member in self.members:
+                # only ping idle members, a busy one is proving itself already
+                if member.in_flight == 0 and not await member.ping(self.health_check_timeout):
+                    member.healthy = False
+                if not member.alive:
+                    try:
+                        await self._respawn(member)
+                    except Exception as e:
+                        logger.error("Failed to respawn MCP session %d: %s", member.index, e)
+
+    def _pick(self) -> PooledSession:
+        if self.strategy == "round-robin":
+            for _ in range(self.size):
+                member = self.members[next(self._round_robin)]
+                if member.alive:
+                    return member
+            return self.members[next(self._round_robin)]
+        alive = [m for m in self.members if m.alive]
+        return min(alive or self.members, key=lambda m: m.in_flight)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[ClientSession]:
+        """Check out a session for the duration of the `async with` block."""
+        member = self._pick()
+        if not member.alive:
+            await self._respawn(member)
+        member.in_flight += 1
+        member.calls += 1
+        try:
+            yield member.session
+        except (ConnectionError, BrokenPipeError, EOFError):
+            member.healthy = False
+            raise
+        finally:
+            member.in_flight -= 1
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        async with self.session() as session:
+            return await session.call_tool(name, arguments=arguments)
+
+    async def list_tools(self) -> Any:
+        async with self.session() as session:
+            return await session.list_tools()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "index": m.index,
+                "alive": m.alive,
+                "in_flight": m.in_flight,
+                "calls": m.calls,
+                "restarts": m.restarts,
+            }
+            for m in self.members
+        ]
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        await asyncio.gather(*(m.stop() for m in self.members), return_exceptions=True)
@@ -0,0 +1,153 @@
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional
+
+try:
+    from .recurrence import RECURRENCE_CONFLICT_DAYS, Series, iter_occurrences
+    from .store import EventStore
+except ImportError:  # run as a script (`python mcp_server/server.py`)
+    from recurrence import RECURRENCE_CONFLICT_DAYS, Series, iter_occurrences
+    from store import EventStore
+
+
+class ParticipantIntervals:
+    """
+    One participant's events as parallel arrays sorted by start time.
+    An event overlapping [start, end) must start in [start - max_duration, end),
+    so a lookup is two bisects plus a scan over the (few) candidates.
+    """
+    __slots__ = ("starts", "ends", "ids", "max_duration")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.ids = array("q")
+        self.max_duration = 0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, start: int, end: int, event_id: int) -> None:
+        """Add an interval known to sort after every existing one (bulk load)."""
+        self.starts.append(start)
+        self.ends.append(end)
+        self.ids.append(event_id)
+        self.max_duration = max(self.max_duration, end - start)
+
+    def add(self, start: int, end: int, event_id: int) -> None:
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+        self.ids.insert(i, event_id)
+        self.max_duration = max(self.max_duration, end - start)
+
+    def remove(self, start: int, event_id: int) -> bool:
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.ids[i] == event_id:
+                del self.starts[i], self.ends[i], self.ids[i]
+                return True
+            i += 1
+        return False
+
+    def candidates(self, start: int, end: int) -> tuple[int, int]:
+        """Index range [lo, hi) of the intervals that may overlap [start, end)."""
+        return bisect_left(self.starts, start - self.max_duration), bisect_left(self.starts, end)
+
+    def overlapping(self, start: int, end: int) -> List[int]:
+        lo, hi = self.candidates(start, end)
+        ends, ids = self.ends, self.ids
+        return [ids[i] for i in range(lo, hi) if ends[i] > start]
+
+
+class ConflictIndex:
+    """
+    In-memory per-participant interval index over the event store.
+    Built once from the store, then kept current by replaying the store's
+    change log, which also picks up writes made by other server processes.
+    Recurring events are kept per participant as rules and only expanded
+    over the window being checked.
+    With `load=False` the index starts empty and is filled with `add` &
+    `add_series` only, e.g. to check events not yet stored against each other.
+    """
+    def __init__(self, store: EventStore, load: bool = True):
+        self.store = store
+        self.participants: Dict[str, ParticipantIntervals] = {}
+        self.series: Dict[str, Dict[int, Series]] = {}
+        self.seq = 0
+        if load:
+            self._load()
+
+    def _load(self) -> None:
+        # one read transaction, so the intervals & the log position agree
+        with self.store.snapshot():
+            self.seq = self.store.last_change()
+            current: Optional[ParticipantIntervals] = None
+            current_name: Optional[str] = None
+            for participant, start, end, event_id in self.store.iter_participant_intervals():
+                if participant != current_name:
+                    current_name, current = participant, ParticipantIntervals()
+                    self.participants[participant] = current
+                current.append(start, end, event_id)
+            for participant, series in self.store.iter_series_participants():
+                self.series.setdefault(participant, {})[series.event_id] = series
+
+    def sync(self) -> None:
+        """Apply store writes made since the last sync."""
+        for seq, op, event_id, start, end, participants in self.store.changes_since(self.seq):
+            if op == "add":
+                self.add(event_id, start, end, participants)
+            elif op == "add_series":
+                series = self.store.get_series(event_id)
+                if series is not None:  # None when it was deleted again since
+                    self.add_series(series, participants)
+            else:
+                self.remove(event_id, start, participants)
+            self.seq = seq
+
+    def add(self, event_id: int, start: int, end: int, participants: Iterable[str]) -> None:
+        for participant in participants:
+            self.participants.setdefault(participant, ParticipantIntervals()).add(start, end, event_id)
+
+    def add_series(self, series: Series, participants: Iterable[str]) -> None:
+        for participant in participants:
+            self.series.setdefault(participant, {})[series.event_id] = series
+
+    def remove(self, event_id: int, start: int, participants: Iterable[str]) -> None:
+        for participant in participants:
+            intervals = self.participants.get(participant)
+            if intervals is not None:
+                intervals.remove(start, event_id)
+            series = self.series.get(participant)
+            if series is not None:
+                series.pop(event_id, None)
+
+    def find_conflicts(self, participants: Iterable[str], start: int, end: int) -> Dict[str, List[int]]:
+        """
+        Event ids overlapping [start, end), per participant. Participants without conflicts are left out.
+        Call `sync()` first when other writers may be active.
+        """
+        conflicts: Dict[str, List[int]] = {}
+        cache = self.store.occurrences
+        for participant in participants:
+            intervals = self.participants.get(participant)
+            event_ids = intervals.overlapping(start, end) if intervals is not None else []
+            for event_id, series in self.series.get(participant, {}).items():
+                if series.overlaps(cache, start, end):
+                    event_ids.append(event_id)
+            if event_ids:
+                conflicts[participant] = event_ids
+        return conflicts
+
+    def find_series_conflicts(self, participants: List[str], series: Series) -> Dict[str, List[int]]:
+        """
+        Event ids overlapping any occurrence of a new recurring event, per participant.
+        Occurrences are generated one at a time; open-ended series are checked
+        for their first RECURRENCE_CONFLICT_DAYS days only.
+        """
+        horizon = min(series.end_ts, series.start_ts + RECURRENCE_CONFLICT_DAYS * 86400)
+        found: Dict[str, Dict[int, None]] = {}
+        for start, end in iter_occurrences(series.rule, series.first_start, series.first_end, series.start_ts, horizon):
+            for participant, event_ids in self.find_conflicts(participants, start, end).items():
+                found.setdefault(participant, {}).update(dict.fromkeys(event_ids))
+        return {participant: list(event_ids) for participant, event_ids in found.items()}
@@ -0,0 +1,393 @@
+"""
+Streaming iCalendar (RFC 5545) import & export for the event store.
+
+    python -m mcp_server.ics import calendar.ics [--domain-type outlook] [--batch 5000]
+    python -m mcp_server.ics export out.ics [--participant alice@example.com] [--start ...] [--end ...]
+
+Both directions hold one VEVENT (plus one insert batch) in memory at a time,
+so file size does not matter. RRULEs within the supported subset (DAILY,
+WEEKLY with plain BYDAY weekdays, MONTHLY; INTERVAL, COUNT, UNTIL) and their
+EXDATEs are stored on the event; a VEVENT with any other rule is imported as
+its first occurrence.
+"""
+import argparse
+import re
+import sys
+from datetime import date, datetime, time as dt_time, timedelta, timezone
+from itertools import batched
+from typing import Iterable, Iterator, Optional, TextIO, Union
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+try:
+    from .models import CalendarEvent, RecurrenceRule, StoredCalendarEvent
+    from .recurrence import WEEKDAYS, is_date_only, parse_time, parse_until
+    from .store import EventStore, to_timestamp
+except ImportError:  # run as a script (`python mcp_server/server.py`)
+    from models import CalendarEvent, RecurrenceRule, StoredCalendarEvent
+    from recurrence import WEEKDAYS, is_date_only, parse_time, parse_until
+    from store import EventStore, to_timestamp
+
+PRODID = "-//calendar-even-planner//ics//EN"
+FOLD_OCTETS = 75
+
+_DURATION = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+_UNESCAPE = re.compile(r"\\([\\;,nN])")
+
+
+class IcsParseError(ValueError):
+    """A VEVENT that could not be turned into a CalendarEvent."""
+
+
+def unfold_lines(lines: Iterable[str]) -> Iterator[str]:
+    """Join folded content lines (continuations start with a space or a tab)."""
+    current: Optional[str] = None
+    for raw in lines:
+        line = raw.rstrip("\r\n")
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current:
+            yield current
+        current = line
+    if current:
+        yield current
+
+
+def parse_content_line(line: str) -> tuple[str, dict[str, str], str]:
+    """`NAME;PARAM=value:VALUE` -> (NAME, {PARAM: value}, VALUE). Colons inside quoted params are kept."""
+    split_at = line.find(":")
+    quote = line.find('"')
+    if -1 < quote < split_at:  # quoted parameter value, which may contain ':'
+        quoted, split_at = False, -1
+        for i in range(quote, len(line)):
+            if line[i] == '"':
+                quoted = not quoted
+            elif line[i] == ":" and not quoted:
+                split_at = i
+                break
+    if split_at < 0:
+        raise IcsParseError(f"Malformed content line: {line[:80]!r}")
+    name, *params = line[:split_at].split(";")
+    parameters = {}
+    for param in params:
+        key, _, value = param.partition("=")
+        parameters[key.upper()] = value.strip('"')
+    return name.upper(), parameters, line[split_at + 1:]
+
+
+def _unescape(value: str) -> str:
+    return _UNESCAPE.sub(lambda m: "\n" if m.group(1) in "nN" else m.group(1), value)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _address(value: str) -> str:
+    return value[7:] if value.lower().startswith("mailto:") else value
+
+
+def parse_datetime(value: str, parameters: dict[str, str]) -> Union[datetime, date]:
+    """DATE / DATE-TIME value: UTC (`Z`), with a TZID, or floating (naive)."""
+    if parameters.get("VALUE") == "DATE" or len(value) == 8:
+        return datetime.strptime(value, "%Y%m%d").date()
+    if value.endswith("Z"):
+        return datetime.strptime(value[:-1], "%Y%m%dT%H%M%S").replace(tzinfo=timezone.utc)
+    parsed = datetime.strptime(value, "%Y%m%dT%H%M%S")
+    tzid = parameters.get("TZID")
+    if tzid:
+        try:
+            return parsed.replace(tzinfo=ZoneInfo(tzid))
+        except (ZoneInfoNotFoundError, ValueError):
+            pass  # non-IANA zone names (e.g. Outlook's) stay floating
+    return parsed
+
+
+def parse_duration(value: str) -> timedelta:
+    match = _DURATION.match(value)
+    if match is None:
+        raise IcsParseError(f"Malformed DURATION: {value!r}")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = timedelta(
+        weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+        minutes=int(minutes or 0), seconds=int(seconds or 0),
+    )
+    return -delta if sign == "-" else delta
+
+
+def _as_datetime(value: Union[datetime, date]) -> datetime:
+    return value if isinstance(value, datetime) else datetime(value.year, value.month, value.day)
+
+
+def _epoch(value: datetime) -> float:
+    """Epoch seconds, floating times taken as UTC like `to_timestamp` does."""
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def parse_rrule(value: str, exdates: list[str]) -> Optional[RecurrenceRule]:
+    """RRULE (+ EXDATE starts) to a RecurrenceRule, None when the rule is outside the supported subset."""
+    parts = dict(part.partition("=")[::2] for part in value.upper().split(";") if part)
+    frequency = parts.pop("FREQ", "").lower()
+    if frequency not in ("daily", "weekly", "monthly") or set(parts) - {"INTERVAL", "COUNT", "UNTIL", "BYDAY", "WKST"}:
+        return None
+    weekdays = parts["BYDAY"].split(",") if "BYDAY" in parts else None
+    if weekdays and (frequency != "weekly" or not set(weekdays) <= set(WEEKDAYS)):
+        return None
+    until = None
+    if "UNTIL" in parts:
+        # a DATE until includes that whole day (RFC 5545): kept date-only, which RecurrenceRule reads the same way
+        until = parse_datetime(parts["UNTIL"], {}).isoformat()
+    return RecurrenceRule(
+        frequency=frequency,
+        interval=int(parts.get("INTERVAL", 1)),
+        count=int(parts["COUNT"]) if "COUNT" in parts else None,
+        until=until,
+        weekdays=weekdays,
+        exceptions=exdates or None,
+    )
+
+
+def _to_event(
+    properties: dict[str, tuple[dict[str, str], str]],
+    attendees: list[str],
+    exdates: list[str],
+    domain_type: str,
+) -> CalendarEvent:
+    if "DTSTART" not in properties:
+        raise IcsParseError("VEVENT without DTSTART")
+    start = parse_datetime(properties["DTSTART"][1], properties["DTSTART"][0])
+    if "DTEND" in properties:
+        end = parse_datetime(properties["DTEND"][1], properties["DTEND"][0])
+    elif "DURATION" in properties:
+        end = start + parse_duration(properties["DURATION"][1])
+    else:
+        # RFC 5545 3.6.1: all-day events last one day, timed ones end when they start
+        end = start + timedelta(days=1) if not isinstance(start, datetime) else start
+    start, end = _as_datetime(start), _as_datetime(end)
+    if _epoch(end) < _epoch(start):
+        raise IcsParseError(f"VEVENT ends before it starts: {properties.get('SUMMARY', ({}, ''))[1]!r}")
+    text = lambda name: _unescape(properties[name][1]) if name in properties else ""
+    return CalendarEvent(
+        domain_type=domain_type,
+        title=text("SUMMARY") or "(no title)",
+        start_time=start.isoformat(),
+        end_time=end.isoformat(),
+        location=text("LOCATION"),
+        description=text("DESCRIPTION"),
+        attendees=attendees or None,
+        organizer=_address(properties["ORGANIZER"][1]) if "ORGANIZER" in properties else "",
+        recurrence=parse_rrule(properties["RRULE"][1], exdates) if "RRULE" in properties else None,
+    )
+
+
+def iter_ics_events(lines: Iterable[str], domain_type: str = "ics") -> Iterator[Union[CalendarEvent, IcsParseError]]:
+    """
+    Parse VEVENTs from the lines of an .ics file, one at a time.
+    VEVENTs that cannot be parsed are yielded as IcsParseError so they can be
+    skipped and reported instead of failing the whole import. Nested components
+    (VALARM) and everything outside VEVENTs (VTIMEZONE, ...) are ignored.
+    """
+    properties: Optional[dict[str, tuple[dict[str, str], str]]] = None
+    attendees: list[str] = []
+    exdates: list[str] = []
+    depth = 0  # components nested inside the current VEVENT
+    for line in unfold_lines(lines):
+        try:
+            name, parameters, value = parse_content_line(line)
+        except IcsParseError as e:
+            if properties is not None and depth == 0:
+                yield e
+                properties = None
+            continue
+        if name == "BEGIN":
+            if value.upper() == "VEVENT" and properties is None:
+                properties, attendees, exdates, depth = {}, [], [], 0
+            elif properties is not None:
+                depth += 1
+        elif name == "END" and properties is not None:
+            if depth:
+                depth -= 1
+            elif value.upper() == "VEVENT":
+                try:
+                    event: Union[CalendarEvent, IcsParseError] = _to_event(properties, attendees, exdates, domain_type)
+                except ValueError as e:  # IcsParseError, bad dates & pydantic validation errors
+                    event = e if isinstance(e, IcsParseError) else IcsParseError(str(e))
+                properties = None
+                yield event
+        elif properties is not None and not depth:
+            if name == "ATTENDEE":
+                attendees.append(_address(value))
+            elif name == "EXDATE":
+                try:
+                    # a DATE exception stays date-only: it skips that day's occurrence, whatever its time
+                    exdates.extend(parse_datetime(v, parameters).isoformat() for v in value.split(","))
+                except ValueError:
+                    pass  # a broken exception date only loses that exception
+            else:
+                properties.setdefault(name, (parameters, value))
+
+
+def import_ics(store: EventStore, lines: Iterable[str], domain_type: str = "ics", batch_size: int = 5000) -> dict[str, int]:
+    """
+    Stream VEVENTs into the store, `batch_size` events per write transaction.
+    Conflicts are not checked (this is a migration of existing calendars).
+    Returns:
+        Counts of imported and skipped (unparseable) events.
+    """
+    counts = {"imported": 0, "skipped": 0}
+
+    def parsed() -> Iterator[CalendarEvent]:
+        for item in iter_ics_events(lines, domain_type):
+            if isinstance(item, IcsParseError):
+                counts["skipped"] += 1
+            else:
+                yield item
+
+    for batch in batched(parsed(), batch_size):
+        counts["imported"] += len(store.add_events(batch))
+    return counts
+
+
+def _fold(line: str) -> str:
+    """Fold a content line at 75 octets (never inside a UTF-8 sequence), CRLF terminated."""
+    encoded = line.encode()
+    if len(encoded) <= FOLD_OCTETS:
+        return line + "\r\n"
+    parts, start, limit = [], 0, FOLD_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, FOLD_OCTETS - 1  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc(value: str) -> str:
+    return datetime.fromtimestamp(to_timestamp(value), timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _date(value: str) -> str:
+    return datetime.fromisoformat(value).strftime("%Y%m%d")
+
+
+def _is_all_day(event: StoredCalendarEvent) -> bool:
+    """Floating midnight to midnight: how an imported `VALUE=DATE` event is stored."""
+    start, end = datetime.fromisoformat(event.start_time), datetime.fromisoformat(event.end_time)
+    return start.tzinfo is None and end.tzinfo is None and start.time() == end.time() == dt_time(0) and end > start
+
+
+def _address_value(value: str) -> str:
+    return f"mailto:{value}" if "@" in value else value
+
+
+def event_to_vevent(event: StoredCalendarEvent, stamp: str) -> Iterator[str]:
+    yield "BEGIN:VEVENT"
+    yield f"UID:{event.id}@calendar-even-planner"
+    yield f"DTSTAMP:{stamp}"
+    all_day = _is_all_day(event)
+    if all_day:
+        yield f"DTSTART;VALUE=DATE:{_date(event.start_time)}"
+        yield f"DTEND;VALUE=DATE:{_date(event.end_time)}"
+    else:
+        yield f"DTSTART:{_utc(event.start_time)}"
+        yield f"DTEND:{_utc(event.end_time)}"
+    yield f"SUMMARY:{_escape(event.title)}"
+    if event.location:
+        yield f"LOCATION:{_escape(event.location)}"
+    if event.description:
+        yield f"DESCRIPTION:{_escape(event.description)}"
+    if event.organizer:
+        yield f"ORGANIZER:{_address_value(event.organizer)}"
+    for attendee in event.attendees or ():
+        yield f"ATTENDEE:{_address_value(attendee)}"
+    rule = event.recurrence
+    if rule is not None:
+        parts = [f"FREQ={rule.frequency.upper()}", f"INTERVAL={rule.interval}"]
+        if rule.count is not None:
+            parts.append(f"COUNT={rule.count}")
+        if rule.until is not None:
+            # UNTIL takes the value type of DTSTART (RFC 5545)
+            until = parse_until(rule.until, parse_time(event.start_time)).isoformat()
+            parts.append(f"UNTIL={_date(until) if all_day else _utc(until)}")
+        if rule.weekdays:
+            parts.append(f"BYDAY={','.join(rule.weekdays)}")
+        yield f"RRULE:{';'.join(parts)}"
+        days = [e for e in rule.exceptions or () if all_day or is_date_only(e)]
+        times = [e for e in rule.exceptions or () if not (all_day or is_date_only(e))]
+        if days:
+            yield f"EXDATE;VALUE=DATE:{','.join(_date(e) for e in days)}"
+        if times:
+            yield f"EXDATE:{','.join(_utc(e) for e in times)}"
+    yield "END:VEVENT"
+
+
+def iter_ics_lines(events: Iterable[StoredCalendarEvent]) -> Iterator[str]:
+    """A VCALENDAR for `events`, as folded CRLF-terminated lines, produced as the events are consumed."""
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    yield _fold("BEGIN:VCALENDAR")
+    yield _fold("VERSION:2.0")
+    yield _fold(f"PRODID:{PRODID}")
+    for event in events:
+        for line in event_to_vevent(event, stamp):
+            yield _fold(line)
+    yield _fold("END:VCALENDAR")
+
+
+def export_ics(
+    store: EventStore,
+    out: TextIO,
+    participant: Optional[str] = None,
+    start_time: Optional[str] = None,
+    end_time: Optional[str] = None,
+) -> int:
+    """Write a participant's (or every) event to `out`, streamed from the store. Returns the number of events."""
+    exported = 0
+
+    def counted(events: Iterable[StoredCalendarEvent]) -> Iterator[StoredCalendarEvent]:
+        nonlocal exported
+        for event in events:
+            exported += 1
+            yield event
+
+    # recurring events go out once, with their RRULE
+    events = store.iter_events(participant, start_time, end_time, expand_recurring=False)
+    out.writelines(iter_ics_lines(counted(events)))
+    return exported
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", default=None, help="event store path (default: EVENT_STORE_PATH)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    importer = commands.add_parser("import", help="import the VEVENTs of an .ics file")
+    importer.add_argument("path")
+    importer.add_argument("--domain-type", default="ics")
+    importer.add_argument("--batch", type=int, default=5000)
+    exporter = commands.add_parser("export", help="export events to an .ics file ('-' for stdout)")
+    exporter.add_argument("path")
+    exporter.add_argument("--participant")
+    exporter.add_argument("--start", help="only events ending after this time (ISO 8601)")
+    exporter.add_argument("--end", help="only events starting before this time (ISO 8601)")
+    args = parser.parse_args()
+
+    store = EventStore(args.store) if args.store else EventStore()
+    try:
+        if args.command == "import":
+            with open(args.path, encoding="utf-8", errors="replace", newline="") as f:
+                counts = import_ics(store, f, domain_type=args.domain_type, batch_size=args.batch)
+            print(f"imported {counts['imported']:,} events, skipped {counts['skipped']:,}", file=sys.stderr)
+        else:
+            out = sys.stdout if args.path == "-" else open(args.path, "w", encoding="utf-8", newline="")
+            try:
+                exported = export_ics(store, out, args.participant, args.start, args.end)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            print(f"exported {exported:,} events", file=sys.stderr)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
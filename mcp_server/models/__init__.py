@@ -1,5 +1,13 @@
 
 from .data_types import (
+  BulkEventCreationResult,
   CalendarEvent,
+  CalendarEventList,
+  EventConflict,
+  EventCreationResult,
+  FreeSlot,
+  FreeSlotList,
+  RecurrenceRule,
+  StoredCalendarEvent,
 )
 
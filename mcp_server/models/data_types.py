@@ -1,5 +1,18 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import List, Literal, Optional
+
+Weekday = Literal["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+
+class RecurrenceRule(BaseModel):
+    """Subset of the iCalendar RRULE: daily/weekly/monthly with interval, count, until & exceptions."""
+    frequency: Literal["daily", "weekly", "monthly"] = Field(..., description="How often the event repeats")
+    interval: int = Field(1, ge=1, description="Repeat every `interval` days/weeks/months")
+    count: Optional[int] = Field(None, ge=1, description="Total number of occurrences (skipped ones included)")
+    until: Optional[str] = Field(None, description="No occurrence starts after this time (ISO format); a date alone includes that whole day")
+    weekdays: Optional[List[Weekday]] = Field(None, description="Weekly rules only: days of the week, default the start's weekday")
+    exceptions: Optional[List[str]] = Field(None, description="Start times (ISO format) of occurrences that are skipped; a date alone skips that day's occurrence")
+
 
 class CalendarEvent(BaseModel):
     domain_type: str = Field(..., description="Type of the domain for the event")
@@ -10,3 +23,43 @@ class CalendarEvent(BaseModel):
     description: Optional[str] = Field("", description="Description of the event")
     attendees: Optional[List[str]] = Field(None, description="List of attendees for the event")
     organizer: Optional[str] = Field("", description="Organizer of the event")
+    recurrence: Optional[RecurrenceRule] = Field(
+        None, description="Repeat rule; start_time/end_time are then the first occurrence"
+    )
+
+
+class StoredCalendarEvent(CalendarEvent):
+    id: int = Field(..., description="Identifier of the stored event")
+
+
+class CalendarEventList(BaseModel):
+    events: List[StoredCalendarEvent] = Field(default_factory=list, description="Events ordered by start time")
+
+
+class EventConflict(BaseModel):
+    participant: str = Field(..., description="Attendee or organizer who is already busy")
+    event_id: int = Field(..., description="Id of the overlapping event")
+    title: str = Field(..., description="Title of the overlapping event")
+    start_time: str = Field(..., description="Start time of the overlapping event in ISO format")
+    end_time: str = Field(..., description="End time of the overlapping event in ISO format")
+
+
+class EventCreationResult(BaseModel):
+    created: bool = Field(..., description="Whether the event was stored")
+    event: Optional[StoredCalendarEvent] = Field(None, description="The stored event, when created")
+    conflicts: List[EventConflict] = Field(default_factory=list, description="Overlapping events of the participants")
+    replayed: bool = Field(False, description="The idempotency key was used before; `event` is the one stored then")
+    error: Optional[str] = Field(None, description="Why the event was rejected, when not because of conflicts")
+
+
+class BulkEventCreationResult(BaseModel):
+    results: List[EventCreationResult] = Field(default_factory=list, description="One result per event, in input order")
+
+
+class FreeSlot(BaseModel):
+    start_time: str = Field(..., description="Start time of the free slot in ISO format")
+    end_time: str = Field(..., description="End time of the free slot in ISO format")
+
+
+class FreeSlotList(BaseModel):
+    slots: List[FreeSlot] = Field(default_factory=list, description="Earliest common free slots, in order")
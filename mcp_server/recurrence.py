@@ -0,0 +1,230 @@
+import os
+from collections import OrderedDict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Hashable, Iterator, Optional
+
+try:
+    from .models import RecurrenceRule
+except ImportError:  # run as a script (`python mcp_server/server.py`)
+    from models import RecurrenceRule
+
+WEEKDAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+# series without COUNT or UNTIL never end
+FOREVER = 2 ** 62
+DAY = 86400
+
+# windows of expanded occurrences kept per store, see OccurrenceCache
+EVENT_STORE_OCCURRENCE_CACHE_SIZE = int(os.getenv("EVENT_STORE_OCCURRENCE_CACHE_SIZE", "4096"))
+# how far ahead a new open-ended recurring event is checked for conflicts
+RECURRENCE_CONFLICT_DAYS = int(os.getenv("EVENT_STORE_RECURRENCE_CONFLICT_DAYS", "365"))
+
+
+def parse_time(value: str) -> datetime:
+    """ISO 8601 string to an aware datetime. Naive times are taken as UTC (like `store.to_timestamp`)."""
+    parsed = datetime.fromisoformat(value)
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def is_date_only(value: str) -> bool:
+    """An ISO date without a time ("2026-11-02")."""
+    return "T" not in value and " " not in value.strip()
+
+
+def parse_until(value: str, first: datetime) -> datetime:
+    """UNTIL of a series as a datetime. A date alone ("2026-11-02") includes that whole day, in the offset of `first`."""
+    if is_date_only(value):
+        return datetime.combine(date.fromisoformat(value), time(23, 59, 59), first.tzinfo)
+    return parse_time(value)
+
+
+def format_occurrence(ts: int, like: str) -> str:
+    """ISO string of an occurrence, in the offset of the series' first occurrence `like` (naive when that is)."""
+    first = datetime.fromisoformat(like)
+    if first.tzinfo is None:
+        return datetime.fromtimestamp(ts, timezone.utc).replace(tzinfo=None).isoformat()
+    return datetime.fromtimestamp(ts, first.tzinfo).isoformat()
+
+
+def _add_months(value: datetime, months: int) -> Optional[datetime]:
+    """Same day & time `months` later, None when that month has no such day (RFC 5545 skips those)."""
+    month0 = value.month - 1 + months
+    try:
+        return value.replace(year=value.year + month0 // 12, month=month0 % 12 + 1)
+    except ValueError:
+        return None
+
+
+def iter_starts(rule: RecurrenceRule, first: datetime, after: Optional[datetime] = None) -> Iterator[datetime]:
+    """
+    Occurrence starts of a series in order, exceptions included, bounded by
+    COUNT and UNTIL. Without a COUNT, the walk starts at the period holding
+    `after` instead of the first occurrence, so far-away windows are reached in
+    constant time; with a COUNT every earlier occurrence has to be counted.
+    Date arithmetic runs in the first occurrence's fixed UTC offset, the only zone
+    stored (ICS TZID times are converted to one on import): a daily 09:00+02:00 event
+    stays at 07:00 UTC, so after a DST change it is an hour off the participants'
+    local 09:00. Floating (naive) series keep their wall-clock time.
+    """
+    until = parse_until(rule.until, first) if rule.until else None
+    remaining = rule.count
+    skip = after if remaining is None and after is not None and after > first else None
+
+    if rule.frequency == "monthly":
+        months = 0
+        if skip is not None:
+            months = max(0, ((skip.year - first.year) * 12 + skip.month - first.month) // rule.interval - 1) * rule.interval
+        while True:
+            start = _add_months(first, months)
+            months += rule.interval
+            if start is None:
+                continue
+            if until is not None and start > until:
+                return
+            yield start
+            if remaining is not None:
+                remaining -= 1
+                if not remaining:
+                    return
+
+    if rule.frequency == "daily":
+        step, offsets = timedelta(days=rule.interval), (timedelta(0),)
+        period_start = first
+    else:  # weekly: every listed weekday of every `interval`-th week, counted from the week of the first occurrence
+        step = timedelta(weeks=rule.interval)
+        days = sorted({WEEKDAYS.index(day) for day in rule.weekdays} if rule.weekdays else {first.weekday()})
+        period_start = first - timedelta(days=first.weekday())
+        offsets = tuple(timedelta(days=day) for day in days)
+    if skip is not None:
+        periods = max(0, (skip - period_start) // step - 1)
+        period_start += periods * step
+    while True:
+        for offset in offsets:
+            start = period_start + offset
+            if start < first:
+                continue
+            if until is not None and start > until:
+                return
+            yield start
+            if remaining is not None:
+                remaining -= 1
+                if not remaining:
+                    return
+        period_start += step
+
+
+def iter_occurrences(
+    rule: RecurrenceRule,
+    first_start: str,
+    first_end: str,
+    window_start: int,
+    window_end: int,
+) -> Iterator[tuple[int, int]]:
+    """(start_ts, end_ts) of the occurrences overlapping [window_start, window_end), generated lazily."""
+    first = parse_time(first_start)
+    duration = parse_time(first_end) - first
+    # an exception without a time (an ICS `EXDATE;VALUE=DATE`) skips the occurrence on that day, in the series' offset
+    exceptions = {int(parse_time(e).timestamp()) for e in rule.exceptions or () if not is_date_only(e)}
+    exception_days = {date.fromisoformat(e) for e in rule.exceptions or () if is_date_only(e)}
+    after = datetime.fromtimestamp(window_start, first.tzinfo) - duration if window_start > first.timestamp() else None
+    for start in iter_starts(rule, first, after):
+        start_ts = int(start.timestamp())
+        if start_ts >= window_end:
+            return
+        end_ts = int((start + duration).timestamp())
+        if end_ts > window_start and start_ts not in exceptions and start.date() not in exception_days:
+            yield start_ts, end_ts
+
+
+def series_end(rule: RecurrenceRule, first_start: str, first_end: str) -> int:
+    """End (epoch seconds) of the last occurrence, FOREVER for open-ended series."""
+    if rule.count is None and rule.until is None:
+        return FOREVER
+    first = parse_time(first_start)
+    duration = parse_time(first_end) - first
+    last = first
+    if rule.count is None:
+        # without COUNT the last start is near UNTIL: walk from there instead of from the first occurrence
+        for start in iter_starts(rule, first, parse_until(rule.until, first) - timedelta(days=62)):
+            last = start
+    else:
+        for start in iter_starts(rule, first):
+            last = start
+    return int((last + duration).timestamp())
+
+
+class OccurrenceCache:
+    """
+    LRU of expanded occurrences per (series, day-aligned window). Queries are
+    widened to whole UTC days before expanding, so repeated lookups of hot
+    ranges ("this week", the conflict check of a busy day) hit the same entries.
+    Entries are keyed on the caller's `series_key`, which has to change with
+    the series (the store uses id, rule & first occurrence), so they never go stale.
+    """
+    def __init__(self, max_entries: int = EVENT_STORE_OCCURRENCE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[tuple[Hashable, int, int], tuple[tuple[int, int], ...]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def occurrences(
+        self,
+        series_key: Hashable,
+        rule: RecurrenceRule,
+        first_start: str,
+        first_end: str,
+        window_start: int,
+        window_end: int,
+    ) -> Iterator[tuple[int, int]]:
+        """Like `iter_occurrences`, served from the cache for windows of up to a year."""
+        day_start, day_end = window_start // DAY * DAY, -(-window_end // DAY) * DAY
+        if day_end - day_start > 366 * DAY:
+            # long windows (exports, year views) are generated lazily & not cached
+            yield from iter_occurrences(rule, first_start, first_end, window_start, window_end)
+            return
+        key = (series_key, day_start, day_end)
+        cached = self._entries.get(key)
+        if cached is None:
+            self.misses += 1
+            cached = tuple(iter_occurrences(rule, first_start, first_end, day_start, day_end))
+            self._entries[key] = cached
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        for start, end in cached:
+            if start >= window_end:
+                return
+            if end > window_start:
+                yield start, end
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+class Series:
+    """A stored recurring event, as kept in memory for conflict checks & range queries."""
+    __slots__ = ("event_id", "rule", "first_start", "first_end", "start_ts", "end_ts", "key")
+
+    def __init__(self, event_id: int, rule_json: str, first_start: str, first_end: str, end_ts: int):
+        self.event_id = event_id
+        self.rule = RecurrenceRule.model_validate_json(rule_json)
+        self.first_start = first_start
+        self.first_end = first_end
+        self.start_ts = int(parse_time(first_start).timestamp())
+        self.end_ts = end_ts
+        # changes whenever the series does, even if a deleted series' id is reused
+        self.key = (event_id, rule_json, first_start, first_end)
+
+    @classmethod
+    def from_row(cls, row) -> "Series":
+        """From an `events` row of a recurring event."""
+        return cls(row["id"], row["recurrence"], row["start_time"], row["end_time"], row["series_end_ts"])
+
+    def occurrences(self, cache: OccurrenceCache, window_start: int, window_end: int) -> Iterator[tuple[int, int]]:
+        if window_end <= self.start_ts or window_start >= self.end_ts:
+            return iter(())
+        return cache.occurrences(self.key, self.rule, self.first_start, self.first_end, window_start, window_end)
+
+    def overlaps(self, cache: OccurrenceCache, window_start: int, window_end: int) -> bool:
+        return next(self.occurrences(cache, window_start, window_end), None) is not None
@@ -0,0 +1,140 @@
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List
+
+import numpy as np
+
+try:
+    from .conflicts import ConflictIndex
+    from .models import FreeSlot
+except ImportError:  # run as a script (`python mcp_server/server.py`)
+    from conflicts import ConflictIndex
+    from models import FreeSlot
+
+# every slot of the window costs a few mask entries, so the window & its slot count are bounded per query
+FREE_SLOTS_MAX_WINDOW_DAYS = int(os.getenv("EVENT_STORE_FREE_SLOTS_MAX_WINDOW_DAYS", "366"))
+FREE_SLOTS_MAX_SLOTS = int(os.getenv("EVENT_STORE_FREE_SLOTS_MAX_SLOTS", "100000"))
+
+
+def busy_mask(
+    index: ConflictIndex,
+    participants: Iterable[str],
+    window_start: int,
+    n_slots: int,
+    granularity: int,
+) -> np.ndarray:
+    """
+    Boolean mask over the slots of the window, True where any participant is busy.
+    Every busy interval adds +1 at its first slot and -1 after its last one; the
+    running sum is positive exactly on the covered slots.
+    """
+    window_end = window_start + n_slots * granularity
+    starts, ends = [], []
+    for participant in participants:
+        intervals = index.participants.get(participant)
+        if intervals is not None:
+            lo, hi = intervals.candidates(window_start, window_end)
+            starts.append(np.frombuffer(intervals.starts, dtype=np.int64)[lo:hi])
+            ends.append(np.frombuffer(intervals.ends, dtype=np.int64)[lo:hi])
+        # recurring events: only the occurrences inside the window are expanded
+        for series in index.series.get(participant, {}).values():
+            occurrences = list(series.occurrences(index.store.occurrences, window_start, window_end))
+            if occurrences:
+                occurrence_array = np.array(occurrences, dtype=np.int64)
+                starts.append(occurrence_array[:, 0])
+                ends.append(occurrence_array[:, 1])
+    if not starts:
+        return np.zeros(n_slots, dtype=bool)
+    all_starts, all_ends = np.concatenate(starts), np.concatenate(ends)
+    first = np.clip((all_starts - window_start) // granularity, 0, n_slots)
+    last = np.clip(-((window_start - all_ends) // granularity), 0, n_slots)  # ceil division
+    keep = last > first
+    diff = np.bincount(first[keep], minlength=n_slots + 1) - np.bincount(last[keep], minlength=n_slots + 1)
+    return np.cumsum(diff[:n_slots]) > 0
+
+
+def working_mask(
+    window_start: int,
+    n_slots: int,
+    granularity: int,
+    day_start_minute: int,
+    day_end_minute: int,
+    utc_offset_minutes: int,
+    weekdays_only: bool,
+) -> np.ndarray:
+    """Boolean mask over the slots of the window, True for slots fully inside working hours."""
+    local = window_start + utc_offset_minutes * 60 + np.arange(n_slots, dtype=np.int64) * granularity
+    minute_of_day = (local % 86400) // 60
+    mask = (minute_of_day >= day_start_minute) & (minute_of_day + granularity // 60 <= day_end_minute)
+    if weekdays_only:
+        # 1970-01-01 was a thursday
+        mask &= ((local // 86400 + 3) % 7) < 5
+    return mask
+
+
+def find_free_slots(
+    index: ConflictIndex,
+    participants: List[str],
+    duration_minutes: int,
+    window_start: int,
+    window_end: int,
+    day_start_minute: int = 9 * 60,
+    day_end_minute: int = 17 * 60,
+    utc_offset_minutes: int = 0,
+    weekdays_only: bool = True,
+    count: int = 5,
+    granularity_minutes: int = 15,
+) -> List[tuple[int, int]]:
+    """
+    Earliest `count` non-overlapping (start, end) epoch-second ranges of `duration_minutes`
+    where every participant is free and which lie inside working hours.
+    Raises:
+        ValueError: for a window longer than FREE_SLOTS_MAX_WINDOW_DAYS or with more than FREE_SLOTS_MAX_SLOTS slots.
+    """
+    if window_end - window_start > FREE_SLOTS_MAX_WINDOW_DAYS * 86400:
+        raise ValueError(f"Search window is longer than {FREE_SLOTS_MAX_WINDOW_DAYS} days")
+    granularity = granularity_minutes * 60
+    window_start = -(-window_start // granularity) * granularity  # align up to the slot grid
+    n_slots = max(0, (window_end - window_start) // granularity)
+    if n_slots > FREE_SLOTS_MAX_SLOTS:
+        raise ValueError(
+            f"Search window has {n_slots} slots of {granularity_minutes} minutes, more than {FREE_SLOTS_MAX_SLOTS}: "
+            "use a shorter window or a larger granularity_minutes"
+        )
+    needed = -(-duration_minutes // granularity_minutes)
+    if n_slots < needed or needed <= 0:
+        return []
+
+    free = ~busy_mask(index, participants, window_start, n_slots, granularity)
+    free &= working_mask(
+        window_start, n_slots, granularity, day_start_minute, day_end_minute, utc_offset_minutes, weekdays_only
+    )
+    # a start slot qualifies when the next `needed` slots are all free
+    runs = np.concatenate(([0], np.cumsum(free, dtype=np.int64)))
+    candidates = np.flatnonzero(runs[needed:] - runs[:-needed] == needed)
+
+    slots: List[tuple[int, int]] = []
+    next_allowed = -1
+    for slot in candidates:
+        if slot < next_allowed:
+            continue
+        start = window_start + int(slot) * granularity
+        slots.append((start, start + duration_minutes * 60))
+        if len(slots) == count:
+            break
+        next_allowed = slot + needed
+    return slots
+
+
+def to_free_slot(start: int, end: int, utc_offset_minutes: int = 0) -> FreeSlot:
+    tz = timezone(timedelta(minutes=utc_offset_minutes))
+    return FreeSlot(
+        start_time=datetime.fromtimestamp(start, tz).isoformat(),
+        end_time=datetime.fromtimestamp(end, tz).isoformat(),
+    )
+
+
+def parse_clock(value: str) -> int:
+    """"HH:MM" to minutes after midnight."""
+    hours, _, minutes = value.partition(":")
+    return int(hours) * 60 + int(minutes or 0)
@@ -0,0 +1,417 @@
+import heapq
+import itertools
+import json
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, List, Optional
+
+try:
+    from .models import CalendarEvent, RecurrenceRule, StoredCalendarEvent
+    from .recurrence import OccurrenceCache, Series, format_occurrence, series_end
+except ImportError:  # run as a script (`python mcp_server/server.py`)
+    from models import CalendarEvent, RecurrenceRule, StoredCalendarEvent
+    from recurrence import OccurrenceCache, Series, format_occurrence, series_end
+
+EVENT_STORE_PATH = os.getenv("EVENT_STORE_PATH", "calendar_events.db")
+# how long an idempotency key of `create_calendar_event` keeps mapping to the event it created
+EVENT_STORE_IDEMPOTENCY_TTL_SECONDS = float(os.getenv("EVENT_STORE_IDEMPOTENCY_TTL_SECONDS", "86400"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    domain_type TEXT NOT NULL,
+    title TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    location TEXT,
+    description TEXT,
+    organizer TEXT,
+    attendees TEXT,
+    -- recurring events: the RecurrenceRule as JSON & the end of the last occurrence (start/end_ts are the first one)
+    recurrence TEXT,
+    series_end_ts INTEGER
+);
+CREATE INDEX IF NOT EXISTS events_start ON events (start_ts);
+
+-- one row per (participant, event): attendees & the organizer.
+-- (participant, start_ts) is the clustered key, so a calendar lookup is one B-tree seek + a range scan.
+CREATE TABLE IF NOT EXISTS event_participants (
+    participant TEXT NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    event_id INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    PRIMARY KEY (participant, start_ts, event_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS event_participants_event ON event_participants (event_id);
+
+-- participants of recurring events, which have no fixed interval to index; their occurrences are expanded per query
+CREATE TABLE IF NOT EXISTS series_participants (
+    participant TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    role TEXT NOT NULL,
+    PRIMARY KEY (participant, event_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS series_participants_event ON series_participants (event_id);
+
+-- append-only change feed; in-memory indexes (one per server process) replay it to stay current
+CREATE TABLE IF NOT EXISTS event_log (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    event_id INTEGER NOT NULL,
+    start_ts INTEGER NOT NULL,
+    end_ts INTEGER NOT NULL,
+    participants TEXT NOT NULL
+);
+
+-- idempotency key of a create call -> the event it stored
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    event_id INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idempotency_keys_created ON idempotency_keys (created_at);
+CREATE INDEX IF NOT EXISTS idempotency_keys_event ON idempotency_keys (event_id);
+
+CREATE TABLE IF NOT EXISTS store_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def to_timestamp(value: str) -> int:
+    """ISO 8601 string to epoch seconds. Naive times are taken as UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def normalize_participant(value: str) -> str:
+    return value.strip().casefold()
+
+
+def event_participants(event: CalendarEvent) -> List[tuple[str, str]]:
+    """(participant, role) pairs for an event, organizer first, without duplicates."""
+    seen: dict[str, str] = {}
+    if event.organizer:
+        seen[normalize_participant(event.organizer)] = "organizer"
+    for attendee in event.attendees or []:
+        seen.setdefault(normalize_participant(attendee), "attendee")
+    return list(seen.items())
+
+
+class EventStore:
+    """
+    SQLite (WAL mode) store for calendar events.
+    Range queries ("what is on alice's calendar next week") seek the
+    (participant, start_ts) index instead of scanning: an event overlapping
+    [start, end) must start in [start - longest event duration, end), and the
+    longest duration is kept in `store_meta`.
+    """
+    def __init__(self, path: str = EVENT_STORE_PATH):
+        self.path = path
+        # autocommit mode, writes use explicit BEGIN IMMEDIATE so several server processes can share the file
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self.occurrences = OccurrenceCache()
+
+    def _migrate(self) -> None:
+        """Add the columns newer versions need to databases created by older ones."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(events)")}
+        for column in ("recurrence TEXT", "series_end_ts INTEGER"):
+            if column.split()[0] not in columns:
+                self._conn.execute(f"ALTER TABLE events ADD COLUMN {column}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS events_series ON events (series_end_ts) WHERE recurrence IS NOT NULL"
+        )
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; holds the database write lock until the block exits."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._conn
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    @contextmanager
+    def snapshot(self) -> Iterator[sqlite3.Connection]:
+        """Read transaction; every query in the block sees the same state of the database."""
+        self._conn.execute("BEGIN")
+        try:
+            yield self._conn
+        finally:
+            self._conn.execute("COMMIT")
+
+    def _max_duration(self) -> int:
+        row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'max_duration'").fetchone()
+        return row[0] if row else 0
+
+    def insert_events(self, conn: sqlite3.Connection, events: Iterable[CalendarEvent]) -> List[int]:
+        """Insert events inside an open `transaction()`. Returns their ids in input order."""
+        # ids come from a sequence in store_meta, never from MAX(id): an id freed by a delete is not handed out again
+        # (the MAX(id) term covers databases created before the sequence existed)
+        (next_id,) = conn.execute(
+            "SELECT MAX(COALESCE(MAX(id), 0) + 1, COALESCE((SELECT value FROM store_meta WHERE key = 'next_event_id'), 1)) "
+            "FROM events"
+        ).fetchone()
+        event_rows, participant_rows, log_rows, ids = [], [], [], []
+        max_duration = 0
+        series_rows = []
+        for event in events:
+            start_ts, end_ts = to_timestamp(event.start_time), to_timestamp(event.end_time)
+            if end_ts < start_ts:
+                raise ValueError(f"Event '{event.title}' ends before it starts")
+            participants = event_participants(event)
+            recurrence, last_end_ts = None, None
+            if event.recurrence is None:
+                max_duration = max(max_duration, end_ts - start_ts)
+                participant_rows.extend((participant, start_ts, end_ts, next_id, role) for participant, role in participants)
+                log_rows.append(("add", next_id, start_ts, end_ts, json.dumps([p for p, _ in participants])))
+            else:
+                recurrence = event.recurrence.model_dump_json(exclude_none=True)
+                last_end_ts = series_end(event.recurrence, event.start_time, event.end_time)
+                series_rows.extend((participant, next_id, role) for participant, role in participants)
+                log_rows.append(("add_series", next_id, start_ts, last_end_ts, json.dumps([p for p, _ in participants])))
+            event_rows.append((
+                next_id, event.domain_type, event.title, event.start_time, event.end_time,
+                start_ts, end_ts, event.location, event.description, event.organizer,
+                json.dumps(event.attendees) if event.attendees is not None else None,
+                recurrence, last_end_ts,
+            ))
+            ids.append(next_id)
+            next_id += 1
+        conn.executemany("INSERT INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", event_rows)
+        conn.executemany("INSERT OR IGNORE INTO event_participants VALUES (?, ?, ?, ?, ?)", participant_rows)
+        conn.executemany("INSERT OR IGNORE INTO series_participants VALUES (?, ?, ?)", series_rows)
+        conn.executemany(
+            "INSERT INTO event_log (op, event_id, start_ts, end_ts, participants) VALUES (?, ?, ?, ?, ?)", log_rows
+        )
+        conn.execute(
+            "INSERT INTO store_meta VALUES ('max_duration', ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = MAX(value, excluded.value)",
+            (max_duration,),
+        )
+        conn.execute(
+            "INSERT INTO store_meta VALUES ('next_event_id', ?) ON CONFLICT (key) DO UPDATE SET value = excluded.value",
+            (next_id,),
+        )
+        return ids
+
+    def find_idempotent_event(self, conn: sqlite3.Connection, key: str) -> Optional[StoredCalendarEvent]:
+        """The event stored under an idempotency key (inside an open `transaction()`), if it is recent and still exists."""
+        row = conn.execute(
+            "SELECT e.* FROM idempotency_keys k JOIN events e ON e.id = k.event_id WHERE k.key = ? AND k.created_at >= ?",
+            (key, time.time() - EVENT_STORE_IDEMPOTENCY_TTL_SECONDS),
+        ).fetchone()
+        return self._to_event(row) if row else None
+
+    def remember_idempotency_key(self, conn: sqlite3.Connection, key: str, event_id: int) -> None:
+        """Map an idempotency key to the event it created (inside an open `transaction()`), dropping expired keys."""
+        now = time.time()
+        conn.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (now - EVENT_STORE_IDEMPOTENCY_TTL_SECONDS,))
+        conn.execute("INSERT OR REPLACE INTO idempotency_keys VALUES (?, ?, ?)", (key, event_id, now))
+
+    def add_event(self, event: CalendarEvent) -> StoredCalendarEvent:
+        with self.transaction() as conn:
+            (event_id,) = self.insert_events(conn, [event])
+        return StoredCalendarEvent(id=event_id, **event.model_dump())
+
+    def add_events(self, events: Iterable[CalendarEvent]) -> List[int]:
+        """Insert many events in one transaction. Returns their ids in input order."""
+        with self.transaction() as conn:
+            return self.insert_events(conn, events)
+
+    def get_event(self, event_id: int) -> Optional[StoredCalendarEvent]:
+        row = self._conn.execute("SELECT * FROM events WHERE id = ?", (event_id,)).fetchone()
+        return self._to_event(row) if row else None
+
+    def get_events(self, event_ids: Iterable[int]) -> List[StoredCalendarEvent]:
+        ids = list(event_ids)
+        if not ids:
+            return []
+        placeholders = ", ".join("?" * len(ids))
+        rows = self._conn.execute(f"SELECT * FROM events WHERE id IN ({placeholders}) ORDER BY start_ts", ids)
+        return [self._to_event(row) for row in rows]
+
+    def list_events(
+        self,
+        start_time: str,
+        end_time: str,
+        participant: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[StoredCalendarEvent]:
+        """
+        Events overlapping [start_time, end_time), ordered by start.
+        Args:
+            start_time: Window start (ISO 8601).
+            end_time: Window end (ISO 8601).
+            participant: Only events this attendee/organizer takes part in; all events when omitted.
+            limit: Maximum number of events to return.
+        """
+        return list(self.iter_events(participant, start_time, end_time, limit))
+
+    def iter_events(
+        self,
+        participant: Optional[str] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        limit: Optional[int] = None,
+        expand_recurring: bool = True,
+    ) -> Iterator[StoredCalendarEvent]:
+        """
+        Like `list_events`, but read lazily from the cursor (constant memory for
+        whole calendars) and with an optional window: unbounded on a side that is omitted.
+        Recurring events are expanded into their occurrences in the window (each
+        one carrying the series id & rule), or returned once as the stored series
+        when `expand_recurring` is off; open-ended windows need it off.
+        """
+        start_ts = to_timestamp(start_time) if start_time else -(2 ** 62)
+        end_ts = to_timestamp(end_time) if end_time else 2 ** 62
+        lower = start_ts - self._max_duration() if start_time else start_ts
+        limit_sql = " LIMIT ?" if limit else ""
+        if participant is None:
+            sql = (
+                "SELECT * FROM events WHERE start_ts >= ? AND start_ts < ? AND end_ts > ? AND recurrence IS NULL "
+                "ORDER BY start_ts, id" + limit_sql
+            )
+            params: tuple = (lower, end_ts, start_ts)
+        else:
+            sql = (
+                "SELECT e.* FROM event_participants p JOIN events e ON e.id = p.event_id "
+                "WHERE p.participant = ? AND p.start_ts >= ? AND p.start_ts < ? AND p.end_ts > ? "
+                "ORDER BY p.start_ts, p.event_id" + limit_sql
+            )
+            params = (normalize_participant(participant), lower, end_ts, start_ts)
+        if limit:
+            params += (limit,)
+        series_rows = self._series_rows(participant, start_ts, end_ts)
+        first_series = next(series_rows, None)
+        rows = self._conn.execute(sql, params)
+        if first_series is None:
+            for row in rows:
+                yield self._to_event(row)
+            return
+        series_rows = itertools.chain([first_series], series_rows)
+        # merge the single events with the occurrences of every series overlapping the window
+        streams = [((row["start_ts"], row["id"], row, None) for row in rows)]
+        if expand_recurring:
+            for row in series_rows:
+                streams.append(self._occurrence_stream(row, start_ts, end_ts))
+        else:
+            # the stored series come ordered by start, so they stay one lazy stream off the cursor
+            streams.append((row["start_ts"], row["id"], row, None) for row in series_rows)
+        merged = heapq.merge(*streams, key=lambda item: item[:2])
+        for count, (_, _, row, occurrence) in enumerate(merged, 1):
+            event = self._to_event(row)
+            if occurrence is not None:
+                event = event.model_copy(update={
+                    "start_time": format_occurrence(occurrence[0], event.start_time),
+                    "end_time": format_occurrence(occurrence[1], event.start_time),
+                })
+            yield event
+            if count == limit:
+                return
+
+    def _occurrence_stream(self, row: sqlite3.Row, start_ts: int, end_ts: int) -> Iterator[tuple]:
+        # a function of its own so each stream keeps its own row (a generator expression in the loop would see the last one)
+        for start, end in Series.from_row(row).occurrences(self.occurrences, start_ts, end_ts):
+            yield start, row["id"], row, (start, end)
+
+    def _series_rows(self, participant: Optional[str], start_ts: int, end_ts: int) -> Iterator[sqlite3.Row]:
+        """Cursor over the recurring events with occurrences possibly overlapping [start_ts, end_ts), by start."""
+        if participant is None:
+            return self._conn.execute(
+                "SELECT * FROM events WHERE recurrence IS NOT NULL AND start_ts < ? AND series_end_ts > ? "
+                "ORDER BY start_ts, id",
+                (end_ts, start_ts),
+            )
+        return self._conn.execute(
+            "SELECT e.* FROM series_participants s JOIN events e ON e.id = s.event_id "
+            "WHERE s.participant = ? AND e.start_ts < ? AND e.series_end_ts > ? ORDER BY e.start_ts, e.id",
+            (normalize_participant(participant), end_ts, start_ts),
+        )
+
+    def get_series(self, event_id: int) -> Optional[Series]:
+        row = self._conn.execute(
+            "SELECT * FROM events WHERE id = ? AND recurrence IS NOT NULL", (event_id,)
+        ).fetchone()
+        return Series.from_row(row) if row else None
+
+    def iter_series_participants(self) -> Iterator[tuple[str, Series]]:
+        """(participant, series) for every recurring event, one pair per participant."""
+        for row in self._conn.execute(
+            "SELECT s.participant, e.* FROM series_participants s JOIN events e ON e.id = s.event_id"
+        ):
+            yield row["participant"], Series.from_row(row)
+
+    def delete_event(self, event_id: int) -> bool:
+        with self.transaction() as conn:
+            row = conn.execute("SELECT start_ts, end_ts FROM events WHERE id = ?", (event_id,)).fetchone()
+            if row is None:
+                return False
+            participants = [r[0] for r in conn.execute(
+                "SELECT participant FROM event_participants WHERE event_id = ? "
+                "UNION SELECT participant FROM series_participants WHERE event_id = ?", (event_id, event_id)
+            )]
+            conn.execute("DELETE FROM event_participants WHERE event_id = ?", (event_id,))
+            conn.execute("DELETE FROM series_participants WHERE event_id = ?", (event_id,))
+            conn.execute("DELETE FROM events WHERE id = ?", (event_id,))
+            # a retry of the create that made this event must not be answered with it (or anything else) anymore
+            conn.execute("DELETE FROM idempotency_keys WHERE event_id = ?", (event_id,))
+            conn.execute(
+                "INSERT INTO event_log (op, event_id, start_ts, end_ts, participants) VALUES ('delete', ?, ?, ?, ?)",
+                (event_id, row["start_ts"], row["end_ts"], json.dumps(participants)),
+            )
+        return True
+
+    def last_change(self) -> int:
+        (seq,) = self._conn.execute("SELECT COALESCE(MAX(seq), 0) FROM event_log").fetchone()
+        return seq
+
+    def changes_since(self, seq: int) -> Iterator[tuple[int, str, int, int, int, List[str]]]:
+        """(seq, op, event_id, start_ts, end_ts, participants) for every write after `seq`."""
+        for row in self._conn.execute("SELECT * FROM event_log WHERE seq > ? ORDER BY seq", (seq,)):
+            yield row["seq"], row["op"], row["event_id"], row["start_ts"], row["end_ts"], json.loads(row["participants"])
+
+    def iter_participant_intervals(self) -> Iterator[tuple[str, int, int, int]]:
+        """(participant, start_ts, end_ts, event_id) for all events, grouped by participant & sorted by start."""
+        yield from self._conn.execute(
+            "SELECT participant, start_ts, end_ts, event_id FROM event_participants ORDER BY participant, start_ts, event_id"
+        )
+
+    def count(self) -> int:
+        (total,) = self._conn.execute("SELECT COUNT(*) FROM events").fetchone()
+        return total
+
+    def close(self) -> None:
+        self._conn.close()
+
+    @staticmethod
+    def _to_event(row: sqlite3.Row) -> StoredCalendarEvent:
+        return StoredCalendarEvent(
+            id=row["id"],
+            domain_type=row["domain_type"],
+            title=row["title"],
+            start_time=row["start_time"],
+            end_time=row["end_time"],
+            location=row["location"],
+            description=row["description"],
+            attendees=json.loads(row["attendees"]) if row["attendees"] is not None else None,
+            organizer=row["organizer"],
+            recurrence=RecurrenceRule.model_validate_json(row["recurrence"]) if row["recurrence"] else None,
+        )
@@ -0,0 +1,314 @@
+import logging
+
+try:
+    from .conflicts import ConflictIndex
+    from .recurrence import Series, format_occurrence, iter_occurrences, series_end
+    from .models import BulkEventCreationResult, CalendarEvent, CalendarEventList, EventConflict, EventCreationResult, FreeSlotList, StoredCalendarEvent
+    from .slots import find_free_slots as find_free_slot_ranges, parse_clock, to_free_slot
+    from .store import EventStore, event_participants, normalize_participant, to_timestamp
+except ImportError:  # run as a script (`python mcp_server/server.py`)
+    from conflicts import ConflictIndex
+    from recurrence import Series, format_occurrence, iter_occurrences, series_end
+    from models import BulkEventCreationResult, CalendarEvent, CalendarEventList, EventConflict, EventCreationResult, FreeSlotList, StoredCalendarEvent
+    from slots import find_free_slots as find_free_slot_ranges, parse_clock, to_free_slot
+    from store import EventStore, event_participants, normalize_participant, to_timestamp
+
+logger = logging.getLogger(__name__)
+
+# opened lazily, so importing the tools does not touch the database
+_store: EventStore | None = None
+_conflict_index: ConflictIndex | None = None
+
+
+def get_store() -> EventStore:
+  global _store
+  if _store is None:
+    _store = EventStore()
+  return _store
+
+
+def get_conflict_index() -> ConflictIndex:
+  global _conflict_index
+  if _conflict_index is None:
+    _conflict_index = ConflictIndex(get_store())
+  return _conflict_index
+
+
+def validate_event(event: CalendarEvent) -> None:
+  """Raise ValueError for an event the store would refuse: create_calendar_event raises it, the bulk tool reports it per event."""
+  if to_timestamp(event.end_time) < to_timestamp(event.start_time):
+    raise ValueError(f"Event '{event.title}' ends before it starts")
+
+
+def conflict_report(conflicts: dict[str, list[int]], window_start: int, window_end: int) -> list[EventConflict]:
+  events = {e.id: e for e in get_store().get_events({i for ids in conflicts.values() for i in ids})}
+  return [
+    EventConflict(
+      participant=participant,
+      event_id=event_id,
+      title=events[event_id].title,
+      start_time=start_time,
+      end_time=end_time,
+    )
+    for participant, ids in conflicts.items()
+    for event_id in ids
+    if event_id in events
+    for start_time, end_time in [occurrence_in(events[event_id], window_start, window_end)]
+  ]
+
+
+def occurrence_in(event: StoredCalendarEvent, window_start: int, window_end: int) -> tuple[str, str]:
+  """Start & end of the event, or for a recurring one of its first occurrence overlapping the window."""
+  if event.recurrence is None:
+    return event.start_time, event.end_time
+  for start, end in iter_occurrences(event.recurrence, event.start_time, event.end_time, window_start, window_end):
+    return format_occurrence(start, event.start_time), format_occurrence(end, event.start_time)
+  return event.start_time, event.end_time
+
+
+def new_event_conflicts(
+    indexes: list[ConflictIndex],
+    event: CalendarEvent,
+    participants: list[str],
+    event_id: int = 0,
+) -> tuple[dict[str, list[int]], tuple[int, int], Series | None]:
+  """
+    Events in the indexes overlapping a new event (any of its occurrences when it repeats), per participant.
+    Returns:
+        The conflicts, the window they were looked for in & the new event as a Series (None when it does not repeat).
+  """
+  window = to_timestamp(event.start_time), to_timestamp(event.end_time)
+  series = None
+  conflicts: dict[str, list[int]] = {}
+  for index in indexes:
+    if event.recurrence is None:
+      found = index.find_conflicts(participants, *window)
+    else:
+      if series is None:
+        last_end = series_end(event.recurrence, event.start_time, event.end_time)
+        series = Series(event_id, event.recurrence.model_dump_json(exclude_none=True), event.start_time, event.end_time, last_end)
+        window = window[0], last_end
+      found = index.find_series_conflicts(participants, series)
+    for participant, event_ids in found.items():
+      conflicts.setdefault(participant, []).extend(event_ids)
+  return conflicts, window, series
+
+
+async def create_calendar_event(
+    event: CalendarEvent,
+    allow_conflicts: bool = False,
+    idempotency_key: str | None = None,
+) -> EventCreationResult:
+  """
+    Responsible for creating a calendar event for provided event details and storing it in the calendar.
+    only allow APIs are google calendar and outlook calendar.
+    The event is rejected when an attendee or the organizer already has an overlapping event, unless allow_conflicts is set.
+    Repeating events are stored once, with a recurrence rule; their occurrences are checked for conflicts as well.
+    Args:
+        event (models.CalendarEvent): The calendar event to be created.
+        allow_conflicts (bool): Store the event even if it overlaps existing events.
+        idempotency_key (str, optional): Calls repeating a key get the event stored by the first one back instead of a new event.
+    Returns:
+        models.EventCreationResult: Whether the event was created, the stored event & the overlapping events found.
+  """
+  logger.info("--> [mcp-tool][create_calendar_event] - Creating calendar event: %s from %s to %s", event.title, event.start_time, event.end_time)
+  validate_event(event)
+  store, index = get_store(), get_conflict_index()
+  participants = [p for p, _ in event_participants(event)]
+  # the check & the insert share one write transaction, so concurrent servers cannot double-book
+  with store.transaction() as conn:
+    if idempotency_key:
+      existing = store.find_idempotent_event(conn, idempotency_key)
+      if existing is not None:
+        return EventCreationResult(created=True, event=existing, replayed=True)
+    index.sync()
+    conflicts, window, _ = new_event_conflicts([index], event, participants)
+    if conflicts and not allow_conflicts:
+      return EventCreationResult(created=False, conflicts=conflict_report(conflicts, *window))
+    (event_id,) = store.insert_events(conn, [event])
+    if idempotency_key:
+      store.remember_idempotency_key(conn, idempotency_key, event_id)
+  index.sync()
+  return EventCreationResult(
+    created=True,
+    event=StoredCalendarEvent(id=event_id, **event.model_dump()),
+    conflicts=conflict_report(conflicts, *window),
+  )
+
+
+async def create_calendar_events(
+    events: list[CalendarEvent],
+    allow_conflicts: bool = False,
+    idempotency_keys: list[str] | None = None,
+) -> BulkEventCreationResult:
+  """
+    Create several calendar events in one call; use it instead of repeated create_calendar_event calls.
+    The events are checked for conflicts together, against the stored events and against each other,
+    and the accepted ones are stored in one transaction. A rejected event does not stop the others.
+    Args:
+        events (list[models.CalendarEvent]): The calendar events to be created.
+        allow_conflicts (bool): Store the events even if they overlap existing events or each other.
+        idempotency_keys (list[str], optional): One key per event, as create_calendar_event takes it; an event whose key was seen before gets the event stored under it back instead of a new one.
+    Returns:
+        models.BulkEventCreationResult: One result per event, in input order.
+  """
+  logger.info("--> [mcp-tool][create_calendar_events] - Creating %d calendar events", len(events))
+  store, index = get_store(), get_conflict_index()
+  # events accepted so far, under temporary ids -1, -2, ... until they are stored
+  batch = ConflictIndex(store, load=False)
+  results: list[EventCreationResult | None] = [None] * len(events)
+  checked: dict[int, tuple[dict[str, list[int]], tuple[int, int]]] = {}
+  accepted: list[int] = []
+  if idempotency_keys is not None and len(idempotency_keys) != len(events):
+    raise ValueError(f"{len(idempotency_keys)} idempotency keys for {len(events)} events")
+  # position -> earlier position with the same key: gets that event back, as a second create_calendar_event would
+  repeats: dict[int, int] = {}
+  first_with_key: dict[str, int] = {}
+  with store.transaction() as conn:
+    index.sync()
+    for position, event in enumerate(events):
+      key = idempotency_keys[position] if idempotency_keys else None
+      if key:
+        if key in first_with_key:
+          repeats[position] = first_with_key[key]
+          continue
+        first_with_key[key] = position
+        existing = store.find_idempotent_event(conn, key)
+        if existing is not None:
+          results[position] = EventCreationResult(created=True, event=existing, replayed=True)
+          continue
+      participants = [p for p, _ in event_participants(event)]
+      temporary_id = -len(accepted) - 1
+      try:
+        validate_event(event)
+        conflicts, window, series = new_event_conflicts([index, batch], event, participants, temporary_id)
+      except ValueError as e:
+        results[position] = EventCreationResult(created=False, error=str(e))
+        continue
+      checked[position] = conflicts, window
+      if conflicts and not allow_conflicts:
+        continue
+      if series is None:
+        batch.add(temporary_id, *window, participants)
+      else:
+        batch.add_series(series, participants)
+      accepted.append(position)
+    event_ids = store.insert_events(conn, [events[position] for position in accepted])
+    if idempotency_keys:
+      for position, event_id in zip(accepted, event_ids):
+        store.remember_idempotency_key(conn, idempotency_keys[position], event_id)
+  index.sync()
+  stored = dict(zip(accepted, event_ids))
+  for position, (conflicts, window) in checked.items():
+    conflicts = {
+      participant: [event_ids[-i - 1] if i < 0 else i for i in ids]
+      for participant, ids in conflicts.items()
+    }
+    event_id = stored.get(position)
+    results[position] = EventCreationResult(
+      created=event_id is not None,
+      event=StoredCalendarEvent(id=event_id, **events[position].model_dump()) if event_id is not None else None,
+      conflicts=conflict_report(conflicts, *window),
+    )
+  for position, first in repeats.items():
+    result = results[first]
+    results[position] = EventCreationResult(created=True, event=result.event, replayed=True) if result.created else result
+  return BulkEventCreationResult(results=results)
+
+
+async def get_calendar_event(event_id: int) -> StoredCalendarEvent:
+  """
+    Fetch a stored calendar event by id.
+    Args:
+        event_id (int): Id returned when the event was created.
+    Returns:
+        models.StoredCalendarEvent: The stored event.
+  """
+  event = get_store().get_event(event_id)
+  if event is None:
+    raise ValueError(f"Calendar event {event_id} not found")
+  return event
+
+
+async def list_calendar_events(start_time: str, end_time: str, participant: str | None = None, limit: int = 100) -> CalendarEventList:
+  """
+    List the events overlapping a time range, optionally only those a participant attends or organizes.
+    Recurring events are listed once per occurrence in the range.
+    Args:
+        start_time (str): Range start in ISO 8601 format.
+        end_time (str): Range end in ISO 8601 format.
+        participant (str, optional): Attendee or organizer to filter on.
+        limit (int): Maximum number of events to return.
+    Returns:
+        models.CalendarEventList: Matching events ordered by start time.
+  """
+  return CalendarEventList(events=get_store().list_events(start_time, end_time, participant, limit))
+
+
+async def delete_calendar_event(event_id: int) -> bool:
+  """
+    Delete a stored calendar event.
+    Args:
+        event_id (int): Id of the event to delete.
+    Returns:
+        bool: True if the event existed and was deleted, False otherwise.
+  """
+  deleted = get_store().delete_event(event_id)
+  get_conflict_index().sync()
+  return deleted
+
+
+async def find_free_slots(
+    participants: list[str],
+    duration_minutes: int,
+    window_start: str,
+    window_end: str,
+    working_hours_start: str = "09:00",
+    working_hours_end: str = "17:00",
+    utc_offset_minutes: int = 0,
+    weekdays_only: bool = True,
+    count: int = 5,
+    granularity_minutes: int = 15,
+) -> FreeSlotList:
+  """
+    Find the earliest time slots where all participants are free, within working hours.
+    Args:
+        participants (list[str]): Attendees (and organizer) who must all be free.
+        duration_minutes (int): Length of the meeting in minutes.
+        window_start (str): Earliest start to consider, ISO 8601.
+        window_end (str): Latest end to consider, ISO 8601.
+        working_hours_start (str): Start of the working day, "HH:MM" local time.
+        working_hours_end (str): End of the working day, "HH:MM" local time.
+        utc_offset_minutes (int): Offset of the participants' local time from UTC, in minutes.
+        weekdays_only (bool): Skip saturdays and sundays.
+        count (int): Number of slots to return.
+        granularity_minutes (int): Slot grid; meetings start on multiples of it.
+    Returns:
+        models.FreeSlotList: Up to `count` non-overlapping free slots, earliest first.
+  """
+  index = get_conflict_index()
+  index.sync()
+  ranges = find_free_slot_ranges(
+    index,
+    [normalize_participant(p) for p in participants],
+    duration_minutes,
+    to_timestamp(window_start),
+    to_timestamp(window_end),
+    day_start_minute=parse_clock(working_hours_start),
+    day_end_minute=parse_clock(working_hours_end),
+    utc_offset_minutes=utc_offset_minutes,
+    weekdays_only=weekdays_only,
+    count=count,
+    granularity_minutes=granularity_minutes,
+  )
+  return FreeSlotList(slots=[to_free_slot(start, end, utc_offset_minutes) for start, end in ranges])
+
+
+TOOLS = [
+  create_calendar_event,
+  create_calendar_events,
+  get_calendar_event,
+  list_calendar_events,
+  delete_calendar_event,
+  find_free_slots,
+]
@@ -1,6 +1,13 @@
 
 from .models import (
+  EventBatchItemResult,
   EventConfirmation,
   EventDetails,
-  EventExtraction
+  EventExtraction,
+  EventJobStatus,
+  EventParseResult,
+  EventRecurrence,
+  FreeSlot,
+  FreeSlotList,
+  FreeSlotQuery,
 )
@@ -21,6 +21,17 @@ class EventExtraction(BaseModel):
     confidence_score: float = Field(description="Confidence score between 0 and 1")
 
 
+class EventRecurrence(BaseModel):
+    """How a repeating event repeats"""
+    frequency: str = Field(description="daily, weekly or monthly")
+    interval: int = Field(description="Repeat every N days/weeks/months, 1 unless stated otherwise")
+    count: Optional[int] = Field(description="Number of occurrences, null when not stated")
+    until: Optional[str] = Field(description="Last date the event may occur on (ISO 8601), null when not stated")
+    weekdays: Optional[list[str]] = Field(
+        description="Weekly events: two-letter days (MO, TU, WE, TH, FR, SA, SU), null for the weekday of the first occurrence"
+    )
+
+
 class EventDetails(BaseModel):
     """Second LLM call: Parse specific event details"""
     name: str = Field(description="Name of the event")
@@ -29,3 +40,59 @@ class EventDetails(BaseModel):
     )
     duration_minutes: int = Field(description="Expected duration in minutes")
     participants: list[str] = Field(description="List of participants")
+    recurrence: Optional[EventRecurrence] = Field(
+        default=None, description="Repeat rule for recurring events (date is then the first occurrence), null for one-off events"
+    )
+
+
+class EventParseResult(BaseModel):
+    """Single-pass LLM call: gate check and event details in one response"""
+    extraction: EventExtraction = Field(
+        description="Whether the text describes a calendar event"
+    )
+    details: Optional[EventDetails] = Field(
+        description="Parsed event details, null when the text is not a calendar event"
+    )
+
+
+class EventBatchItemResult(BaseModel):
+    """Outcome of one prompt in a batch import"""
+    index: int = Field(description="Position of the prompt in the submitted batch")
+    status: str = Field(description="created, rejected (not a calendar event) or error")
+    confirmation: Optional[EventConfirmation] = Field(
+        default=None, description="Confirmation for created events"
+    )
+    error: Optional[str] = Field(default=None, description="Error message for failed items")
+
+
+class FreeSlotQuery(BaseModel):
+    """Find-a-slot request: who must attend, for how long, and where to look"""
+    participants: list[str] = Field(description="Participants who must all be free")
+    duration_minutes: int = Field(gt=0, description="Meeting duration in minutes")
+    window_start: str = Field(description="Earliest start to consider, ISO 8601")
+    window_end: str = Field(description="Latest end to consider, ISO 8601; at most 366 days after window_start")
+    working_hours_start: str = Field(default="09:00", description="Start of the working day, HH:MM local time")
+    working_hours_end: str = Field(default="17:00", description="End of the working day, HH:MM local time")
+    utc_offset_minutes: int = Field(default=0, description="Local time offset from UTC in minutes")
+    weekdays_only: bool = Field(default=True, description="Skip saturdays and sundays")
+    count: int = Field(default=5, gt=0, le=100, description="Number of slots to return")
+    granularity_minutes: int = Field(default=15, gt=0, description="Meetings start on multiples of this")
+
+
+class FreeSlot(BaseModel):
+    start_time: str = Field(description="Start time of the free slot in ISO format")
+    end_time: str = Field(description="End time of the free slot in ISO format")
+
+
+class FreeSlotList(BaseModel):
+    slots: list[FreeSlot] = Field(description="Earliest common free slots, in order")
+
+
+class EventJobStatus(BaseModel):
+    """State of an asynchronous /event-create job"""
+    job_id: str = Field(description="Job identifier")
+    status: str = Field(description="queued, running, succeeded, rejected (not a calendar event) or failed")
+    confirmation: Optional[EventConfirmation] = Field(
+        default=None, description="Confirmation once the event was created"
+    )
+    error: Optional[str] = Field(default=None, description="Error message for failed jobs")
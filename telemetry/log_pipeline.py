@@ -0,0 +1,111 @@
+import json
+import logging
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, List, Optional, TextIO
+
+from const import const
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+# LogRecord attributes that are not user `extra=` fields
+_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, `extra=` fields and the traceback."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "ts": record.created,
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_FIELDS})
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to the listener thread without blocking the event loop.
+    Unlike the stock QueueHandler the message is not formatted here: the
+    `%`-args (model reprs included) are rendered by the listener thread.
+    When the queue is full the record is dropped and counted.
+    """
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # same process, so the record (& its args) can cross the queue as is
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[NonBlockingQueueHandler] = None
+
+
+def setup_logging(
+    level: str = const.LOG_LEVEL,
+    json_path: str = const.LOG_JSON_PATH,
+    queue_size: int = const.LOG_QUEUE_SIZE,
+    stream: Optional[TextIO] = None,
+) -> QueueListener:
+    """
+    Route the root logger through a bounded queue to a background writer thread.
+    Args:
+        level: Root log level; records below it are discarded before any formatting.
+        json_path: Also write JSON lines to this file (off when empty).
+        queue_size: Records buffered for the writer; more are dropped rather than waited on.
+        stream: Text sink; defaults to stdout, which `LOG_STDOUT=false` turns off.
+    Returns:
+        The running listener; `shutdown_logging()` flushes & stops it.
+    """
+    global _listener, _handler
+    shutdown_logging()
+
+    sinks: List[logging.Handler] = []
+    if const.LOG_STDOUT or stream is not None:
+        text = logging.StreamHandler(stream or sys.stdout)
+        text.setFormatter(logging.Formatter(TEXT_FORMAT))
+        sinks.append(text)
+    if json_path:
+        json_sink = logging.FileHandler(json_path)
+        json_sink.setFormatter(JsonLinesFormatter())
+        sinks.append(json_sink)
+
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(_handler.queue, *sinks, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+def shutdown_logging() -> None:
+    """Write out the queued records and stop the writer thread."""
+    global _listener
+    if _handler is not None:
+        logging.getLogger().removeHandler(_handler)
+    if _listener is not None:
+        _listener.stop()
+        for sink in _listener.handlers:
+            sink.close()
+        _listener = None
+
+
+def dropped_records() -> int:
+    return _handler.dropped if _handler is not None else 0
@@ -0,0 +1,141 @@
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# seconds; covers cached/fast-path stages (sub-millisecond) up to slow model calls
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+TOKEN_BUCKETS: Tuple[float, ...] = (16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Fixed-bucket histogram (Prometheus semantics: `le` upper bounds, cumulative on export)."""
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        total, rows = 0, []
+        for bound, count in zip((*(_format(b) for b in self.bounds), "+Inf"), self.counts):
+            total += count
+            rows.append((bound, total))
+        return rows
+
+
+class HistogramFamily:
+    """Histograms of one metric, one per label set."""
+    def __init__(self, name: str, help_text: str, bounds: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.bounds = bounds
+        self.children: Dict[Labels, Histogram] = {}
+
+    def labels(self, **labels: str) -> Histogram:
+        key = tuple(sorted(labels.items()))
+        histogram = self.children.get(key)
+        if histogram is None:
+            histogram = self.children[key] = Histogram(self.bounds)
+        return histogram
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        for key, histogram in self.children.items():
+            for bound, total in histogram.cumulative():
+                yield f"{self.name}_bucket{_labels(key + (('le', bound),))} {total}"
+            yield f"{self.name}_sum{_labels(key)} {_format(histogram.sum)}"
+            yield f"{self.name}_count{_labels(key)} {histogram.count}"
+
+
+class CounterFamily:
+    """Monotonic counters of one metric, one per label set."""
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in self.values.items():
+            yield f"{self.name}{_labels(key)} {_format(value)}"
+
+
+class GaugeFamily:
+    """Point-in-time values of one metric, one per label set."""
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self.values: Dict[Labels, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        self.values[tuple(sorted(labels.items()))] = value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} gauge"
+        for key, value in self.values.items():
+            yield f"{self.name}{_labels(key)} {_format(value)}"
+
+
+class MetricsRegistry:
+    """Process-wide metric families, rendered in the Prometheus text exposition format."""
+    def __init__(self):
+        self.families: Dict[str, HistogramFamily | CounterFamily | GaugeFamily] = {}
+
+    def histogram(self, name: str, help_text: str, bounds: Sequence[float] = LATENCY_BUCKETS) -> HistogramFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = HistogramFamily(name, help_text, bounds)
+        return family
+
+    def counter(self, name: str, help_text: str) -> CounterFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = CounterFamily(name, help_text)
+        return family
+
+    def gauge(self, name: str, help_text: str) -> GaugeFamily:
+        family = self.families.get(name)
+        if family is None:
+            family = self.families[name] = GaugeFamily(name, help_text)
+        return family
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for family in self.families.values():
+            lines.extend(family.render())
+        return "\n".join(lines) + "\n"
+
+
+def _format(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(key: Labels) -> str:
+    if not key:
+        return ""
+    escaped = (
+        f'{name}="' + value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in key
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+# process-wide registry, served on GET /metrics
+registry = MetricsRegistry()
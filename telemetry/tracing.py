@@ -0,0 +1,218 @@
+import contextvars
+import heapq
+import itertools
+import json
+import logging
+import queue
+import random
+import time
+from contextlib import contextmanager
+from logging.handlers import QueueListener
+from typing import Any, Dict, Iterator, List, Optional
+
+from const import const
+from telemetry.log_pipeline import NonBlockingQueueHandler
+from telemetry.metrics import TOKEN_BUCKETS, Histogram, registry
+
+STAGE_SECONDS = registry.histogram(
+    "calendar_pipeline_stage_duration_seconds", "Wall time of one pipeline stage."
+)
+STAGE_PROMPT_TOKENS = registry.histogram(
+    "calendar_pipeline_stage_prompt_tokens", "Prompt tokens per model call, from the OpenAI usage field.", TOKEN_BUCKETS
+)
+STAGE_COMPLETION_TOKENS = registry.histogram(
+    "calendar_pipeline_stage_completion_tokens", "Completion tokens per model call, from the OpenAI usage field.", TOKEN_BUCKETS
+)
+STAGE_ERRORS = registry.counter("calendar_pipeline_stage_errors_total", "Pipeline stages that raised.")
+REQUEST_SECONDS = registry.histogram(
+    "calendar_pipeline_request_duration_seconds", "Wall time of one event-creation request, by outcome."
+)
+
+# per-stage histograms, resolved once per stage instead of on every span
+_stage_seconds: Dict[str, Histogram] = {}
+_stage_tokens: Dict[str, tuple[Histogram, Histogram]] = {}
+
+_current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar("current_trace", default=None)
+
+
+class Span:
+    """
+    Timing of one pipeline stage. Use as a context manager around the stage; the
+    duration (and any token usage added with `add_usage`) goes to the stage
+    histograms on exit, and to the request trace when one is active.
+    """
+    __slots__ = ("stage", "attributes", "start", "duration", "prompt_tokens", "completion_tokens", "error")
+
+    def __init__(self, stage: str, attributes: Dict[str, Any]):
+        self.stage = stage
+        self.attributes = attributes
+        self.start = 0.0
+        self.duration = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.error: Optional[str] = None
+
+    def add_usage(self, usage: Any) -> None:
+        """Add the token counts of an OpenAI `usage` object (None is ignored)."""
+        if usage is None:
+            return
+        self.prompt_tokens += usage.prompt_tokens or 0
+        self.completion_tokens += usage.completion_tokens or 0
+
+    def __enter__(self) -> "Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.duration = time.perf_counter() - self.start
+        seconds = _stage_seconds.get(self.stage)
+        if seconds is None:
+            seconds = _stage_seconds[self.stage] = STAGE_SECONDS.labels(stage=self.stage)
+        seconds.observe(self.duration)
+        if self.prompt_tokens or self.completion_tokens:
+            tokens = _stage_tokens.get(self.stage)
+            if tokens is None:
+                tokens = _stage_tokens[self.stage] = (
+                    STAGE_PROMPT_TOKENS.labels(stage=self.stage),
+                    STAGE_COMPLETION_TOKENS.labels(stage=self.stage),
+                )
+            tokens[0].observe(self.prompt_tokens)
+            tokens[1].observe(self.completion_tokens)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+            STAGE_ERRORS.inc(stage=self.stage)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.spans.append(self)
+        return False
+
+
+def span(stage: str, **attributes: Any) -> Span:
+    """Time a pipeline stage: `with span("extraction") as s: ...; s.add_usage(completion.usage)`."""
+    return Span(stage, attributes)
+
+
+class Trace:
+    """The spans of one request, in completion order."""
+    __slots__ = ("name", "attributes", "started_at", "start", "duration", "outcome", "spans")
+
+    def __init__(self, name: str, attributes: Dict[str, Any]):
+        self.name = name
+        self.attributes = attributes
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.outcome = "ok"
+        self.spans: List[Span] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "outcome": self.outcome,
+            **self.attributes,
+            "spans": [
+                {
+                    "stage": s.stage,
+                    "offset_ms": round((s.start - self.start) * 1000, 3),
+                    "duration_ms": round(s.duration * 1000, 3),
+                    "prompt_tokens": s.prompt_tokens,
+                    "completion_tokens": s.completion_tokens,
+                    "error": s.error,
+                    **s.attributes,
+                }
+                for s in self.spans
+            ],
+        }
+
+
+class _TraceLineFormatter(logging.Formatter):
+    """The queued record's `msg` is the Trace itself: serialized here, in the writer thread."""
+    def format(self, record: logging.LogRecord) -> str:
+        return json.dumps(record.msg.to_dict())
+
+
+class SlowTraceLog:
+    """
+    Keeps the `keep` slowest request traces in memory, and appends (a `sample_rate`
+    share of) the requests slower than `threshold_s` to a JSON-lines file when a
+    path is given. Only traces that qualify are ever serialized. The file is written
+    by a background thread fed through a bounded queue (like the log pipeline in
+    telemetry/log_pipeline.py), so a slow disk never blocks the event loop; traces
+    are dropped, not waited on, when the queue is full.
+    """
+    def __init__(
+        self,
+        path: str = "",
+        threshold_s: float = 2.0,
+        sample_rate: float = 1.0,
+        keep: int = 50,
+        queue_size: int = 1000,
+    ):
+        self.path = path
+        self.threshold_s = threshold_s
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self.queue_size = queue_size
+        self._slowest: List[tuple[float, int, Trace]] = []  # min-heap on duration
+        self._seq = itertools.count()
+        self._handler: Optional[NonBlockingQueueHandler] = None
+        self._listener: Optional[QueueListener] = None
+
+    def _writer(self) -> NonBlockingQueueHandler:
+        """Queue to the file-writing thread, started on the first slow trace."""
+        if self._handler is None:
+            sink = logging.FileHandler(self.path, delay=True)  # opened by the writer thread on its first write
+            sink.setFormatter(_TraceLineFormatter())
+            self._handler = NonBlockingQueueHandler(queue.Queue(maxsize=self.queue_size))
+            self._listener = QueueListener(self._handler.queue, sink)
+            self._listener.start()
+        return self._handler
+
+    def offer(self, trace: Trace) -> None:
+        entry = (trace.duration, next(self._seq), trace)
+        if len(self._slowest) < self.keep:
+            heapq.heappush(self._slowest, entry)
+        elif self.keep and trace.duration > self._slowest[0][0]:
+            heapq.heapreplace(self._slowest, entry)
+        if self.path and trace.duration >= self.threshold_s and random.random() < self.sample_rate:
+            self._writer().enqueue(logging.makeLogRecord({"msg": trace}))
+
+    def slowest(self) -> List[Dict[str, Any]]:
+        return [trace.to_dict() for _, _, trace in sorted(self._slowest, key=lambda e: e[0], reverse=True)]
+
+    def close(self) -> None:
+        """Write out the queued traces and stop the writer thread."""
+        if self._listener is not None:
+            self._listener.stop()
+            for sink in self._listener.handlers:
+                sink.close()
+        self._handler = self._listener = None
+
+
+@contextmanager
+def trace_request(name: str, **attributes: Any) -> Iterator[Trace]:
+    """Collect the spans of one request; set `trace.outcome` inside the block to label it."""
+    trace = Trace(name, attributes)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    except BaseException:
+        trace.outcome = "error"
+        raise
+    finally:
+        _current_trace.reset(token)
+        trace.duration = time.perf_counter() - trace.start
+        REQUEST_SECONDS.labels(outcome=trace.outcome).observe(trace.duration)
+        slow_traces.offer(trace)
+
+
+# process-wide slow-request log, served on GET /traces/slow
+slow_traces = SlowTraceLog(
+    path=const.TRACE_SLOW_LOG_PATH,
+    threshold_s=const.TRACE_SLOW_THRESHOLD_MS / 1000,
+    sample_rate=const.TRACE_SLOW_SAMPLE_RATE,
+    keep=const.TRACE_SLOW_KEEP,
+    queue_size=const.LOG_QUEUE_SIZE,
+)